@@ -0,0 +1,41 @@
+# app/models/audio.py
+import io
+import librosa
+import numpy as np
+import soundfile as sf
+
+# Abtastrate, die Whisper erwartet
+WHISPER_SAMPLE_RATE = 16000
+
+
+def to_float32_mono(audio_array):
+    """Wandelt ein Gradio-Audio-Array (int oder float, mono oder stereo) in float32 mono im Bereich [-1, 1] um"""
+    audio_array = np.asarray(audio_array)
+
+    if np.issubdtype(audio_array.dtype, np.integer):
+        # Ganzzahlige PCM-Samples auf [-1, 1] skalieren
+        scale = float(np.iinfo(audio_array.dtype).max) + 1.0
+        audio_array = audio_array.astype(np.float32) / scale
+    else:
+        audio_array = audio_array.astype(np.float32, copy=False)
+
+    # Gradio liefert Stereo als (samples, channels)
+    if audio_array.ndim > 1:
+        audio_array = audio_array.mean(axis=1)
+
+    return audio_array
+
+
+def prepare_whisper_audio(audio_array, sample_rate):
+    """Bereitet Gradio-Audio im Speicher für Whisper vor: float32, mono, 16 kHz"""
+    audio_array = to_float32_mono(audio_array)
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        audio_array = librosa.resample(audio_array, orig_sr=sample_rate, target_sr=WHISPER_SAMPLE_RATE)
+    return np.ascontiguousarray(audio_array, dtype=np.float32)
+
+
+def encode_wav(audio_array, sample_rate):
+    """Kodiert ein Audio-Array im Speicher als WAV und gibt die Bytes zurück"""
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_array, sample_rate, format="WAV")
+    return buffer.getvalue()
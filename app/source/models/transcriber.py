@@ -1,12 +1,9 @@
 # app/models/transcriber.py
-import librosa
 import whisper
-import tempfile
-import soundfile as sf
 import requests
-import numpy as np
 
 from abc import ABC, abstractmethod
+from source.models.audio import encode_wav, prepare_whisper_audio
 
 
 class AudioTranscriber(ABC):
@@ -36,11 +33,10 @@ class WhisperLocalTranscriber(AudioTranscriber):
                 "without_timestamps": True,
             }
 
-            # Speichere Audio temporär
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_audio:
-                sf.write(temp_audio.name, audio_array, sample_rate)
-                result = self.model.transcribe(temp_audio.name, **options)
-                return result["text"]
+            # Audio im Speicher auf 16 kHz float32 bringen, ohne temporäre Datei
+            audio = prepare_whisper_audio(audio_array, sample_rate)
+            result = self.model.transcribe(audio, **options)
+            return result["text"]
 
         except Exception as e:
             print(f"Transkriptionsfehler: {str(e)}")
@@ -72,26 +68,21 @@ class WhisperHuggingFaceTranscriber(AudioTranscriber):
             return ""
 
         try:
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_audio:
-                # Write the audio array to a temporary file
-                sf.write(temp_audio.name, audio_array, sample_rate)
-                temp_audio.flush()
-
-                # Read and send the file directly as binary data
-                with open(temp_audio.name, "rb") as audio_file:
-                    headers = {"Authorization": f"Bearer {self.api_token}"}
-                    response = requests.post(
-                        self.api_url,
-                        headers=headers,
-                        data=audio_file
-                    )
-
-                    if response.status_code == 200:
-                        return response.json().get("text", "")
-                    else:
-                        print(f"Response headers: {response.headers}")
-                        print(f"Response content: {response.content}")
-                        return f"Error: {response.status_code} - {response.json()}"
+            # Encode the audio array as WAV in memory and send it as binary data
+            audio_bytes = encode_wav(audio_array, sample_rate)
+            headers = {"Authorization": f"Bearer {self.api_token}"}
+            response = requests.post(
+                self.api_url,
+                headers=headers,
+                data=audio_bytes
+            )
+
+            if response.status_code == 200:
+                return response.json().get("text", "")
+            else:
+                print(f"Response headers: {response.headers}")
+                print(f"Response content: {response.content}")
+                return f"Error: {response.status_code} - {response.json()}"
 
         except Exception as e:
             answer = f"Transcription error: {str(e)}"
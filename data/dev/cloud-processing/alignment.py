@@ -0,0 +1,186 @@
+import json
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Frame rate of the Tagesschau broadcasts, used when the landmark parquet does not store one
+DEFAULT_FPS = 25.0
+
+ALIGNMENT_LEVELS = ("segment", "word")
+
+
+def transcript_spans(segments: list, level: str = "segment"):
+    """
+    Flatten a Whisper transcript into time-ordered arrays.
+
+    Args:
+        segments: Segments as written by transcription.transcribe_video
+        level: "segment" for Whisper segments, "word" for their word timestamps
+
+    Returns:
+        tuple: (starts, ends) as float64 arrays in seconds and the list of texts
+    """
+    if level not in ALIGNMENT_LEVELS:
+        raise ValueError(f"Unknown alignment level: {level}, expected one of {ALIGNMENT_LEVELS}")
+
+    if level == "word":
+        items = [word for segment in segments for word in segment.get("words") or []]
+        text_key = "word"
+    else:
+        items = segments
+        text_key = "text"
+
+    starts = np.fromiter((item["start"] for item in items), dtype=np.float64, count=len(items))
+    ends = np.fromiter((item["end"] for item in items), dtype=np.float64, count=len(items))
+    texts = [item[text_key].strip() for item in items]
+
+    # Whisper emits spans in order, sort only if a fallback produced overlapping windows
+    if len(starts) > 1 and np.any(np.diff(starts) < 0):
+        order = np.argsort(starts, kind="stable")
+        starts, ends, texts = starts[order], ends[order], [texts[i] for i in order]
+    return starts, ends, texts
+
+
+def time_to_rows(times, fps: float, frame_numbers: np.ndarray) -> np.ndarray:
+    """
+    Index of the first landmark row at or after each time.
+
+    Args:
+        times: Times in seconds
+        fps: Frame rate of the video
+        frame_numbers: Sorted frame numbers of the landmark rows (the parquet `frame` column)
+
+    Returns:
+        np.ndarray: Row indices, len(frame_numbers) for times after the last row
+    """
+    return np.searchsorted(frame_numbers, np.asarray(times, dtype=np.float64) * fps, side="left")
+
+
+def align_examples(
+    segments: list,
+    fps: float = DEFAULT_FPS,
+    frame_numbers: np.ndarray = None,
+    num_frames: int = None,
+    level: str = "segment",
+    cut_times=None,
+    min_frames: int = 1,
+    max_overrun_frames: int = 1
+) -> pa.Table:
+    """
+    Align transcript spans with landmark frames as (frame range, text) training examples.
+
+    Every span covers the landmark rows whose frame lies in [start * fps, end * fps). With
+    cut_times the spans are grouped instead: all spans ending in (previous cut, cut] form one
+    example spanning that interval, like find_and_concatenate_segments in segment_video.ipynb.
+    All lookups are binary searches over sorted arrays, so a video is a single linear pass.
+
+    Args:
+        segments: Segments as written by transcription.transcribe_video
+        fps: Frame rate of the video
+        frame_numbers: Sorted frame numbers of the landmark rows, defaults to range(num_frames)
+        num_frames: Number of landmark rows when frame_numbers is not given
+        level: "segment" or "word", see transcript_spans
+        cut_times: Optional sorted cut points in seconds, e.g. pauses in the signing
+        min_frames: Examples covering fewer landmark rows are dropped
+        max_overrun_frames: Examples ending more than this many frames after the last landmark
+            frame are dropped, their text would be paired with cut-short rows. Shorter overruns
+            (the audio track is often a little longer than the video) are clipped to the last frame
+
+    Returns:
+        pa.Table: example, start_time, end_time, start_frame, end_frame (exclusive),
+            row_start, row_end (exclusive row offsets into the landmark parquet) and text
+    """
+    if frame_numbers is None:
+        if num_frames is None:
+            raise ValueError("Either frame_numbers or num_frames is required")
+        frame_numbers = np.arange(num_frames)
+    frame_numbers = np.asarray(frame_numbers)
+
+    starts, ends, texts = transcript_spans(segments, level)
+
+    if cut_times is not None:
+        cut_times = np.asarray(cut_times, dtype=np.float64)
+        # Example k spans (cut k-1, cut k], spans ending after the last cut are dropped
+        groups = np.searchsorted(cut_times, ends, side="left")
+        keep = groups < len(cut_times)
+        groups = groups[keep]
+        texts = [text for text, kept in zip(texts, keep) if kept]
+
+        # Spans are ordered, so every group is one contiguous run
+        run_starts = np.flatnonzero(np.diff(groups, prepend=-1))
+        run_ends = np.append(run_starts[1:], len(groups))
+        example_groups = groups[run_starts]
+        texts = [" ".join(texts[start:end]) for start, end in zip(run_starts, run_ends)]
+        starts = np.where(example_groups > 0, cut_times[np.maximum(example_groups - 1, 0)], 0.0)
+        ends = cut_times[example_groups]
+
+    row_start = time_to_rows(starts, fps, frame_numbers)
+    row_end = time_to_rows(ends, fps, frame_numbers)
+    start_frames = np.ceil(starts * fps).astype(np.int64)
+    end_frames = np.ceil(ends * fps).astype(np.int64)
+
+    video_frames = int(frame_numbers[-1]) + 1 if len(frame_numbers) else 0
+    within_video = end_frames <= video_frames + max_overrun_frames
+    end_frames = np.minimum(end_frames, video_frames)
+    keep = ((row_end - row_start) >= min_frames) & within_video
+    keep_indices = np.flatnonzero(keep)
+
+    return pa.table({
+        "example": pa.array(np.arange(len(keep_indices), dtype=np.int32)),
+        "start_time": pa.array(starts[keep]),
+        "end_time": pa.array(ends[keep]),
+        "start_frame": pa.array(start_frames[keep]),
+        "end_frame": pa.array(end_frames[keep]),
+        "row_start": pa.array(row_start[keep].astype(np.int64)),
+        "row_end": pa.array(row_end[keep].astype(np.int64)),
+        "text": pa.array([texts[i] for i in keep_indices], type=pa.string()),
+    })
+
+
+def align_files(landmark_path: str, transcript_path: str, fps: float = None, **kwargs) -> pa.Table:
+    """
+    Align one video's landmark parquet with its transcript JSON.
+
+    Only the `frame` column of the parquet is read. The frame rate is taken from the `fps`
+    entry of the parquet metadata written by landmark_extraction, falling back to DEFAULT_FPS.
+
+    Args:
+        landmark_path: Landmark parquet file
+        transcript_path: Transcript JSON file
+        fps: Frame rate overriding the stored one
+        **kwargs: Passed on to align_examples
+
+    Returns:
+        pa.Table: See align_examples
+    """
+    frames = pq.read_table(landmark_path, columns=["frame"])
+    if fps is None:
+        stored = (frames.schema.metadata or {}).get(b"fps")
+        fps = json.loads(stored) if stored else None
+    fps = fps or DEFAULT_FPS
+
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        segments = json.load(f)
+
+    return align_examples(segments, fps=fps, frame_numbers=frames.column("frame").to_numpy(), **kwargs)
+
+
+def align_corpus(videos: dict, **kwargs) -> pa.Table:
+    """
+    Align many videos into one table.
+
+    Args:
+        videos: {video_id: (landmark_path, transcript_path)}
+        **kwargs: Passed on to align_files
+
+    Returns:
+        pa.Table: align_examples columns with a leading `video_id` column
+    """
+    tables = []
+    for video_id, (landmark_path, transcript_path) in videos.items():
+        table = align_files(landmark_path, transcript_path, **kwargs)
+        tables.append(table.add_column(0, "video_id", pa.array([video_id] * len(table), type=pa.string())))
+
+    if not tables:
+        return align_examples([], num_frames=0).add_column(0, "video_id", pa.array([], type=pa.string()))
+    return pa.concat_tables(tables)
@@ -0,0 +1,38 @@
+import subprocess
+import numpy as np
+
+# Sample rate Whisper expects
+WHISPER_SAMPLE_RATE = 16000
+
+
+def load_audio(path: str, sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode the audio track of a media file into a mono float32 array in memory.
+
+    ffmpeg resamples and downmixes the audio and pipes raw f32le samples to stdout,
+    so no intermediate wav file is written. The result can be passed to
+    Whisper's model.transcribe directly.
+
+    Args:
+        path: Path to the video or audio file
+        sample_rate: Output sample rate
+
+    Returns:
+        np.ndarray: Samples in [-1, 1]
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg cannot decode the file, e.g. it has no audio track
+    """
+    command = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-i", path,
+        "-vn",                    # Skip decoding the video stream
+        "-ac", "1",               # Mono audio
+        "-ar", str(sample_rate),  # Sample rate required by Whisper
+        "-f", "f32le",
+        "-"
+    ]
+    result = subprocess.run(command, check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype=np.float32)
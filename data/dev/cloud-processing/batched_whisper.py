@@ -0,0 +1,250 @@
+import numpy as np
+from audio import WHISPER_SAMPLE_RATE
+
+# Whisper decodes 30 second windows, chunks are kept slightly shorter so no speech is trimmed
+MAX_CHUNK_SECONDS = 29.5
+
+# Thresholds Whisper's own transcribe loop uses to detect silent or failed windows
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+COMPRESSION_RATIO_THRESHOLD = 2.4
+
+
+def split_on_silence(
+    audio: np.ndarray,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    max_chunk_seconds: float = MAX_CHUNK_SECONDS,
+    frame_seconds: float = 0.03,
+    min_silence_seconds: float = 0.3,
+    range_db: float = 35.0
+):
+    """
+    Split audio into chunks of at most max_chunk_seconds, cutting inside pauses.
+
+    A cheap energy pass marks 30 ms frames within range_db of the loud level (95th
+    percentile of frame energies) as speech. Pauses of at least min_silence_seconds
+    are cut points, and consecutive speech between them is packed into chunks. Speech that
+    runs longer than a chunk without a pause is cut at its quietest frame.
+
+    Args:
+        audio: Mono float32 samples
+        sample_rate: Sample rate of the audio
+        max_chunk_seconds: Maximum chunk length
+        frame_seconds: Length of the energy frames
+        min_silence_seconds: Minimum pause length used as a cut point
+        range_db: Energy below the loud level still counted as speech
+
+    Returns:
+        list: (start_sample, end_sample) of every chunk containing speech, in order
+    """
+    frame_length = max(int(frame_seconds * sample_rate), 1)
+    num_frames = len(audio) // frame_length
+    if num_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    # Broadcast audio is mostly speech, so the threshold hangs off the loud level, not the noise floor
+    speech = energy_db > max(np.percentile(energy_db, 95) - range_db, -80.0)
+    if not speech.any():
+        return []
+
+    # Speech regions in frames, pauses shorter than min_silence_seconds are bridged
+    changes = np.flatnonzero(np.diff(np.concatenate([[0], speech.astype(np.int8), [0]])))
+    regions = list(zip(changes[::2], changes[1::2]))
+    min_silence_frames = max(int(min_silence_seconds / frame_seconds), 1)
+    merged = [list(regions[0])]
+    for start, end in regions[1:]:
+        if start - merged[-1][1] < min_silence_frames:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    # Pack regions into chunks, cutting in the middle of the pauses between them
+    max_frames = int(max_chunk_seconds / frame_seconds)
+    chunks = []
+    chunk_start, chunk_end = merged[0]
+    for start, end in merged[1:]:
+        if end - chunk_start <= max_frames:
+            chunk_end = end
+            continue
+        chunks.append((chunk_start, chunk_end))
+        chunk_start, chunk_end = start, end
+    chunks.append((chunk_start, chunk_end))
+
+    # Cut chunks that are still too long at their quietest frame
+    bounded = []
+    for start, end in chunks:
+        while end - start > max_frames:
+            search_start = start + max_frames // 2
+            cut = search_start + int(np.argmin(energy_db[search_start:start + max_frames]))
+            bounded.append((start, cut))
+            start = cut
+        bounded.append((start, end))
+
+    # Pad every chunk by half a pause on both sides without overlapping its neighbours
+    pad = min_silence_frames // 2
+    samples = []
+    for index, (start, end) in enumerate(bounded):
+        previous_end = bounded[index - 1][1] if index > 0 else 0
+        next_start = bounded[index + 1][0] if index + 1 < len(bounded) else num_frames
+        start = max(start - pad, (previous_end + start) // 2)
+        end = min(end + pad, (end + next_start + 1) // 2, start + max_frames)
+        samples.append((int(start) * frame_length, min(int(end) * frame_length, len(audio))))
+    return samples
+
+
+def _split_segments(tokens, tokenizer, duration: float):
+    """Split the tokens decoded from one chunk into segments at its timestamp tokens."""
+    from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+    time_precision = 2 * HOP_LENGTH / SAMPLE_RATE
+
+    segments = []
+    start = None
+    text_tokens = []
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+
+        timestamp = (token - tokenizer.timestamp_begin) * time_precision
+        if text_tokens:
+            segments.append({"start": start or 0.0, "end": timestamp, "tokens": text_tokens})
+            text_tokens = []
+            start = None
+        else:
+            start = timestamp
+
+    if text_tokens:
+        segments.append({"start": start or 0.0, "end": duration, "tokens": text_tokens})
+    return segments
+
+
+def _offset_segments(segments, offset: float):
+    """Move chunk-relative segment and word times onto the timeline of the whole audio."""
+    for segment in segments:
+        segment["start"] = round(segment["start"] + offset, 2)
+        segment["end"] = round(segment["end"] + offset, 2)
+        for word in segment.get("words", []):
+            word["start"] = round(word["start"] + offset, 2)
+            word["end"] = round(word["end"] + offset, 2)
+    return segments
+
+
+def transcribe_batched(
+    model,
+    audio: np.ndarray,
+    language: str = "de",
+    batch_size: int = 8,
+    word_timestamps: bool = True,
+    **vad_options
+) -> dict:
+    """
+    Transcribe long audio by decoding several pause-aligned chunks per forward pass.
+
+    The audio is split with split_on_silence, the chunks are decoded greedily in batches
+    and word timestamps are aligned per chunk. Chunks that look like failed decodes
+    (repetitive or low confidence) fall back to model.transcribe with its temperature
+    schedule. The result has the same segment schema as model.transcribe, with times on
+    the timeline of the whole audio.
+
+    Args:
+        model: Loaded Whisper model
+        audio: Mono float32 samples at 16 kHz
+        language: Spoken language
+        batch_size: Chunks decoded per forward pass
+        word_timestamps: Add word-level timestamps to every segment
+        **vad_options: Passed on to split_on_silence
+
+    Returns:
+        dict: {"text", "segments", "language"} like model.transcribe
+    """
+    import torch
+    import whisper
+    from whisper.audio import HOP_LENGTH, N_FRAMES
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+
+    tokenizer = get_tokenizer(
+        model.is_multilingual,
+        num_languages=model.num_languages,
+        language=language,
+        task="transcribe"
+    )
+    options = whisper.DecodingOptions(
+        language=language,
+        task="transcribe",
+        temperature=0.0,
+        fp16=model.device.type != "cpu"
+    )
+
+    chunks = split_on_silence(audio, WHISPER_SAMPLE_RATE, **vad_options)
+    print(f"Transcribing {len(chunks)} chunks of {len(audio) / WHISPER_SAMPLE_RATE:.0f}s audio in batches of {batch_size}")
+
+    segments = []
+    for batch_start in range(0, len(chunks), batch_size):
+        batch = chunks[batch_start:batch_start + batch_size]
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio[start:end]), model.dims.n_mels)
+            for start, end in batch
+        ]).to(model.device)
+
+        results = whisper.decode(model, mels, options)
+
+        for (start, end), mel, result in zip(batch, mels, results):
+            offset = start / WHISPER_SAMPLE_RATE
+            duration = (end - start) / WHISPER_SAMPLE_RATE
+
+            if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                continue
+
+            if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+                # Let Whisper retry this chunk with higher temperatures
+                fallback = model.transcribe(
+                    audio[start:end],
+                    language=language,
+                    word_timestamps=word_timestamps,
+                    fp16=options.fp16
+                )
+                segments.extend(_offset_segments(fallback["segments"], offset))
+                continue
+
+            chunk_segments = []
+            for segment in _split_segments(result.tokens, tokenizer, duration):
+                chunk_segments.append({
+                    "seek": start // HOP_LENGTH,
+                    "start": segment["start"],
+                    "end": min(segment["end"], duration),
+                    "text": tokenizer.decode(segment["tokens"]),
+                    "tokens": segment["tokens"],
+                    "temperature": result.temperature,
+                    "avg_logprob": result.avg_logprob,
+                    "compression_ratio": result.compression_ratio,
+                    "no_speech_prob": result.no_speech_prob,
+                })
+
+            if word_timestamps and chunk_segments:
+                # Timestamps are chunk-relative here, add_word_timestamps offsets by segments[0]["seek"]
+                for segment in chunk_segments:
+                    segment["seek"] = 0
+                add_word_timestamps(
+                    segments=chunk_segments,
+                    model=model,
+                    tokenizer=tokenizer,
+                    mel=mel[:, :N_FRAMES],
+                    num_frames=min((end - start) // HOP_LENGTH, N_FRAMES),
+                    last_speech_timestamp=0.0
+                )
+                for segment in chunk_segments:
+                    segment["seek"] = start // HOP_LENGTH
+
+            segments.extend(_offset_segments(chunk_segments, offset))
+
+    for index, segment in enumerate(segments):
+        segment["id"] = index
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": language
+    }
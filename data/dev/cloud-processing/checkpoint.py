@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import pyarrow.parquet as pq
+
+STATE_FILE = "state.json"
+
+
+class ExtractionCheckpoint:
+    """
+    Completed landmark row groups of an extraction plus the last frame they cover.
+
+    Every commit writes the new row groups as small parquet part files followed by the
+    state file, locally and, with a remote_uri, to Cloud Storage. The state is uploaded
+    last, so it only ever references parts that were fully written.
+    """
+
+    def __init__(self, local_dir: str, remote_uri: str = None):
+        """
+        Args:
+            local_dir: Directory holding the part files and the state
+            remote_uri: Optional gs://bucket/prefix the checkpoint is mirrored to, so a
+                restarted worker on a fresh machine can resume
+        """
+        self.local_dir = local_dir
+        self.remote_uri = remote_uri.rstrip("/") if remote_uri else None
+        self.last_frame = None
+        self.parts = {}
+        os.makedirs(local_dir, exist_ok=True)
+
+        self._bucket = None
+        self._prefix = ""
+        if self.remote_uri:
+            if not self.remote_uri.startswith("gs://"):
+                raise ValueError(f"Checkpoint URI must start with gs://, got: {remote_uri}")
+            from google.cloud import storage
+            bucket_name, _, self._prefix = self.remote_uri[len("gs://"):].partition("/")
+            self._bucket = storage.Client().bucket(bucket_name)
+
+    def _blob(self, name: str):
+        return self._bucket.blob(f"{self._prefix}/{name}" if self._prefix else name)
+
+    def _local_path(self, name: str) -> str:
+        return os.path.join(self.local_dir, name)
+
+    def restore(self):
+        """
+        Load the latest state, downloading it and its part files from Cloud Storage if needed.
+
+        Returns:
+            int: Last frame covered by the checkpoint, or None if there is nothing to resume
+        """
+        state_path = self._local_path(STATE_FILE)
+        if self._bucket is not None:
+            blob = self._blob(STATE_FILE)
+            if blob.exists():
+                blob.download_to_filename(state_path)
+
+        if not os.path.exists(state_path):
+            return None
+
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+
+        for names in state["parts"].values():
+            for name in names:
+                if os.path.exists(self._local_path(name)):
+                    continue
+                if self._bucket is None:
+                    # A local-only state whose parts are gone cannot be resumed, start over
+                    print(f"Checkpoint part {name} is missing, discarding the checkpoint in {self.local_dir}")
+                    self.clear()
+                    os.makedirs(self.local_dir, exist_ok=True)
+                    return None
+                self._blob(name).download_to_filename(self._local_path(name))
+
+        self.last_frame = state["last_frame"]
+        self.parts = state["parts"]
+        return self.last_frame
+
+    def part_paths(self, output: str) -> list:
+        """Local paths of the committed parts of one output, in frame order."""
+        return [self._local_path(name) for name in self.parts.get(output, [])]
+
+    def commit(self, tables: dict, last_frame: int):
+        """
+        Record newly completed row groups.
+
+        Args:
+            tables: Arrow table of the new row groups keyed by output name
+            last_frame: Last frame number contained in the tables
+        """
+        for output, table in tables.items():
+            names = self.parts.setdefault(output, [])
+            name = f"{output}-{len(names):05d}.parquet"
+            pq.write_table(table, self._local_path(name))
+            if self._bucket is not None:
+                self._blob(name).upload_from_filename(self._local_path(name))
+            names.append(name)
+
+        self.last_frame = int(last_frame)
+        state_path = self._local_path(STATE_FILE)
+        with open(state_path, "w", encoding="utf-8") as f:
+            json.dump({"last_frame": self.last_frame, "parts": self.parts}, f)
+        if self._bucket is not None:
+            self._blob(STATE_FILE).upload_from_filename(state_path)
+
+    def clear(self):
+        """Delete the checkpoint once its output is complete."""
+        if self._bucket is not None:
+            for blob in self._bucket.client.list_blobs(self._bucket, prefix=f"{self._prefix}/" if self._prefix else None):
+                blob.delete()
+        shutil.rmtree(self.local_dir, ignore_errors=True)
+        self.last_frame = None
+        self.parts = {}
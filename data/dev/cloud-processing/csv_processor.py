@@ -45,6 +45,9 @@ def upload_csv_and_prepare_batch_data(csv_file_path: str, project_id: str, envir
         # Create a file for each row
         row_filename = f"csv-rows/row_{idx:06d}.json"
         row_blob = bucket.blob(row_filename)
+        # Listed with the blob, so CloudProcessor can read durations without downloading rows
+        if row_data.get('duration_minutes') is not None:
+            row_blob.metadata = {'duration_minutes': str(row_data['duration_minutes'])}
         row_blob.upload_from_string(row_json, content_type='application/json')
         
         if idx % 100 == 0:
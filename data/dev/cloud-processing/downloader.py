@@ -0,0 +1,186 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Large chunks keep the per-chunk Python overhead negligible at full line rate
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Shared by every download of this process, so connections to the same host are reused
+_SESSION = None
+
+# Background downloads of upcoming videos, keyed by URL
+_PREFETCH_POOL = None
+_PREFETCH_DIR = None
+_PREFETCHES = {}
+
+
+def get_session() -> requests.Session:
+    """Get the process-wide HTTP session with connection pooling and retries on transient errors."""
+    global _SESSION
+    if _SESSION is None:
+        retry = Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET"]
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+        _SESSION = requests.Session()
+        _SESSION.mount("http://", adapter)
+        _SESSION.mount("https://", adapter)
+    return _SESSION
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download(
+    url: str,
+    path: str,
+    chunk_size: int = CHUNK_SIZE,
+    attempts: int = 5,
+    expected_size: int = None,
+    sha256: str = None,
+    timeout: tuple = (10, 300)
+) -> str:
+    """
+    Download a URL to a file, resuming with HTTP Range requests after interruptions.
+
+    Data is written to path + ".part" and only moved into place once the size (the
+    expected_size, or the size the server announced) and the optional checksum match.
+    A partial file left by an earlier failed call is resumed as well.
+
+    Args:
+        url: URL to download
+        path: Destination file
+        chunk_size: Bytes read and written per chunk
+        attempts: Connection attempts before giving up, each resumes where the last stopped
+        expected_size: Size in bytes the file must have
+        sha256: Hex SHA-256 digest the file must have
+        timeout: (connect, read) timeout in seconds
+
+    Returns:
+        str: path
+
+    Raises:
+        requests.HTTPError: If the server answers with an error status
+        IOError: If the download stays incomplete or fails verification
+    """
+    session = get_session()
+    part_path = f"{path}.part"
+    total_size = expected_size
+    # Only a finished attempt may move the part file into place, without a known size a
+    # connection dropped on the last attempt would otherwise pass as complete
+    completed = False
+
+    for attempt in range(1, attempts + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416:
+                    # Nothing left to fetch, the partial file is already complete
+                    completed = True
+                    break
+                response.raise_for_status()
+
+                if response.status_code == 206:
+                    # Content-Range: bytes start-end/total
+                    announced = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    mode = "ab"
+                else:
+                    # The server ignored the range, start over
+                    announced = response.headers.get("Content-Length")
+                    offset = 0
+                    mode = "wb"
+                if announced and announced.isdigit():
+                    total_size = total_size or int(announced)
+
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            f.write(chunk)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            print(f"Download interrupted (attempt {attempt}/{attempts}): {e}")
+            time.sleep(min(2 ** attempt, 30))
+            continue
+
+        if total_size is None or os.path.getsize(part_path) >= total_size:
+            completed = True
+            break
+        print(f"Download incomplete (attempt {attempt}/{attempts}), resuming at {os.path.getsize(part_path)} bytes")
+
+    if not completed:
+        raise IOError(f"Download of {url} failed after {attempts} attempts")
+    size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if total_size is not None and size != total_size:
+        raise IOError(f"Download of {url} incomplete: {size} of {total_size} bytes")
+    if sha256 and _file_sha256(part_path) != sha256.lower():
+        os.remove(part_path)
+        raise IOError(f"Checksum mismatch for {url}")
+
+    os.replace(part_path, path)
+    return path
+
+
+def prefetch(url: str, **kwargs):
+    """
+    Start downloading a URL in the background, e.g. the next video while this one is processed.
+
+    The file is kept in a per-process directory until fetch() asks for the same URL.
+
+    Args:
+        url: URL to download
+        **kwargs: Passed on to download
+
+    Returns:
+        concurrent.futures.Future: Resolves to the prefetched file path
+    """
+    global _PREFETCH_POOL, _PREFETCH_DIR
+    if url in _PREFETCHES:
+        return _PREFETCHES[url]
+
+    if _PREFETCH_POOL is None:
+        # One download at a time, a prefetch should not compete with the current video
+        _PREFETCH_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        _PREFETCH_DIR = tempfile.mkdtemp(prefix="prefetch-")
+
+    path = os.path.join(_PREFETCH_DIR, f"{len(_PREFETCHES):06d}_{os.path.basename(url.split('?')[0])}")
+    _PREFETCHES[url] = _PREFETCH_POOL.submit(download, url, path, **kwargs)
+    return _PREFETCHES[url]
+
+
+def fetch(url: str, path: str, **kwargs) -> str:
+    """
+    Download a URL to a file, taking over a prefetched copy when there is one.
+
+    Args:
+        url: URL to download
+        path: Destination file
+        **kwargs: Passed on to download
+
+    Returns:
+        str: path
+    """
+    future = _PREFETCHES.pop(url, None)
+    if future is not None:
+        try:
+            start = time.perf_counter()
+            shutil.move(future.result(), path)
+            print(f"Using prefetched download (waited {time.perf_counter() - start:.1f}s)")
+            return path
+        except (requests.RequestException, IOError) as e:
+            print(f"Prefetch failed, downloading again: {e}")
+
+    return download(url, path, **kwargs)
@@ -86,6 +86,12 @@ all_facial_landmarks = (
 all_facial_landmarks = list(dict.fromkeys(all_facial_landmarks))
 pose_landmarks = [11, 12, 13, 14, 15, 16, 23, 24]
 
+# Selection for landmark_extraction, so extraction can write the filtered set directly
+FILTERED_SELECTION = {
+    "face": all_facial_landmarks,
+    "pose": pose_landmarks
+}
+
 def create_landmark_column_filters(facial_landmarks, pose_landmarks):
     """Create column selectors for facial and pose landmarks from the given indices."""
     columns_to_select = []
@@ -0,0 +1,363 @@
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+import cv2
+import numpy as np
+
+# Relative (left, top, right, bottom) box of the sign language interpreter in Tagesschau broadcasts
+RIGHT_HALF = (0.5, 0.0, 1.0, 1.0)
+
+
+def crop_region(frame, region=RIGHT_HALF):
+    """Crop a frame to a relative (left, top, right, bottom) region."""
+    height, width = frame.shape[:2]
+    left, top, right, bottom = region
+    return frame[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+
+
+class FrameSource:
+    """Base class for cropped RGB frame sources that can decode ahead on a background thread."""
+
+    _END = object()
+
+    def __init__(self, decode_ahead: int = 32, start_frame: int = 0, end_frame: int = None):
+        """
+        Args:
+            decode_ahead: Number of decoded frames buffered by the decoder thread, 0 decodes inline
+            start_frame: Frame number of the first decoded frame
+            end_frame: Frame to stop before, None reads to the end of the video
+        """
+        self.decode_ahead = decode_ahead
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self._position = start_frame
+
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        # Timing statistics for the frames-per-second report
+        self.frames_read = 0
+        self.decode_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._started_at = None
+        self._finished_at = None
+
+    def _read_frame(self):
+        """Return the next cropped RGB frame, or None at the end of the video."""
+        raise NotImplementedError
+
+    def _release(self):
+        """Release the underlying decoder."""
+
+    def _decode_next(self):
+        if self.end_frame is not None and self._position >= self.end_frame:
+            return None
+        start = time.perf_counter()
+        image = self._read_frame()
+        if image is None:
+            return None
+        self._position += 1
+        self.decode_seconds += time.perf_counter() - start
+        return image
+
+    def _decode_loop(self):
+        try:
+            while not self._stop.is_set():
+                image = self._decode_next()
+                if image is None:
+                    break
+                self._put(image)
+        except Exception as e:
+            self._put(e)
+        finally:
+            self._put(self._END)
+
+    def _put(self, item):
+        # Poll so a consumer that stopped early does not leave the decoder blocked on a full queue
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        """Yield (frame_number, rgb_image) tuples in decode order."""
+        self._started_at = time.perf_counter()
+        try:
+            if self.decode_ahead <= 0:
+                while True:
+                    image = self._decode_next()
+                    if image is None:
+                        break
+                    yield self.start_frame + self.frames_read, image
+                    self.frames_read += 1
+                return
+
+            self._queue = queue.Queue(maxsize=self.decode_ahead)
+            self._thread = threading.Thread(target=self._decode_loop, daemon=True)
+            self._thread.start()
+
+            while True:
+                wait_start = time.perf_counter()
+                item = self._queue.get()
+                self.wait_seconds += time.perf_counter() - wait_start
+                if item is self._END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield self.start_frame + self.frames_read, item
+                self.frames_read += 1
+        finally:
+            self._finished_at = time.perf_counter()
+
+    def report(self) -> dict:
+        """Print and return decode and end-to-end throughput in frames per second."""
+        elapsed = (self._finished_at or time.perf_counter()) - (self._started_at or time.perf_counter())
+        stats = {
+            "frames": self.frames_read,
+            "elapsed_seconds": elapsed,
+            "fps": self.frames_read / elapsed if elapsed > 0 else 0.0,
+            "decode_fps": self.frames_read / self.decode_seconds if self.decode_seconds > 0 else 0.0,
+            "consumer_wait_seconds": self.wait_seconds,
+        }
+        print(
+            f"Read {stats['frames']} frames in {elapsed:.1f}s ({stats['fps']:.1f} fps end-to-end, "
+            f"{stats['decode_fps']:.1f} fps decode, consumer waited {self.wait_seconds:.1f}s)"
+        )
+        return stats
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class VideoFrameSource(FrameSource):
+    """Reads frames with OpenCV, then crops and converts them to RGB."""
+
+    def __init__(
+        self,
+        video_path: str,
+        region=RIGHT_HALF,
+        decode_ahead: int = 32,
+        start_frame: int = 0,
+        end_frame: int = None
+    ):
+        """
+        Args:
+            video_path: Path to the video file
+            region: Relative (left, top, right, bottom) box to crop each frame to
+            decode_ahead: Number of decoded frames buffered by the decoder thread, 0 decodes inline
+            start_frame: First frame to read, the decoder seeks to the preceding keyframe
+            end_frame: Frame to stop before, None reads to the end of the video
+        """
+        self.video_path = video_path
+        self.region = region
+
+        self._cap = cv2.VideoCapture(video_path)
+        if not self._cap.isOpened():
+            raise IOError(f"Could not open video: {video_path}")
+        self.total_frames = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS)
+
+        # Seeking is not frame accurate for every container, so continue from where the decoder landed
+        if start_frame > 0:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        super().__init__(
+            decode_ahead=decode_ahead,
+            start_frame=int(self._cap.get(cv2.CAP_PROP_POS_FRAMES)),
+            end_frame=end_frame
+        )
+
+    def _read_frame(self):
+        ret, frame = self._cap.read()
+        if not ret:
+            return None
+        return cv2.cvtColor(crop_region(frame, self.region), cv2.COLOR_BGR2RGB)
+
+    def _release(self):
+        self._cap.release()
+
+
+class FFmpegFrameSource(FrameSource):
+    """
+    Lets ffmpeg crop, optionally downscale and convert frames to rgb24, read through a pipe.
+
+    Frames are read straight into a small pool of reusable NumPy buffers, so a yielded
+    image is only valid until the consumer has advanced decode_ahead + 1 frames.
+    Holistic copies its input, so processing each frame before fetching the next is safe.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        region=RIGHT_HALF,
+        decode_ahead: int = 32,
+        start_frame: int = 0,
+        end_frame: int = None,
+        scale_width: int = None
+    ):
+        """
+        Args:
+            video_path: Path to the video file
+            region: Relative (left, top, right, bottom) box to crop each frame to
+            decode_ahead: Number of decoded frames buffered by the reader thread, 0 reads inline
+            start_frame: First frame to read, ffmpeg seeks by timestamp
+            end_frame: Frame to stop before, None reads to the end of the video
+            scale_width: Downscale the crop to this width keeping the aspect ratio, None keeps it
+        """
+        self.video_path = video_path
+        self.region = region
+
+        # Probe the stream with OpenCV, which is already a dependency of every extractor
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video: {video_path}")
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+
+        # Same pixel box as crop_region
+        left, top, right, bottom = region
+        x0, x1 = int(left * width), int(right * width)
+        y0, y1 = int(top * height), int(bottom * height)
+        crop_width, crop_height = x1 - x0, y1 - y0
+        filters = [f"crop={crop_width}:{crop_height}:{x0}:{y0}"]
+        if scale_width and scale_width < crop_width:
+            # Keep the height even, which some scalers require
+            scaled_height = max(2, int(round(crop_height * scale_width / crop_width / 2)) * 2)
+            filters.append(f"scale={scale_width}:{scaled_height}")
+            crop_width, crop_height = scale_width, scaled_height
+        self.frame_shape = (crop_height, crop_width, 3)
+
+        command = ["ffmpeg", "-loglevel", "error", "-nostdin"]
+        if start_frame > 0 and self.fps:
+            command += ["-ss", f"{start_frame / self.fps:.6f}"]
+        command += ["-i", video_path, "-an", "-vf", ",".join(filters)]
+        if end_frame is not None:
+            command += ["-frames:v", str(max(end_frame - start_frame, 0))]
+        command += ["-f", "rawvideo", "-pix_fmt", "rgb24", "-"]
+
+        frame_bytes = crop_height * crop_width * 3
+        # Errors go to a file: a corrupt stream can log one per frame, and a pipe nobody reads
+        # while frames are consumed would fill up and block ffmpeg
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            bufsize=frame_bytes
+        )
+
+        # The consumer holds one buffer and the queue at most decode_ahead, the reader fills one more
+        self._buffers = [np.empty(self.frame_shape, dtype=np.uint8) for _ in range(max(decode_ahead, 0) + 2)]
+        self._next_buffer = 0
+
+        super().__init__(decode_ahead=decode_ahead, start_frame=start_frame, end_frame=end_frame)
+
+    def _read_frame(self):
+        buffer = self._buffers[self._next_buffer]
+        view = memoryview(buffer).cast("B")
+        filled = 0
+        while filled < len(view):
+            count = self._process.stdout.readinto(view[filled:])
+            if not count:
+                break
+            filled += count
+
+        if filled < len(view):
+            self._process.wait()
+            if self._process.returncode not in (0, None) and self._position == self.start_frame:
+                self._stderr.seek(0)
+                error = self._stderr.read().decode(errors="replace")
+                raise RuntimeError(f"ffmpeg failed to decode {self.video_path}: {error}")
+            return None
+
+        self._next_buffer = (self._next_buffer + 1) % len(self._buffers)
+        return buffer
+
+    def _release(self):
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        self._process.stdout.close()
+        self._stderr.close()
+
+
+FRAME_SOURCES = {
+    "opencv": VideoFrameSource,
+    "ffmpeg": FFmpegFrameSource
+}
+
+
+def open_frame_source(video_path: str, decoder: str = "opencv", scale_width: int = None, **kwargs) -> FrameSource:
+    """
+    Open a frame source by decoder name.
+
+    Args:
+        video_path: Path to the video file
+        decoder: "opencv" for cv2.VideoCapture or "ffmpeg" for the ffmpeg crop-and-scale pipe
+        scale_width: Downscale width for the ffmpeg decoder, ignored by OpenCV
+        **kwargs: Passed on to the frame source
+
+    Returns:
+        FrameSource: The opened frame source
+    """
+    if decoder not in FRAME_SOURCES:
+        raise ValueError(f"Unknown decoder: {decoder}. Choose from {list(FRAME_SOURCES)}")
+    if decoder == "ffmpeg":
+        kwargs["scale_width"] = scale_width
+    return FRAME_SOURCES[decoder](video_path, **kwargs)
+
+
+def benchmark_frame_sources(video_path: str, max_frames: int = 2000, scale_width: int = None) -> dict:
+    """
+    Compare decode throughput of the OpenCV and ffmpeg frame sources without running Holistic.
+
+    Args:
+        video_path: Path to the video file
+        max_frames: Number of frames read per source
+        scale_width: Downscale width for the ffmpeg decoder
+
+    Returns:
+        dict: Report of each configuration keyed by name
+    """
+    configurations = {
+        "opencv inline": dict(decoder="opencv", decode_ahead=0),
+        "opencv decode-ahead": dict(decoder="opencv"),
+        "ffmpeg inline": dict(decoder="ffmpeg", decode_ahead=0, scale_width=scale_width),
+        "ffmpeg decode-ahead": dict(decoder="ffmpeg", scale_width=scale_width),
+    }
+
+    reports = {}
+    for name, options in configurations.items():
+        print(f"{name}:")
+        with open_frame_source(video_path, end_frame=max_frames, **options) as frames:
+            for _ in frames:
+                pass
+            reports[name] = frames.report()
+    return reports
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark OpenCV and ffmpeg frame sources")
+    parser.add_argument("video_path")
+    parser.add_argument("--max-frames", type=int, default=2000)
+    parser.add_argument("--scale-width", type=int, default=None)
+    args = parser.parse_args()
+    benchmark_frame_sources(args.video_path, args.max_frames, args.scale_width)
@@ -0,0 +1,144 @@
+import cv2
+import numpy as np
+from frame_source import RIGHT_HALF, crop_region
+
+LEFT_HALF = (0.0, 0.0, 0.5, 1.0)
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+
+# Where to look for the interpreter, the Tagesschau layout (right half) is tried first
+CANDIDATE_REGIONS = [RIGHT_HALF, LEFT_HALF, FULL_FRAME]
+
+# Pose landmarks of the upper body: nose, eyes, ears, mouth, shoulders, elbows, wrists, hands
+UPPER_BODY_LANDMARKS = list(range(0, 23))
+WRIST_LANDMARKS = [15, 16]
+
+# Smallest box, as a fraction of the candidate region on each axis, e.g. when only one
+# landmark was visible or all visible landmarks lie on a line
+MIN_BOX_FRACTION = 0.25
+
+
+def sample_frames(video_path: str, num_samples: int = 12):
+    """Read evenly spaced BGR frames from a video, skipping the first and last few percent."""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    try:
+        if total_frames <= 0:
+            # Without a frame count, fall back to the first frames of the video
+            while len(frames) < num_samples:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            return frames
+
+        positions = np.linspace(total_frames * 0.05, total_frames * 0.95, num_samples).astype(int)
+        for position in positions:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+
+def _to_frame_coordinates(points, region):
+    """Map points normalized to a cropped region back to normalized full-frame coordinates."""
+    left, top, right, bottom = region
+    return np.column_stack([
+        left + points[:, 0] * (right - left),
+        top + points[:, 1] * (bottom - top)
+    ])
+
+
+def estimate_interpreter_region(
+    video_path: str,
+    num_samples: int = 12,
+    margin: float = 0.2,
+    min_visibility: float = 0.5,
+    candidate_regions=None
+):
+    """
+    Estimate the bounding box of the sign language interpreter with a cheap pose pass.
+
+    Each candidate region of the sampled frames is run through MediaPipe Pose at the lowest
+    model complexity. Candidates are scored by how often a person is found times how much
+    their wrists move, since the interpreter signs while anchors and guests mostly do not.
+    The box is the extent of the upper body over all samples, widened by `margin` so the
+    hands stay inside.
+
+    Args:
+        video_path: Path to the video file
+        num_samples: Number of frames sampled across the video
+        margin: Fraction of the box size added on every side
+        min_visibility: Minimum pose visibility for a landmark to count
+        candidate_regions: Relative (left, top, right, bottom) regions to search
+
+    Returns:
+        tuple: Relative (left, top, right, bottom) box in full-frame coordinates,
+            or None if no person was found
+    """
+    import mediapipe as mp
+
+    candidate_regions = candidate_regions or CANDIDATE_REGIONS
+    frames = sample_frames(video_path, num_samples)
+    if not frames:
+        return None
+
+    best = None
+    with mp.solutions.pose.Pose(static_image_mode=True, model_complexity=0) as pose:
+        for region in candidate_regions:
+            body_points = []
+            wrist_points = []
+            detections = 0
+            for frame in frames:
+                image = cv2.cvtColor(crop_region(frame, region), cv2.COLOR_BGR2RGB)
+                results = pose.process(image)
+                if not results.pose_landmarks:
+                    continue
+
+                landmarks = np.array(
+                    [(lm.x, lm.y, lm.visibility) for lm in results.pose_landmarks.landmark],
+                    dtype=np.float32
+                )
+                visible = landmarks[UPPER_BODY_LANDMARKS]
+                visible = visible[visible[:, 2] >= min_visibility]
+                if len(visible) == 0:
+                    continue
+
+                detections += 1
+                body_points.append(_to_frame_coordinates(visible[:, :2], region))
+                wrist_points.append(_to_frame_coordinates(landmarks[WRIST_LANDMARKS, :2], region))
+
+            if detections == 0:
+                continue
+
+            motion = float(np.concatenate(wrist_points).std(axis=0).sum())
+            score = detections / len(frames) * motion
+            if best is None or score > best[0]:
+                best = (score, region, np.concatenate(body_points))
+
+    if best is None:
+        return None
+
+    _, region, points = best
+    left, top = points.min(axis=0)
+    right, bottom = points.max(axis=0)
+
+    # Grow degenerate boxes around their center, a zero-area crop has no pixels to decode
+    region_left, region_top, region_right, region_bottom = region
+    center_x, center_y = (left + right) / 2, (top + bottom) / 2
+    width = max(right - left, MIN_BOX_FRACTION * (region_right - region_left))
+    height = max(bottom - top, MIN_BOX_FRACTION * (region_bottom - region_top))
+    left, right = center_x - width / 2, center_x + width / 2
+    top, bottom = center_y - height / 2, center_y + height / 2
+
+    # Widen the box for the hands and clip it to the candidate region it was found in
+    box = (
+        max(region_left, left - margin * width),
+        max(region_top, top - margin * height),
+        min(region_right, right + margin * width),
+        min(region_bottom, bottom + margin * height)
+    )
+    return tuple(round(float(value), 4) for value in box)
@@ -0,0 +1,354 @@
+import glob
+import math
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+import pyarrow.parquet as pq
+import torch
+from torch.utils.data import DataLoader, Dataset, IterableDataset, get_worker_info
+from training_dataset import NON_FEATURE_COLUMNS
+
+
+def list_landmark_files(path: str) -> list:
+    """Landmark parquet files of a directory (searched recursively) or a single file."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True))
+    return [path]
+
+
+class RowGroupCache:
+    """
+    Least recently used decoded row groups.
+
+    Row groups are decoded into (rows, features) float32 arrays once and reused by every
+    sequence that overlaps them, so random sampling decodes each row group only once while
+    it is cached instead of reading whole files.
+    """
+
+    def __init__(self, max_row_groups: int = 16):
+        """
+        Args:
+            max_row_groups: Number of decoded row groups kept, with the default 1000-frame row
+                groups of all 2212 landmark columns each takes about 9 MB
+        """
+        self.max_row_groups = max_row_groups
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, load):
+        """Return the cached row group for key, calling load() on a miss."""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = load()
+        self._entries[key] = value
+        if len(self._entries) > self.max_row_groups:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+class LandmarkRowGroups:
+    """
+    Row group layout of landmark parquet files, read from the footers only.
+
+    Shared by the map-style and the iterable dataset. Rows are addressed by file and row
+    number, reads decode only the projected columns of the row groups they touch.
+    """
+
+    def __init__(self, path: str, columns: list = None, cache_row_groups: int = 16):
+        """
+        Args:
+            path: Directory of landmark parquet files (process_csv_row or filter_landmarks output) or one file
+            columns: Landmark columns to read, defaults to every column except frame/skipped
+            cache_row_groups: Size of the row group LRU cache of every process
+        """
+        self.files = list_landmark_files(path)
+        if not self.files:
+            raise FileNotFoundError(f"No parquet files found in {path}")
+
+        schema = pq.read_schema(self.files[0])
+        self.columns = list(columns or [name for name in schema.names if name not in NON_FEATURE_COLUMNS])
+        self.cache_row_groups = cache_row_groups
+
+        # Per file the first row of each row group plus the total, for np.searchsorted
+        self.row_group_starts = []
+        for file_path in self.files:
+            metadata = pq.ParquetFile(file_path).metadata
+            sizes = [metadata.row_group(index).num_rows for index in range(metadata.num_row_groups)]
+            self.row_group_starts.append(np.cumsum([0] + sizes))
+
+        self.num_rows = np.array([starts[-1] for starts in self.row_group_starts], dtype=np.int64)
+        self._cache = None
+        self._parquet_files = {}
+
+    def __getstate__(self):
+        # Open files and decoded row groups stay in the process that created them
+        state = self.__dict__.copy()
+        state["_cache"] = None
+        state["_parquet_files"] = {}
+        return state
+
+    @property
+    def cache(self) -> RowGroupCache:
+        if self._cache is None:
+            self._cache = RowGroupCache(self.cache_row_groups)
+        return self._cache
+
+    def row_groups(self) -> list:
+        """Every (file index, row group index) pair in file order."""
+        return [
+            (file_index, row_group)
+            for file_index, starts in enumerate(self.row_group_starts)
+            for row_group in range(len(starts) - 1)
+        ]
+
+    def read_row_group(self, file_index: int, row_group: int) -> np.ndarray:
+        """Decode one row group as a (rows, features) float32 array through the cache."""
+        def load():
+            if file_index not in self._parquet_files:
+                self._parquet_files[file_index] = pq.ParquetFile(self.files[file_index])
+            table = self._parquet_files[file_index].read_row_group(row_group, columns=self.columns)
+            features = np.empty((table.num_rows, len(self.columns)), dtype=np.float32)
+            for position, column in enumerate(table.columns):
+                features[:, position] = column.to_numpy()
+            return features
+
+        return self.cache.get((file_index, row_group), load)
+
+    def read(self, file_index: int, start: int, length: int) -> np.ndarray:
+        """
+        Read rows [start, start + length) of a file, decoding only the row groups they span.
+
+        Returns:
+            np.ndarray: (length, features) float32 array
+        """
+        starts = self.row_group_starts[file_index]
+        first = int(np.searchsorted(starts, start, side="right")) - 1
+        last = int(np.searchsorted(starts, start + length - 1, side="right")) - 1
+
+        if first == last:
+            offset = start - starts[first]
+            return self.read_row_group(file_index, first)[offset:offset + length]
+
+        parts = []
+        for row_group in range(first, last + 1):
+            data = self.read_row_group(file_index, row_group)
+            begin = max(start - starts[row_group], 0)
+            end = min(start + length - starts[row_group], len(data))
+            parts.append(data[begin:end])
+        return np.concatenate(parts)
+
+
+class ThroughputMeter:
+    """Counts samples and prints the read throughput every report_every samples."""
+
+    def __init__(self, report_every: int = 1000, name: str = "samples"):
+        self.report_every = report_every
+        self.name = name
+        self.count = 0
+        self._start = time.perf_counter()
+        self._last_report = 0
+
+    def update(self, count: int = 1):
+        self.count += count
+        if self.report_every and self.count - self._last_report >= self.report_every:
+            self._last_report = self.count
+            print(f"Read {self.count} {self.name} ({self.rate():.1f} {self.name}/s)")
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self._start
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+
+class LandmarkSequenceDataset(Dataset):
+    """
+    Fixed-length landmark sequences at random positions of the landmark parquet files.
+
+    Sequence i is a window of sequence_length rows starting at a multiple of stride, so a
+    random sampler draws uniformly over the corpus while every read touches at most the
+    row groups the window overlaps.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sequence_length: int = 250,
+        stride: int = None,
+        columns: list = None,
+        cache_row_groups: int = 16,
+        report_every: int = 0
+    ):
+        """
+        Args:
+            path: Directory of landmark parquet files or one file
+            sequence_length: Rows per sequence
+            stride: Rows between the starts of neighbouring sequences, defaults to sequence_length
+            columns: Landmark columns to read, defaults to all of them
+            cache_row_groups: Decoded row groups kept per process
+            report_every: Print samples/s every this many samples, 0 disables it
+        """
+        self.sequence_length = sequence_length
+        self.stride = stride or sequence_length
+        self.row_groups = LandmarkRowGroups(path, columns, cache_row_groups)
+        self.meter = ThroughputMeter(report_every)
+
+        # Sequences per file, files shorter than a sequence contribute none
+        counts = np.maximum((self.row_groups.num_rows - sequence_length) // self.stride + 1, 0)
+        self._sequence_starts = np.cumsum(np.concatenate([[0], counts]))
+
+    def __len__(self) -> int:
+        return int(self._sequence_starts[-1])
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        if not 0 <= index < len(self):
+            raise IndexError(f"Sequence {index} out of range for {len(self)} sequences")
+
+        file_index = int(np.searchsorted(self._sequence_starts, index, side="right")) - 1
+        start = (index - self._sequence_starts[file_index]) * self.stride
+        sequence = self.row_groups.read(file_index, int(start), self.sequence_length)
+        self.meter.update()
+        return torch.from_numpy(sequence)
+
+
+class LandmarkSequenceIterableDataset(IterableDataset):
+    """
+    Streams landmark sequences row group by row group.
+
+    Row groups are split across DataLoader workers (and optionally distributed ranks), so
+    each worker decodes a disjoint share of the corpus exactly once per epoch. A window that
+    runs past its row group reads the next one through the cache.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sequence_length: int = 250,
+        stride: int = None,
+        columns: list = None,
+        shuffle: bool = True,
+        seed: int = 0,
+        rank: int = 0,
+        world_size: int = 1,
+        cache_row_groups: int = 4,
+        report_every: int = 0
+    ):
+        """
+        Args:
+            path: Directory of landmark parquet files or one file
+            sequence_length: Rows per sequence
+            stride: Rows between the starts of neighbouring sequences, defaults to sequence_length
+            columns: Landmark columns to read, defaults to all of them
+            shuffle: Shuffle the row group order and the sequences within a row group every epoch
+            seed: Base seed of the shuffle, combined with the epoch
+            rank: Rank of this process in distributed training
+            world_size: Number of distributed processes
+            cache_row_groups: Decoded row groups kept per worker
+            report_every: Print samples/s every this many samples per worker, 0 disables it
+        """
+        self.sequence_length = sequence_length
+        self.stride = stride or sequence_length
+        self.shuffle = shuffle
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.report_every = report_every
+        self.epoch = 0
+        self.row_groups = LandmarkRowGroups(path, columns, cache_row_groups)
+
+    def set_epoch(self, epoch: int):
+        """Change the shuffle order, call before every epoch."""
+        self.epoch = epoch
+
+    def _assigned_row_groups(self) -> list:
+        row_groups = self.row_groups.row_groups()
+        if self.shuffle:
+            order = np.random.default_rng((self.seed, self.epoch)).permutation(len(row_groups))
+            row_groups = [row_groups[index] for index in order]
+
+        worker = get_worker_info()
+        worker_id, num_workers = (worker.id, worker.num_workers) if worker is not None else (0, 1)
+        shard = self.rank * num_workers + worker_id
+        return row_groups[shard::self.world_size * num_workers]
+
+    def __iter__(self):
+        rng = np.random.default_rng((self.seed, self.epoch, self.rank))
+        meter = ThroughputMeter(self.report_every)
+        for file_index, row_group in self._assigned_row_groups():
+            starts = self.row_groups.row_group_starts[file_index]
+            num_rows = self.row_groups.num_rows[file_index]
+
+            # Sequences starting inside this row group, on the global stride grid of the file
+            first = math.ceil(starts[row_group] / self.stride) * self.stride
+            sequence_starts = np.arange(first, min(starts[row_group + 1], num_rows - self.sequence_length + 1), self.stride)
+            if self.shuffle:
+                rng.shuffle(sequence_starts)
+
+            for start in sequence_starts:
+                sequence = self.row_groups.read(file_index, int(start), self.sequence_length)
+                meter.update()
+                yield torch.from_numpy(sequence)
+
+
+def benchmark_landmark_dataset(
+    path: str,
+    sequence_length: int = 250,
+    batch_size: int = 32,
+    num_workers: int = 0,
+    max_batches: int = 100,
+    columns: list = None
+) -> dict:
+    """
+    Measure read throughput of random sequence sampling and of streaming on a local directory.
+
+    Args:
+        path: Directory of landmark parquet files
+        sequence_length: Rows per sequence
+        batch_size: Sequences per batch
+        num_workers: DataLoader worker processes
+        max_batches: Batches read per configuration
+        columns: Landmark columns to read, defaults to all of them
+
+    Returns:
+        dict: samples/s of each configuration keyed by name
+    """
+    configurations = {
+        "random (map-style)": lambda: DataLoader(
+            LandmarkSequenceDataset(path, sequence_length, columns=columns),
+            batch_size=batch_size, shuffle=True, num_workers=num_workers
+        ),
+        "streaming (iterable)": lambda: DataLoader(
+            LandmarkSequenceIterableDataset(path, sequence_length, columns=columns),
+            batch_size=batch_size, num_workers=num_workers
+        ),
+    }
+
+    reports = {}
+    for name, make_loader in configurations.items():
+        meter = ThroughputMeter(report_every=0)
+        for batch_index, batch in enumerate(make_loader()):
+            meter.update(len(batch))
+            if batch_index + 1 >= max_batches:
+                break
+        reports[name] = meter.rate()
+        print(f"{name}: {meter.count} sequences of {sequence_length} frames, {reports[name]:.1f} samples/s")
+    return reports
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark landmark parquet datasets on a local directory")
+    parser.add_argument("path")
+    parser.add_argument("--sequence-length", type=int, default=250)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--max-batches", type=int, default=100)
+    args = parser.parse_args()
+    benchmark_landmark_dataset(args.path, args.sequence_length, args.batch_size, args.workers, args.max_batches)
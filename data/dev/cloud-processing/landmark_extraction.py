@@ -0,0 +1,780 @@
+import os
+import json
+import time
+import tempfile
+import multiprocessing
+import resource
+import cv2
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
+from natsort import natsorted
+from checkpoint import ExtractionCheckpoint
+from frame_source import RIGHT_HALF, VideoFrameSource, open_frame_source
+
+# Define expected number of landmarks
+# The face mesh has 468 points, refine_face_landmarks=True adds 10 iris points (468-477)
+EXPECTED_LANDMARKS = {
+    "pose": 33,
+    "face": 478,
+    "left_hand": 21,
+    "right_hand": 21
+}
+
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+
+# Row offset of each landmark type inside a (frames, NUM_LANDMARKS, 4) block
+LANDMARK_OFFSETS = {}
+NUM_LANDMARKS = 0
+for _landmark_type, _num_landmarks in EXPECTED_LANDMARKS.items():
+    LANDMARK_OFFSETS[_landmark_type] = NUM_LANDMARKS
+    NUM_LANDMARKS += _num_landmarks
+
+# Holistic result attribute for each landmark type
+RESULT_ATTRIBUTES = {
+    "pose": "pose_landmarks",
+    "face": "face_landmarks",
+    "left_hand": "left_hand_landmarks",
+    "right_hand": "right_hand_landmarks"
+}
+
+
+@lru_cache(maxsize=None)
+def _landmark_columns(column_order: str, selection_key):
+    columns = {}
+    for landmark_type, num_landmarks in EXPECTED_LANDMARKS.items():
+        for idx in range(num_landmarks):
+            for field_idx, field in enumerate(LANDMARK_FIELDS):
+                flat_idx = (LANDMARK_OFFSETS[landmark_type] + idx) * len(LANDMARK_FIELDS) + field_idx
+                columns[f"{landmark_type}-{idx}-{field}"] = flat_idx
+
+    if selection_key is not None:
+        selected = {
+            f"{landmark_type}-{idx}-{field}"
+            for landmark_type, indices in selection_key
+            for idx in indices
+            for field in LANDMARK_FIELDS
+        }
+        columns = {name: flat_idx for name, flat_idx in columns.items() if name in selected}
+
+    if column_order == "natural":
+        names = natsorted(columns)
+    elif column_order == "lexicographic":
+        names = sorted(columns)
+    else:
+        raise ValueError(f"Unknown column order: {column_order}")
+
+    return tuple(names), np.array([columns[name] for name in names], dtype=np.intp)
+
+
+def landmark_columns(column_order: str = "natural", selection: dict = None):
+    """
+    Get the landmark column names and their positions in a flattened block.
+
+    Args:
+        column_order: "natural" for natsorted columns, "lexicographic" for sorted columns
+        selection: Landmark indices to keep per landmark type, e.g. {"face": [0, 1], "pose": [11]}.
+            Types that are not listed are dropped, None keeps every landmark
+
+    Returns:
+        tuple: (column names, flat indices into a (frames, NUM_LANDMARKS * 4) view)
+    """
+    if selection is None:
+        return _landmark_columns(column_order, None)
+
+    for landmark_type, indices in selection.items():
+        if landmark_type not in EXPECTED_LANDMARKS:
+            raise ValueError(f"Unknown landmark type: {landmark_type}. Choose from {list(EXPECTED_LANDMARKS)}")
+        if any(not 0 <= idx < EXPECTED_LANDMARKS[landmark_type] for idx in indices):
+            raise ValueError(f"{landmark_type} landmark indices must be below {EXPECTED_LANDMARKS[landmark_type]}")
+
+    # Cache on a hashable, order-independent form of the selection
+    selection_key = tuple(sorted((landmark_type, tuple(sorted(set(indices)))) for landmark_type, indices in selection.items()))
+    return _landmark_columns(column_order, selection_key)
+
+
+# Frame sampling modes, frames that are not run through Holistic are interpolated
+SAMPLING_MODES = ("all", "stride", "motion")
+
+# Width of the grayscale thumbnail the motion score is computed on
+MOTION_THUMBNAIL_WIDTH = 64
+
+
+def motion_thumbnail(image):
+    """Downscale an RGB frame to a small float32 grayscale thumbnail for motion scoring."""
+    height, width = image.shape[:2]
+    size = (MOTION_THUMBNAIL_WIDTH, max(1, round(height * MOTION_THUMBNAIL_WIDTH / width)))
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+def motion_score(reference, thumbnail) -> float:
+    """Mean absolute pixel difference of two thumbnails, scaled to 0..1."""
+    return float(np.abs(thumbnail - reference).mean()) / 255.0
+
+
+class FrameSampler:
+    """Decides which frames are run through Holistic when extracting with a sampling mode."""
+
+    def __init__(self, mode: str = "all", stride: int = 2, motion_threshold: float = 0.02, max_gap: int = 10):
+        """
+        Args:
+            mode: "all" processes every frame, "stride" every Nth frame, "motion" only frames
+                whose motion score against the last processed frame reaches motion_threshold
+            stride: Process every Nth frame in "stride" mode
+            motion_threshold: Minimum motion score for a frame to be processed in "motion" mode
+            max_gap: Maximum number of consecutive skipped frames in "motion" mode
+        """
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode: {mode}. Choose from {list(SAMPLING_MODES)}")
+        self.mode = mode
+        self.stride = max(int(stride), 1)
+        self.motion_threshold = motion_threshold
+        self.max_gap = max_gap
+        self.processed = 0
+        self.skipped = 0
+        self._gap = None
+        self._reference = None
+
+    @property
+    def metadata(self) -> dict:
+        """Sampling parameters as stored in the parquet metadata."""
+        if self.mode == "stride":
+            return {"mode": self.mode, "stride": self.stride}
+        if self.mode == "motion":
+            return {"mode": self.mode, "motion_threshold": self.motion_threshold, "max_gap": self.max_gap}
+        return {"mode": self.mode}
+
+    def should_process(self, image) -> bool:
+        """Return whether the frame should be run through Holistic, the first frame always is."""
+        thumbnail = None
+        if self.mode == "all" or self._gap is None:
+            process = True
+        elif self.mode == "stride":
+            process = self._gap + 1 >= self.stride
+        else:
+            thumbnail = motion_thumbnail(image)
+            process = (
+                self._gap >= self.max_gap
+                or motion_score(self._reference, thumbnail) >= self.motion_threshold
+            )
+
+        if not process:
+            self._gap += 1
+            self.skipped += 1
+            return False
+
+        if self.mode == "motion":
+            self._reference = thumbnail if thumbnail is not None else motion_thumbnail(image)
+        self._gap = 0
+        self.processed += 1
+        return True
+
+
+def interpolate_landmarks(previous, following, weights):
+    """
+    Linearly interpolate between two (NUM_LANDMARKS, 4) landmark rows.
+
+    Landmarks missing from either row (all fields zero) hold the previous values instead.
+
+    Args:
+        previous: Landmarks of the processed frame before the gap
+        following: Landmarks of the processed frame after the gap
+        weights: Position of each interpolated frame between the two, 0..1
+
+    Returns:
+        np.ndarray: (len(weights), NUM_LANDMARKS, 4) interpolated rows
+    """
+    detected = previous.any(axis=1) & following.any(axis=1)
+    rows = np.repeat(previous[np.newaxis], len(weights), axis=0)
+    rows[:, detected] += weights[:, np.newaxis, np.newaxis] * (following[detected] - previous[detected])
+    return rows
+
+
+class LandmarkBlock:
+    """Preallocated float32 buffer holding Holistic landmarks for a run of frames."""
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Args:
+            capacity: Number of frames to preallocate, the block grows if exceeded
+        """
+        capacity = max(int(capacity), 1)
+        self.data = np.zeros((capacity, NUM_LANDMARKS, len(LANDMARK_FIELDS)), dtype=np.float32)
+        self.frames = np.zeros(capacity, dtype=np.int64)
+        self.skipped = np.zeros(capacity, dtype=bool)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = len(self.frames) * 2
+        data = np.zeros((capacity,) + self.data.shape[1:], dtype=np.float32)
+        data[:self.size] = self.data[:self.size]
+        frames = np.zeros(capacity, dtype=np.int64)
+        frames[:self.size] = self.frames[:self.size]
+        skipped = np.zeros(capacity, dtype=bool)
+        skipped[:self.size] = self.skipped[:self.size]
+        self.data, self.frames, self.skipped = data, frames, skipped
+
+    def append(self, frame_number: int, results):
+        """Write the Holistic results of one frame into the next row of the block."""
+        if self.size == len(self.frames):
+            self._grow()
+
+        row = self.data[self.size]
+        row.fill(0)
+        self.frames[self.size] = frame_number
+        self.skipped[self.size] = False
+
+        for landmark_type, attribute in RESULT_ATTRIBUTES.items():
+            landmark_list = getattr(results, attribute)
+            if not landmark_list:
+                continue
+
+            # Only pose landmarks carry a visibility score, the others are set to 1 when detected
+            if landmark_type == "pose":
+                values = [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmark_list.landmark]
+            else:
+                values = [(lm.x, lm.y, lm.z, 1.0) for lm in landmark_list.landmark]
+
+            offset = LANDMARK_OFFSETS[landmark_type]
+            count = min(len(values), EXPECTED_LANDMARKS[landmark_type])
+            row[offset:offset + count] = values[:count]
+
+        self.size += 1
+
+    def append_skipped(self, frame_number: int):
+        """Reserve a row for a frame that was not run through Holistic, see fill_skipped."""
+        if self.size == len(self.frames):
+            self._grow()
+
+        self.data[self.size].fill(0)
+        self.frames[self.size] = frame_number
+        self.skipped[self.size] = True
+        self.size += 1
+
+    def fill_skipped(self, count: int, previous_frame: int, previous_row, trailing: bool = False):
+        """
+        Fill skipped rows from the processed frames around them.
+
+        Args:
+            count: Number of skipped rows to fill
+            previous_frame: Frame number of the processed frame before the skipped rows
+            previous_row: Its (NUM_LANDMARKS, 4) landmarks, it may already have been flushed
+            trailing: The skipped rows end the block and hold previous_row. Otherwise they
+                precede the last row and are interpolated towards it
+        """
+        end = self.size if trailing else self.size - 1
+        start = end - count
+        if trailing:
+            self.data[start:end] = previous_row
+            return
+
+        following_frame = self.frames[end]
+        weights = (self.frames[start:end] - previous_frame) / (following_frame - previous_frame)
+        self.data[start:end] = interpolate_landmarks(previous_row, self.data[end], weights.astype(np.float32))
+
+    def clear(self):
+        """Reset the block so the preallocated buffer can be reused for the next frames."""
+        self.size = 0
+
+    def _flat_columns(self, column_order: str, selection: dict = None):
+        names, indices = landmark_columns(column_order, selection)
+        flat = self.data[:self.size].reshape(self.size, NUM_LANDMARKS * len(LANDMARK_FIELDS))
+        return names, flat[:, indices]
+
+    def to_dataframe(
+        self,
+        column_order: str = "natural",
+        skipped_column: bool = False,
+        selection: dict = None
+    ) -> pd.DataFrame:
+        """Build a DataFrame with a `frame` column, optionally `skipped`, then the landmark columns."""
+        names, values = self._flat_columns(column_order, selection)
+        df = pd.DataFrame(values, columns=list(names))
+        if skipped_column:
+            df.insert(0, "skipped", self.skipped[:self.size].copy())
+        df.insert(0, "frame", self.frames[:self.size].copy())
+        return df
+
+    def to_table(
+        self,
+        column_order: str = "natural",
+        skipped_column: bool = False,
+        selection: dict = None
+    ) -> pa.Table:
+        """Build an Arrow table with a `frame` column, optionally `skipped`, then the landmark columns."""
+        names, values = self._flat_columns(column_order, selection)
+        # Transpose once so every column is a contiguous array Arrow can wrap without copying
+        columns = np.ascontiguousarray(values.T)
+        arrays = [pa.array(self.frames[:self.size].copy())]
+        leading = ["frame"]
+        if skipped_column:
+            arrays.append(pa.array(self.skipped[:self.size].copy()))
+            leading.append("skipped")
+        arrays += [pa.array(column) for column in columns]
+        return pa.Table.from_arrays(arrays, names=leading + list(names))
+
+
+class LandmarkParquetWriter:
+    """Streams LandmarkBlocks into a single parquet file, one row group per block."""
+
+    def __init__(
+        self,
+        output_path: str,
+        column_order: str = "natural",
+        metadata: dict = None,
+        skipped_column: bool = False,
+        selection: dict = None
+    ):
+        """
+        Args:
+            output_path: Path of the parquet file to write
+            column_order: Column order passed to LandmarkBlock.to_table
+            metadata: Extraction settings stored as JSON values in the parquet schema metadata
+            skipped_column: Write the `skipped` flag of interpolated frames
+            selection: Landmarks to write, see landmark_columns. None writes all of them
+        """
+        self.output_path = output_path
+        self.column_order = column_order
+        self.skipped_column = skipped_column
+        self.selection = selection
+        self.metadata = {key: json.dumps(value) for key, value in (metadata or {}).items()}
+        self.num_rows = 0
+        self._writer = None
+
+    def _open(self, schema: pa.Schema):
+        if self.metadata:
+            schema = schema.with_metadata({**(schema.metadata or {}), **self.metadata})
+        self._writer = pq.ParquetWriter(self.output_path, schema)
+
+    def write_block(self, block: LandmarkBlock):
+        """Append the frames held by the block as one row group and return the written table."""
+        if len(block) == 0:
+            return None
+
+        table = block.to_table(
+            column_order=self.column_order,
+            skipped_column=self.skipped_column,
+            selection=self.selection
+        )
+        if self._writer is None:
+            self._open(table.schema)
+        self._writer.write_table(table, row_group_size=len(block))
+        self.num_rows += len(block)
+        return table
+
+    def write_parquet(self, path: str):
+        """Append the row groups of a parquet file written with the same settings, e.g. a checkpoint part."""
+        parquet_file = pq.ParquetFile(path)
+        for row_group in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(row_group)
+            if self._writer is None:
+                self._open(table.schema.remove_metadata())
+            self._writer.write_table(table, row_group_size=table.num_rows)
+            self.num_rows += table.num_rows
+
+    def close(self):
+        """Flush the parquet footer, an empty file is written if no frames were added."""
+        if self._writer is None:
+            empty = LandmarkBlock(capacity=1).to_table(
+                column_order=self.column_order,
+                skipped_column=self.skipped_column,
+                selection=self.selection
+            )
+            self._open(empty.schema)
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def extract_video_landmarks(
+    video_path: str,
+    output_path: str,
+    start_frame: int = 0,
+    end_frame: int = None,
+    warmup_frames: int = 0,
+    row_group_frames: int = 1000,
+    decode_ahead: int = 32,
+    decoder: str = "opencv",
+    scale_width: int = None,
+    region=RIGHT_HALF,
+    sampling: str = "all",
+    stride: int = 2,
+    motion_threshold: float = 0.02,
+    max_gap: int = 10,
+    selection: dict = None,
+    full_output_path: str = None,
+    checkpoint_uri: str = None,
+    checkpoint_dir: str = None,
+    keep_checkpoint: bool = False,
+    column_order: str = "natural",
+    metadata: dict = None,
+    progress_every: int = 500
+) -> int:
+    """
+    Run MediaPipe Holistic over a frame range of a video and stream the landmarks to parquet.
+
+    Args:
+        video_path: Path to the video file
+        output_path: Path of the landmarks parquet file to write
+        start_frame: First frame written to the output
+        end_frame: Frame to stop before, None processes to the end of the video
+        warmup_frames: Frames before start_frame run through Holistic but not written,
+            so tracking has settled when the range starts
+        row_group_frames: Frames per parquet row group, None keeps the whole range in memory
+        decode_ahead: Number of frames decoded ahead on a background thread, 0 decodes inline
+        decoder: "opencv" or "ffmpeg", see frame_source.open_frame_source
+        scale_width: Width the ffmpeg decoder downscales the crop to, None keeps full resolution
+        region: Relative (left, top, right, bottom) box of the interpreter, landmark
+            coordinates are normalized to this crop
+        sampling: "all", "stride" or "motion", see FrameSampler. Frames that are not run
+            through Holistic are interpolated and flagged in a `skipped` column
+        stride: Process every Nth frame in "stride" mode
+        motion_threshold: Minimum motion score for a frame to be processed in "motion" mode
+        max_gap: Maximum number of consecutive skipped frames in "motion" mode
+        selection: Landmarks written to output_path, see landmark_columns. None writes all
+        full_output_path: Optional second parquet file receiving every landmark
+        checkpoint_uri: gs://bucket/prefix every completed row group and the last frame index
+            are uploaded to. A restarted run resumes after the last checkpointed frame
+        checkpoint_dir: Local checkpoint directory, defaults to output_path + ".checkpoint".
+            Setting only this checkpoints locally
+        keep_checkpoint: Keep the checkpoint after the output is complete instead of deleting it
+        column_order: Column order of the output, see landmark_columns
+        metadata: Extra entries for the parquet schema metadata
+        progress_every: Print progress every N frames
+
+    Returns:
+        int: Number of frames written
+    """
+    import mediapipe as mp
+
+    checkpoint = None
+    if checkpoint_uri or checkpoint_dir:
+        checkpoint = ExtractionCheckpoint(checkpoint_dir or f"{output_path}.checkpoint", checkpoint_uri)
+        last_frame = checkpoint.restore()
+        if last_frame is not None:
+            print(f"Resuming after frame {last_frame} from checkpoint")
+            start_frame = last_frame + 1
+
+    frames = open_frame_source(
+        video_path,
+        decoder=decoder,
+        scale_width=scale_width,
+        region=region,
+        decode_ahead=decode_ahead,
+        start_frame=max(start_frame - warmup_frames, 0),
+        end_frame=end_frame
+    )
+    capacity = row_group_frames or (end_frame or frames.total_frames) - start_frame
+    block = LandmarkBlock(capacity=capacity)
+    sampler = FrameSampler(sampling, stride=stride, motion_threshold=motion_threshold, max_gap=max_gap)
+
+    # Last frame run through Holistic, skipped rows at the end of the block wait for the next one
+    previous_frame, previous_row = None, None
+    pending = 0
+
+    # Both outputs are cut from the same block, so subsetting costs no extra pass over the data
+    metadata = {"region": list(region), "sampling": sampler.metadata, "fps": frames.fps, **(metadata or {})}
+    writers = {"landmarks": LandmarkParquetWriter(
+        output_path,
+        column_order=column_order,
+        metadata={**metadata, "selection": selection},
+        skipped_column=sampling != "all",
+        selection=selection
+    )}
+    if full_output_path:
+        writers["full"] = LandmarkParquetWriter(
+            full_output_path,
+            column_order=column_order,
+            metadata={**metadata, "selection": None},
+            skipped_column=sampling != "all"
+        )
+
+    with mp.solutions.holistic.Holistic(
+        static_image_mode=False,
+        model_complexity=2,
+        enable_segmentation=True,
+        refine_face_landmarks=True
+    ) as holistic, ExitStack() as outputs, frames:
+        for name, writer in writers.items():
+            outputs.enter_context(writer)
+            # Copy the row groups completed before a restart
+            if checkpoint is not None:
+                for part_path in checkpoint.part_paths(name):
+                    writer.write_parquet(part_path)
+
+        for frame_number, image in frames:
+            if frame_number < start_frame:
+                holistic.process(image)
+                continue
+
+            if frame_number % progress_every == 0:
+                print(f"Processing frame {frame_number}")
+
+            if not sampler.should_process(image):
+                block.append_skipped(frame_number)
+                pending += 1
+                continue
+
+            block.append(frame_number, holistic.process(image))
+            if pending:
+                block.fill_skipped(pending, previous_frame, previous_row)
+                pending = 0
+            previous_frame, previous_row = frame_number, block.data[len(block) - 1].copy()
+
+            # Flush a full row group to the landmarks parquet, skipped rows are never flushed unfilled
+            if row_group_frames and len(block) >= row_group_frames:
+                tables = {name: writer.write_block(block) for name, writer in writers.items()}
+                if checkpoint is not None:
+                    checkpoint.commit(tables, block.frames[len(block) - 1])
+                block.clear()
+
+        # Save remaining landmarks to parquet
+        if pending:
+            block.fill_skipped(pending, previous_frame, previous_row, trailing=True)
+        for writer in writers.values():
+            writer.write_block(block)
+
+    if checkpoint is not None and not keep_checkpoint:
+        checkpoint.clear()
+
+    frames.report()
+    if sampling != "all":
+        print(f"Ran Holistic on {sampler.processed} frames, interpolated {sampler.skipped}")
+    return writers["landmarks"].num_rows
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak RSS (VmHWM) of this process, False where the kernel does not allow it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process in MB since the last reset_peak_rss."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Without /proc only the peak over the process lifetime is available, in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _extract_shard(*args, **kwargs) -> float:
+    """Run extract_video_landmarks in a shard process, returns the peak RSS of the shard in MB."""
+    extract_video_landmarks(*args, **kwargs)
+    return peak_rss_mb()
+
+
+def merge_landmark_parquets(input_paths, output_path: str) -> int:
+    """Concatenate landmark parquet files row group by row group, keeping the given order."""
+    num_rows = 0
+    writer = None
+    try:
+        for input_path in input_paths:
+            parquet_file = pq.ParquetFile(input_path)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, parquet_file.schema_arrow)
+            for row_group in range(parquet_file.num_row_groups):
+                table = parquet_file.read_row_group(row_group)
+                writer.write_table(table, row_group_size=table.num_rows)
+                num_rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return num_rows
+
+
+def extract_video_landmarks_sharded(
+    video_path: str,
+    output_path: str,
+    shards: int = 1,
+    warmup_frames: int = 50,
+    full_output_path: str = None,
+    checkpoint_uri: str = None,
+    checkpoint_dir: str = None,
+    keep_checkpoint: bool = False,
+    **kwargs
+) -> int:
+    """
+    Split a video into frame ranges and extract each range in its own process.
+
+    Every shard seeks to its range, runs its own Holistic instance over warmup_frames
+    overlap frames first and writes its own parquet file. The shard outputs are merged
+    into one frame-ordered parquet file.
+
+    Args:
+        video_path: Path to the video file
+        output_path: Path of the merged landmarks parquet file
+        shards: Number of frame ranges processed in parallel
+        warmup_frames: Overlap frames each shard processes before its range starts
+        full_output_path: Optional merged parquet file receiving every landmark when
+            kwargs select a subset
+        checkpoint_uri: gs://bucket/prefix for resumable checkpoints, each shard checkpoints
+            under its own sub-prefix until the shards are merged
+        checkpoint_dir: Local checkpoint directory, shards use a subdirectory each
+        keep_checkpoint: Keep the checkpoints after the output is complete, for callers that
+            delete them only once the output is stored elsewhere
+        **kwargs: Passed on to extract_video_landmarks
+
+    Returns:
+        int: Number of frames written
+    """
+    frames = VideoFrameSource(video_path, decode_ahead=0)
+    total_frames = frames.total_frames
+    frames.close()
+
+    # Containers without a reliable frame count cannot be split ahead of time
+    if shards <= 1 or total_frames <= shards:
+        return extract_video_landmarks(
+            video_path,
+            output_path,
+            warmup_frames=warmup_frames,
+            full_output_path=full_output_path,
+            checkpoint_uri=checkpoint_uri,
+            checkpoint_dir=checkpoint_dir,
+            keep_checkpoint=keep_checkpoint,
+            **kwargs
+        )
+
+    bounds = [round(total_frames * shard / shards) for shard in range(shards + 1)]
+    shard_paths = [f"{output_path}.shard{shard:03d}" for shard in range(shards)]
+    full_shard_paths = [f"{full_output_path}.shard{shard:03d}" if full_output_path else None for shard in range(shards)]
+    shard_checkpoint_uris = [f"{checkpoint_uri.rstrip('/')}/shard{shard:03d}" if checkpoint_uri else None for shard in range(shards)]
+    shard_checkpoint_dirs = [
+        os.path.join(checkpoint_dir or f"{output_path}.checkpoint", f"shard{shard:03d}")
+        if checkpoint_uri or checkpoint_dir else None
+        for shard in range(shards)
+    ]
+    print(f"Extracting {total_frames} frames in {shards} shards with {warmup_frames} warm-up frames")
+
+    # spawn gives every shard a clean MediaPipe graph instead of a forked copy
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=shards, mp_context=context) as executor:
+            futures = [
+                executor.submit(
+                    _extract_shard,
+                    video_path,
+                    shard_path,
+                    start_frame=bounds[shard],
+                    # The last shard reads to the end in case the reported frame count is short
+                    end_frame=bounds[shard + 1] if shard < shards - 1 else None,
+                    warmup_frames=warmup_frames if shard > 0 else 0,
+                    full_output_path=full_shard_paths[shard],
+                    checkpoint_uri=shard_checkpoint_uris[shard],
+                    checkpoint_dir=shard_checkpoint_dirs[shard],
+                    # Finished shards stay checkpointed until the merged output exists
+                    keep_checkpoint=True,
+                    **kwargs
+                )
+                for shard, shard_path in enumerate(shard_paths)
+            ]
+            # Shard processes are spawned per video, so their peaks cover this video only
+            shard_peaks = [future.result() for future in futures]
+        print(f"Peak RSS of the shard processes: {', '.join(f'{peak:.0f}' for peak in shard_peaks)} MB")
+
+        if full_output_path:
+            merge_landmark_parquets(full_shard_paths, full_output_path)
+        num_rows = merge_landmark_parquets(shard_paths, output_path)
+
+        if not keep_checkpoint:
+            for shard_checkpoint_dir, shard_checkpoint_uri in zip(shard_checkpoint_dirs, shard_checkpoint_uris):
+                if shard_checkpoint_dir:
+                    ExtractionCheckpoint(shard_checkpoint_dir, shard_checkpoint_uri).clear()
+        return num_rows
+    finally:
+        for shard_path in shard_paths + full_shard_paths:
+            if shard_path and os.path.exists(shard_path):
+                os.remove(shard_path)
+
+
+def benchmark_sampling(video_path: str, max_frames: int = 1000, configurations: dict = None, **kwargs) -> dict:
+    """
+    Compare extraction time and landmark error of sampling modes on a reference clip.
+
+    Every configuration is extracted from the first max_frames frames and compared against
+    processing every frame. The error is the mean absolute x/y difference of landmarks
+    detected in both outputs, over all frames and over the interpolated frames only.
+
+    Args:
+        video_path: Path to the reference video
+        max_frames: Number of frames extracted per configuration
+        configurations: Sampling keyword arguments of extract_video_landmarks keyed by name
+        **kwargs: Passed on to extract_video_landmarks
+
+    Returns:
+        dict: Seconds, speedup, processed fraction and errors of each configuration keyed by name
+    """
+    configurations = configurations or {
+        "stride 2": dict(sampling="stride", stride=2),
+        "stride 3": dict(sampling="stride", stride=3),
+        "motion 0.01": dict(sampling="motion", motion_threshold=0.01),
+        "motion 0.02": dict(sampling="motion", motion_threshold=0.02),
+    }
+    names, _ = landmark_columns("natural")
+    xy_columns = [name for name in names if name.endswith("-x") or name.endswith("-y")]
+
+    def run(options):
+        output_path = os.path.join(temp_dir, "landmarks.parquet")
+        start = time.perf_counter()
+        extract_video_landmarks(video_path, output_path, end_frame=max_frames, **kwargs, **options)
+        seconds = time.perf_counter() - start
+        return seconds, pd.read_parquet(output_path)
+
+    reports = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        reference_seconds, reference = run(dict(sampling="all"))
+        reference_xy = reference[xy_columns].to_numpy()
+        reports["all"] = {"seconds": reference_seconds, "speedup": 1.0, "processed": 1.0}
+
+        for name, options in configurations.items():
+            seconds, sampled = run(options)
+            sampled_xy = sampled[xy_columns].to_numpy()
+            skipped = sampled["skipped"].to_numpy()
+
+            # Only compare landmarks detected in both outputs
+            both = (reference_xy != 0) & (sampled_xy != 0)
+            error = np.abs(reference_xy - sampled_xy)
+            reports[name] = {
+                "seconds": seconds,
+                "speedup": reference_seconds / seconds if seconds > 0 else 0.0,
+                "processed": 1.0 - skipped.mean() if len(skipped) else 0.0,
+                "error": float(error[both].mean()) if both.any() else 0.0,
+                "skipped_error": float(error[skipped][both[skipped]].mean()) if both[skipped].any() else 0.0,
+            }
+
+    for name, report in reports.items():
+        line = f"{name}: {report['seconds']:.1f}s ({report['speedup']:.2f}x), {report['processed']:.0%} frames processed"
+        if "error" in report:
+            line += f", mean error {report['error']:.4f} (interpolated frames {report['skipped_error']:.4f})"
+        print(line)
+    return reports
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare landmark extraction sampling modes on a reference clip")
+    parser.add_argument("video_path")
+    parser.add_argument("--max-frames", type=int, default=1000)
+    parser.add_argument("--decoder", default="opencv")
+    args = parser.parse_args()
+    benchmark_sampling(args.video_path, args.max_frames, decoder=args.decoder)
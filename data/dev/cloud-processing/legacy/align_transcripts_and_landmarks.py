@@ -1,2 +1,26 @@
-def align_transcripts_and_landmarks(landmark_path: str, transcript_path: str, temp_dir: str) -> str:
-    """Align filtered landmarks with transcripts into training data.""" 
\ No newline at end of file
+def align_transcripts_and_landmarks(landmark_path: str, transcript_path: str, temp_dir: str, level: str = 'segment') -> str:
+    """Align filtered landmarks with transcripts into training data.
+
+    Args:
+        landmark_path: Path to the landmark parquet file of a video
+        transcript_path: Path to the transcript JSON file of the same video
+        temp_dir: Directory for temporary files and output
+        level: Align Whisper 'segment's or single 'word's with the landmark frames
+
+    Returns:
+        str: Path to the parquet file with one (frame range, text) example per row
+    """
+    import os
+    import pyarrow.parquet as pq
+    from alignment import align_files
+
+    # Frame ranges are looked up with binary searches over the landmark frame column
+    examples = align_files(landmark_path, transcript_path, level=level)
+
+    output_path = os.path.join(
+        temp_dir,
+        f"{os.path.splitext(os.path.basename(landmark_path))[0]}_aligned.parquet"
+    )
+    pq.write_table(examples, output_path)
+
+    return output_path
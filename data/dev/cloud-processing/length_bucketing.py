@@ -0,0 +1,152 @@
+import numpy as np
+
+
+def padding_ratio(lengths, batches, pad_to: int = None) -> float:
+    """
+    Fraction of the frames fed to the model that are padding.
+
+    Args:
+        lengths: Frames of every example
+        batches: Lists of example indices
+        pad_to: Fixed length every example is padded to, None pads to the longest in the batch
+
+    Returns:
+        float: Padding frames / all frames, 0 for no batches
+    """
+    lengths = np.asarray(lengths)
+    real = padded = 0
+    for batch in batches:
+        batch_lengths = lengths[np.asarray(batch)]
+        real += int(batch_lengths.sum())
+        padded += len(batch_lengths) * (pad_to if pad_to else int(batch_lengths.max()))
+    return 1.0 - real / padded if padded else 0.0
+
+
+def random_batches(num_examples: int, batch_size: int, seed: int = 0) -> list:
+    """Shuffled fixed-size batches, the baseline the bucketed sampler is compared with."""
+    order = np.random.default_rng(seed).permutation(num_examples)
+    return [order[start:start + batch_size].tolist() for start in range(0, num_examples, batch_size)]
+
+
+class LengthBucketBatchSampler:
+    """
+    Batches of examples of similar length, filled up to a frame budget.
+
+    Every epoch the examples are shuffled and cut into pools of roughly pool_batches batches.
+    Each pool is sorted by length and packed greedily, so a batch holds as many examples as
+    fit into max_frames once padded to its longest example. The batch order is shuffled
+    again, which keeps the epochs random while batches contain almost no padding.
+    Pass it as batch_sampler to a PyTorch DataLoader.
+    """
+
+    def __init__(
+        self,
+        lengths,
+        max_frames: int = 20000,
+        max_batch_size: int = None,
+        pool_batches: int = 100,
+        shuffle: bool = True,
+        seed: int = 0
+    ):
+        """
+        Args:
+            lengths: Frames of every example, e.g. training_dataset.TrainingShards.lengths()
+            max_frames: Budget of a batch, batch size times its longest example
+            max_batch_size: Optional cap on the examples of a batch
+            pool_batches: Batches per sorted pool, larger pools pad less but are less random
+            shuffle: Shuffle examples and batches, otherwise batches follow the sorted order
+            seed: Base seed of the shuffle, combined with the epoch
+        """
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.max_frames = max_frames
+        self.max_batch_size = max_batch_size
+        self.pool_batches = pool_batches
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self._batches = None
+
+    def set_epoch(self, epoch: int):
+        """Change the shuffle order, call before every epoch."""
+        self.epoch = epoch
+        self._batches = None
+
+    def _pack(self, indices: np.ndarray) -> list:
+        batches = []
+        batch, longest = [], 0
+        for index in indices[np.argsort(self.lengths[indices], kind="stable")]:
+            length = self.lengths[index]
+            fits = (len(batch) + 1) * max(longest, length) <= self.max_frames
+            if batch and (not fits or (self.max_batch_size and len(batch) >= self.max_batch_size)):
+                batches.append(batch)
+                batch, longest = [], 0
+            # An example longer than the budget still gets a batch of its own
+            batch.append(int(index))
+            longest = max(longest, length)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def batches(self) -> list:
+        """Batches of the current epoch."""
+        if self._batches is None:
+            rng = np.random.default_rng((self.seed, self.epoch))
+            order = rng.permutation(len(self.lengths)) if self.shuffle else np.arange(len(self.lengths))
+
+            # Pool size in examples from the batch size a median-length example allows
+            median = max(int(np.median(self.lengths)), 1) if len(self.lengths) else 1
+            examples_per_batch = max(self.max_frames // median, 1)
+            if self.max_batch_size:
+                examples_per_batch = min(examples_per_batch, self.max_batch_size)
+            pool_size = max(examples_per_batch * self.pool_batches, 1)
+
+            self._batches = []
+            for start in range(0, len(order), pool_size):
+                self._batches.extend(self._pack(order[start:start + pool_size]))
+            if self.shuffle:
+                self._batches = [self._batches[i] for i in rng.permutation(len(self._batches))]
+        return self._batches
+
+    def __iter__(self):
+        return iter(self.batches())
+
+    def __len__(self) -> int:
+        return len(self.batches())
+
+
+def report_padding(lengths, sampler: LengthBucketBatchSampler, batch_size: int, pad_to: int = None) -> dict:
+    """
+    Compare the padding of fixed-size random batches with the bucketed batches of an epoch.
+
+    Args:
+        lengths: Frames of every example
+        sampler: Bucketed sampler over the same examples
+        batch_size: Batch size of the fixed-size baseline
+        pad_to: Fixed length the baseline pads every example to (as Whisper pads to 30 s),
+            None pads the baseline to its longest example per batch
+
+    Returns:
+        dict: Padding ratios, padded frames per epoch and the resulting saving
+    """
+    lengths = np.asarray(lengths)
+    before_batches = random_batches(len(lengths), batch_size, seed=sampler.seed)
+    after_batches = sampler.batches()
+
+    def padded_frames(batches, fixed):
+        return sum(len(batch) * (fixed or int(lengths[batch].max())) for batch in batches)
+
+    report = {
+        "padding_before": padding_ratio(lengths, before_batches, pad_to),
+        "padding_after": padding_ratio(lengths, after_batches),
+        "frames_before": padded_frames(before_batches, pad_to),
+        "frames_after": padded_frames(after_batches, None),
+        "batches_before": len(before_batches),
+        "batches_after": len(after_batches),
+    }
+    report["speedup"] = report["frames_before"] / report["frames_after"] if report["frames_after"] else 1.0
+    print(
+        f"Padding per epoch: {report['padding_before']:.1%} with {report['batches_before']} batches of {batch_size} -> "
+        f"{report['padding_after']:.1%} with {report['batches_after']} bucketed batches "
+        f"({report['speedup']:.2f}x fewer frames)"
+    )
+    return report
@@ -1,4 +1,27 @@
-def process_csv_row(input_path: str, temp_dir: str) -> str:
+def process_csv_row(
+    input_path: str,
+    temp_dir: str,
+    row_group_frames: int = 1000,
+    decode_ahead: int = 32,
+    shards: int = 1,
+    warmup_frames: int = 50,
+    decoder: str = "opencv",
+    scale_width: int = None,
+    auto_region: bool = False,
+    sampling: str = "all",
+    stride: int = 2,
+    motion_threshold: float = 0.02,
+    filtered: bool = False,
+    keep_full: bool = False,
+    checkpoint_uri: str = None,
+    whisper_model: str = "large-v3",
+    whisper_cache_dir: str = None,
+    whisper_batch_size: int = None,
+    transcript_cache: str = None,
+    parallel_transcription: bool = False,
+    transcription_cpus: int = None,
+    next_input_path: str = None
+) -> str:
     """
     Process a single CSV row file - download video from URL and extract landmarks and transcripts.
     
@@ -7,19 +30,59 @@ def process_csv_row(input_path: str, temp_dir: str) -> str:
     Args:
         input_path: Path to the JSON file containing CSV row data
         temp_dir: Directory for temporary files and output
+        row_group_frames: Number of frames flushed to the landmarks parquet as one row group
+            while extracting, keeping peak memory fixed. None keeps the whole video in memory
+        decode_ahead: Number of frames decoded, cropped and converted ahead on a background
+            thread while Holistic runs. 0 decodes inline
+        shards: Number of frame ranges of the video extracted in parallel processes,
+            each with its own Holistic instance
+        warmup_frames: Overlap frames each shard runs before its range so tracking settles
+        decoder: "opencv" decodes full frames with cv2.VideoCapture, "ffmpeg" lets ffmpeg crop
+            (and optionally downscale) to the interpreter region and pipe rgb24 frames
+        scale_width: Width the ffmpeg decoder downscales the crop to, None keeps full resolution
+        auto_region: Detect the interpreter box per video with a cheap pose pass instead of
+            cropping the right half. The box used is stored in the parquet metadata as "region"
+        sampling: "all" runs Holistic on every frame, "stride" on every Nth frame and "motion"
+            only on frames whose pixel difference to the last processed frame reaches
+            motion_threshold. Skipped frames are interpolated and flagged in a `skipped` column
+        stride: Process every Nth frame in "stride" mode
+        motion_threshold: Minimum motion score (mean absolute pixel difference, 0..1) in "motion" mode
+        filtered: Write only the landmarks kept by filter_landmarks (FILTERED_SELECTION) to the
+            landmarks parquet instead of all of them, skipping the separate filtering pass
+        keep_full: With filtered, also write every landmark to {video_id}_landmarks_full.parquet
+        checkpoint_uri: gs://bucket/prefix for landmark checkpoints, e.g. under the job's output
+            folder. Completed row groups and the last frame index are uploaded to
+            {checkpoint_uri}/{row file name without extension}/, so a preempted worker resumes
+            instead of restarting. The checkpoint is kept after extraction, CloudProcessor
+            deletes it once the output is uploaded
+        whisper_model: Whisper model name, loaded once per worker process and reused
+        whisper_cache_dir: Local directory the Whisper checkpoint is downloaded to and
+            memory-mapped from, defaults to $WHISPER_CACHE_DIR or ~/.cache/whisper
+        whisper_batch_size: Split the audio at pauses with an energy pass and decode this many
+            chunks per forward pass, which is several times faster on CPU. None transcribes
+            sequentially in 30 second windows
+        transcript_cache: Local directory or gs://bucket/prefix of transcripts keyed by a hash
+            of the decoded audio, the model and the options. Reprocessing a video (e.g. with
+            different landmark settings) then skips Whisper
+        parallel_transcription: Transcribe in a separate long-lived process while the landmarks
+            are extracted, so the video takes as long as the slower branch instead of both.
+            The CPUs are split between the branches, see transcription_cpus
+        transcription_cpus: CPUs reserved for transcription, the landmark branch (and its
+            shards) is pinned to the rest. None splits the CPUs in half
+        next_input_path: Row file of the video processed next by this worker, passed by
+            CloudProcessor. Its video is downloaded in the background while this one is processed
         
     Returns:
         str: Path to the output directory containing processed files
     """
     import json
     import os
-    import requests
-    import cv2
-    import pandas as pd
-    import mediapipe as mp
-    import whisper
-    import subprocess
-    from natsort import natsorted
+    from downloader import fetch, prefetch
+    from filter_landmarks import FILTERED_SELECTION
+    from frame_source import RIGHT_HALF
+    from interpreter_region import estimate_interpreter_region
+    from landmark_extraction import extract_video_landmarks_sharded, peak_rss_mb, reset_peak_rss
+    from transcription import cancel_transcription, cpu_affinity, split_cpus, submit_transcription, transcribe_video
     
     # Read CSV row data from JSON file
     with open(input_path, "r", encoding="utf-8") as f:
@@ -38,162 +101,94 @@ def process_csv_row(input_path: str, temp_dir: str) -> str:
     video_filename = f"{video_id}.mp4"
     video_path = os.path.join(temp_dir, video_filename)
     
+    # Pooled, resumable download, taken over from the prefetch started by the previous row if any
     print(f"Downloading video...")
-    response = requests.get(video_url, stream=True, timeout=300)
-    if response.status_code == 200:
-        with open(video_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=1024*1024):  # 1MB chunks
-                if chunk:
-                    f.write(chunk)
-        print(f"Downloaded video: {video_filename}")
-    else:
-        raise Exception(f"Failed to download video. Status code: {response.status_code}")
-    
-    # Define expected number of landmarks
-    EXPECTED_LANDMARKS = {
-        "pose": 33,
-        "face": 468,
-        "left_hand": 21,
-        "right_hand": 21
-    }
-    
-    # Extract landmarks
-    print("Extracting landmarks...")
-    mp_holistic = mp.solutions.holistic
-    
-    # Open video
-    cap = cv2.VideoCapture(video_path)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    print(f"Total frames: {total_frames}")
-    
-    frame_data = {}
-    
-    # Process video for landmarks
-    with mp_holistic.Holistic(
-        static_image_mode=False,
-        model_complexity=2,
-        enable_segmentation=True,
-        refine_face_landmarks=True
-    ) as holistic:
-        frame_count = 0
-        while cap.isOpened():
-            
-            ret, frame = cap.read()
-            if not ret:
-                break
-            # Initialize frame data dictionary with zeros
-            current_frame_data = {"frame": frame_count}
-            
-            for landmark_type, num_landmarks in EXPECTED_LANDMARKS.items():
-                for idx in range(num_landmarks):
-                    current_frame_data[f"{landmark_type}-{idx}-x"] = 0
-                    current_frame_data[f"{landmark_type}-{idx}-y"] = 0
-                    current_frame_data[f"{landmark_type}-{idx}-z"] = 0
-                    current_frame_data[f"{landmark_type}-{idx}-visibility"] = 0
-            
-            # Get frame dimensions and crop to right half (where sign language interpreter is)
-            height, width, _ = frame.shape
-            right_half = frame[:, width // 2:]
-            image = cv2.cvtColor(right_half, cv2.COLOR_BGR2RGB)
-            
-            # Process frame
-            results = holistic.process(image)
-            
-            # Update landmarks when detected
-            if results.pose_landmarks:
-                for idx, landmark in enumerate(results.pose_landmarks.landmark):
-                    current_frame_data[f"pose-{idx}-x"] = landmark.x
-                    current_frame_data[f"pose-{idx}-y"] = landmark.y
-                    current_frame_data[f"pose-{idx}-z"] = landmark.z
-                    current_frame_data[f"pose-{idx}-visibility"] = landmark.visibility
-            
-            if results.face_landmarks:
-                for idx, landmark in enumerate(results.face_landmarks.landmark):
-                    current_frame_data[f"face-{idx}-x"] = landmark.x
-                    current_frame_data[f"face-{idx}-y"] = landmark.y
-                    current_frame_data[f"face-{idx}-z"] = landmark.z
-                    current_frame_data[f"face-{idx}-visibility"] = 1
-            
-            if results.left_hand_landmarks:
-                for idx, landmark in enumerate(results.left_hand_landmarks.landmark):
-                    current_frame_data[f"left_hand-{idx}-x"] = landmark.x
-                    current_frame_data[f"left_hand-{idx}-y"] = landmark.y
-                    current_frame_data[f"left_hand-{idx}-z"] = landmark.z
-                    current_frame_data[f"left_hand-{idx}-visibility"] = 1
-            
-            if results.right_hand_landmarks:
-                for idx, landmark in enumerate(results.right_hand_landmarks.landmark):
-                    current_frame_data[f"right_hand-{idx}-x"] = landmark.x
-                    current_frame_data[f"right_hand-{idx}-y"] = landmark.y
-                    current_frame_data[f"right_hand-{idx}-z"] = landmark.z
-                    current_frame_data[f"right_hand-{idx}-visibility"] = 1
-            
-            frame_data[frame_count] = current_frame_data
-            
-            if frame_count % 500 == 0:
-                print(f"Processing frame {frame_count}")
-                
-            frame_count += 1
-    
-    cap.release()
-    
-    # Save landmarks to parquet
-    landmarks_output = os.path.join(temp_dir, f"{video_id}_landmarks.parquet")
-    df = pd.DataFrame.from_dict(frame_data, orient="index")
-    df = df[["frame"] + natsorted([col for col in df.columns if col != "frame"])]
-    df.to_parquet(landmarks_output, engine="pyarrow")
-    print(f"Saved landmarks: {landmarks_output}")
-    
-    # Extract transcripts
-    print("Extracting transcripts...")
-    
-    # Extract audio from video
-    audio_path = os.path.join(temp_dir, f"{video_id}_audio.wav")
-    command = [
-        "ffmpeg",
-        "-i", video_path,
-        "-ar", "16000",  # Sample rate required by Whisper
-        "-ac", "1",      # Mono audio
-        "-y",            # Overwrite output file
-        audio_path
-    ]
-    
+    fetch(video_url, video_path)
+    print(f"Downloaded video: {video_filename}")
+    
+    # Download the next video of this worker while this one is processed
+    if next_input_path:
+        with open(next_input_path, "r", encoding="utf-8") as f:
+            next_video_url = json.load(f).get("webm")
+        if next_video_url:
+            prefetch(next_video_url)
+    
+    transcript_output = os.path.join(temp_dir, f"{video_id}_transcript.json")
+    transcript_options = dict(
+        model_name=whisper_model,
+        cache_dir=whisper_cache_dir,
+        batch_size=whisper_batch_size,
+        transcript_cache=transcript_cache
+    )
+    transcription = None
     try:
-        subprocess.run(command, check=True, capture_output=True)
-        print("Audio extracted successfully")
-        
-        # Load Whisper model
-        model = whisper.load_model("large-v3")
-        
-        # Transcribe audio with word-level timestamps
-        result = model.transcribe(
-            audio_path,
-            language="de",  # German language
-            word_timestamps=True  # Enable word-level timestamps
-        )
+        # Transcription reads the same file in its own process while the landmarks are extracted
+        landmark_cpus = None
+        if parallel_transcription:
+            transcription_cpu_set, landmark_cpus = split_cpus(transcription_cpus)
+            print(f"Transcribing on CPUs {transcription_cpu_set}, extracting landmarks on CPUs {landmark_cpus}")
+            transcription = submit_transcription(
+                video_path,
+                transcript_output,
+                cpus=transcription_cpu_set,
+                **transcript_options
+            )
         
-        # Extract word segments
-        word_segments = result.get("segments", [])
+        # The worker process handles many videos, start its peak over for this one
+        peak_per_video = reset_peak_rss()
         
-        # Save transcription to JSON
-        transcript_output = os.path.join(temp_dir, f"{video_id}_transcript.json")
-        
-        with open(transcript_output, "w", encoding="utf-8") as f:
-            json.dump(word_segments, f, ensure_ascii=False, indent=2)
+        # Extract landmarks, frames are cropped to the interpreter (the right half unless detected)
+        with cpu_affinity(landmark_cpus):
+            region = RIGHT_HALF
+            if auto_region:
+                region = estimate_interpreter_region(video_path) or RIGHT_HALF
+                print(f"Interpreter region: {region}")
+            
+            print("Extracting landmarks...")
+            landmarks_output = os.path.join(temp_dir, f"{video_id}_landmarks.parquet")
+            full_landmarks_output = None
+            if filtered and keep_full:
+                full_landmarks_output = os.path.join(temp_dir, f"{video_id}_landmarks_full.parquet")
+            num_frames = extract_video_landmarks_sharded(
+                video_path,
+                landmarks_output,
+                shards=shards,
+                warmup_frames=warmup_frames,
+                row_group_frames=row_group_frames,
+                decode_ahead=decode_ahead,
+                decoder=decoder,
+                scale_width=scale_width,
+                region=region,
+                sampling=sampling,
+                stride=stride,
+                motion_threshold=motion_threshold,
+                selection=FILTERED_SELECTION if filtered else None,
+                full_output_path=full_landmarks_output,
+                # Keyed by the input name, which is what CloudProcessor clears after the upload
+                checkpoint_uri=f"{checkpoint_uri.rstrip('/')}/{os.path.splitext(os.path.basename(input_path))[0]}" if checkpoint_uri else None,
+                # Kept while the transcript finishes and the output is uploaded
+                keep_checkpoint=True,
+                column_order="natural"
+            )
         
-        print(f"Saved transcript: {transcript_output}")
+        # Shard processes report their own peaks, this is the worker process
+        peak_label = "peak RSS" if peak_per_video else "process lifetime peak RSS"
+        print(f"Saved landmarks: {landmarks_output} ({num_frames} frames, {peak_label} {peak_rss_mb():.0f} MB)")
         
-    except subprocess.CalledProcessError as e:
-        print(f"Warning: Audio extraction failed: {e}")
-        # Create empty transcript file
-        transcript_output = os.path.join(temp_dir, f"{video_id}_transcript.json")
-        with open(transcript_output, "w", encoding="utf-8") as f:
-            json.dump([], f)
+        # Extract transcripts
+        if transcription is not None:
+            print("Waiting for transcript...")
+            transcription.result()
+        else:
+            print("Extracting transcripts...")
+            transcribe_video(video_path, transcript_output, **transcript_options)
     
     finally:
+        # Only unfinished after a failure, which surfaces without waiting for Whisper
+        if transcription is not None and not transcription.done():
+            cancel_transcription(transcription)
+        
         # Clean up temporary files
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
         if os.path.exists(video_path):
             os.remove(video_path)
     
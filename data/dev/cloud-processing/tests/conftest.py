@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules import each other by name, like they do next to each other on a worker
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
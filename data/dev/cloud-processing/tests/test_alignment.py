@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+from alignment import align_examples, time_to_rows, transcript_spans
+
+
+def segment(start: float, end: float, text: str, words: list = None) -> dict:
+    return {"start": start, "end": end, "text": f" {text}", "words": words}
+
+
+def test_empty_transcript():
+    table = align_examples([], num_frames=100)
+
+    assert table.num_rows == 0
+    assert table.column_names == [
+        "example", "start_time", "end_time", "start_frame", "end_frame", "row_start", "row_end", "text"
+    ]
+
+
+def test_empty_transcript_with_cut_times():
+    assert align_examples([], num_frames=100, cut_times=[1.0, 2.0]).num_rows == 0
+
+
+def test_word_level_without_word_timestamps():
+    segments = [segment(0.0, 1.0, "Guten Abend")]
+    assert align_examples(segments, num_frames=100, level="word").num_rows == 0
+
+
+def test_spans_map_to_row_ranges():
+    segments = [segment(0.0, 1.0, "Guten Abend"), segment(1.0, 2.5, "meine Damen und Herren")]
+
+    table = align_examples(segments, fps=25.0, num_frames=100)
+
+    assert table.column("row_start").to_pylist() == [0, 25]
+    assert table.column("row_end").to_pylist() == [25, 63]
+    assert table.column("text").to_pylist() == ["Guten Abend", "meine Damen und Herren"]
+
+
+def test_spans_shorter_than_a_frame_are_dropped():
+    # The first span starts and ends between frames 0 and 1, the second has no duration at all
+    segments = [segment(0.01, 0.03, "äh"), segment(1.0, 1.0, "leer"), segment(2.0, 3.0, "Wetter")]
+
+    table = align_examples(segments, fps=25.0, num_frames=100)
+
+    assert table.column("text").to_pylist() == ["Wetter"]
+    assert table.column("example").to_pylist() == [0]
+
+
+def test_spans_beyond_the_last_frame_are_dropped():
+    # A 260 frame video with a transcript running to 20 seconds
+    segments = [segment(0.0, 10.0, "passt"), segment(10.0, 20.0, "zu lang"), segment(20.0, 21.0, "danach")]
+
+    table = align_examples(segments, fps=25.0, num_frames=260)
+
+    assert table.column("text").to_pylist() == ["passt"]
+    assert table.column("end_frame").to_pylist() == [250]
+
+
+def test_short_overrun_is_clipped_to_the_last_frame():
+    # The audio ends half a frame after the video
+    table = align_examples([segment(3.0, 4.02, "Ende")], fps=25.0, num_frames=100)
+
+    assert table.column("end_frame").to_pylist() == [100]
+    assert table.column("row_end").to_pylist() == [100]
+    assert align_examples([segment(3.0, 4.02, "Ende")], fps=25.0, num_frames=100, max_overrun_frames=0).num_rows == 0
+
+
+def test_cut_after_the_last_frame_is_dropped():
+    segments = [segment(0.0, 1.0, "eins"), segment(1.5, 3.0, "zwei")]
+
+    table = align_examples(segments, fps=25.0, num_frames=50, cut_times=[1.2, 5.0])
+
+    assert table.column("text").to_pylist() == ["eins"]
+
+
+def test_sampled_frame_numbers():
+    # Landmarks of every other frame, row offsets no longer equal frame numbers
+    frame_numbers = np.arange(0, 100, 2)
+
+    table = align_examples([segment(1.0, 2.0, "Sport")], fps=25.0, frame_numbers=frame_numbers)
+
+    assert table.column("start_frame").to_pylist() == [25]
+    assert table.column("end_frame").to_pylist() == [50]
+    assert table.column("row_start").to_pylist() == [13]
+    assert table.column("row_end").to_pylist() == [25]
+
+
+def test_time_to_rows_first_and_last_frame():
+    frame_numbers = np.array([0, 1, 2, 3])
+    np.testing.assert_array_equal(time_to_rows([0.0, 0.12, 0.2], 25.0, frame_numbers), [0, 3, 4])
+
+
+def test_cut_times_group_spans():
+    segments = [
+        segment(0.0, 0.5, "eins"),
+        segment(0.5, 1.0, "zwei"),
+        segment(1.2, 1.8, "drei"),
+        segment(2.5, 3.5, "nach dem letzten Schnitt")
+    ]
+
+    table = align_examples(segments, fps=25.0, num_frames=100, cut_times=[1.0, 2.0, 2.2])
+
+    # The span ending exactly on the first cut belongs to it, the cut without spans yields nothing
+    assert table.column("text").to_pylist() == ["eins zwei", "drei"]
+    assert table.column("start_time").to_pylist() == [0.0, 1.0]
+    assert table.column("end_time").to_pylist() == [1.0, 2.0]
+
+
+def test_transcript_spans_sorts_overlapping_windows():
+    segments = [segment(2.0, 3.0, "b"), segment(0.0, 1.0, "a")]
+
+    starts, ends, texts = transcript_spans(segments)
+
+    np.testing.assert_array_equal(starts, [0.0, 2.0])
+    np.testing.assert_array_equal(ends, [1.0, 3.0])
+    assert texts == ["a", "b"]
+
+
+def test_unknown_level():
+    with pytest.raises(ValueError):
+        transcript_spans([], level="sentence")
+
+
+def test_frames_are_required():
+    with pytest.raises(ValueError):
+        align_examples([segment(0.0, 1.0, "a")])
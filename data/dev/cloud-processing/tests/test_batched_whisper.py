@@ -0,0 +1,78 @@
+import numpy as np
+from batched_whisper import split_on_silence
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def assert_valid_chunks(chunks, num_samples: int, max_chunk_seconds: float):
+    for start, end in chunks:
+        assert 0 <= start < end <= num_samples
+        assert end - start <= max_chunk_seconds * SAMPLE_RATE
+    for (_, previous_end), (next_start, _) in zip(chunks, chunks[1:]):
+        assert previous_end <= next_start
+
+
+def test_empty_audio():
+    assert split_on_silence(np.zeros(0, dtype=np.float32), SAMPLE_RATE) == []
+
+
+def test_audio_shorter_than_a_frame():
+    audio = tone(0.01)
+    assert split_on_silence(audio, SAMPLE_RATE) == [(0, len(audio))]
+
+
+def test_silent_audio():
+    assert split_on_silence(silence(5.0), SAMPLE_RATE) == []
+
+
+def test_short_speech_is_one_chunk():
+    audio = np.concatenate([silence(1.0), tone(3.0), silence(1.0)])
+
+    chunks = split_on_silence(audio, SAMPLE_RATE)
+
+    assert len(chunks) == 1
+    start, end = chunks[0]
+    # Speech plus at most half a pause of padding on each side
+    assert 0.8 * SAMPLE_RATE <= start <= 1.0 * SAMPLE_RATE
+    assert 4.0 * SAMPLE_RATE <= end <= 4.2 * SAMPLE_RATE
+
+
+def test_chunks_are_cut_in_pauses():
+    audio = np.concatenate([tone(4.0), silence(1.0), tone(4.0), silence(1.0), tone(4.0)])
+
+    chunks = split_on_silence(audio, SAMPLE_RATE, max_chunk_seconds=6.0)
+
+    assert len(chunks) == 3
+    assert_valid_chunks(chunks, len(audio), 6.0)
+    for (_, end), pause in zip(chunks, [4.0, 9.0]):
+        assert pause * SAMPLE_RATE <= end <= (pause + 1.0) * SAMPLE_RATE
+
+
+def test_speech_without_pauses_is_cut_at_the_quietest_frame():
+    audio = np.concatenate([tone(5.0), tone(0.2, amplitude=0.05), tone(5.0)])
+
+    chunks = split_on_silence(audio, SAMPLE_RATE, max_chunk_seconds=6.0)
+
+    assert len(chunks) == 2
+    assert_valid_chunks(chunks, len(audio), 6.0)
+    assert 5.0 * SAMPLE_RATE <= chunks[0][1] <= 5.2 * SAMPLE_RATE
+    assert chunks[-1][1] == len(audio)
+
+
+def test_trailing_partial_frame_is_not_a_chunk():
+    # 10 ms of speech after the last full frame must not produce a zero-length chunk
+    audio = np.concatenate([tone(2.0), silence(2.0), tone(0.01)])
+
+    chunks = split_on_silence(audio, SAMPLE_RATE)
+
+    assert len(chunks) == 1
+    assert_valid_chunks(chunks, len(audio), 29.5)
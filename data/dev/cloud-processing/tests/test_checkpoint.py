@@ -0,0 +1,122 @@
+import os
+import shutil
+import numpy as np
+import pyarrow.parquet as pq
+from checkpoint import ExtractionCheckpoint
+from landmark_extraction import LANDMARK_OFFSETS, LandmarkBlock, LandmarkParquetWriter
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+
+    def exists(self) -> bool:
+        return self.name in self.bucket.objects
+
+    def upload_from_filename(self, filename: str):
+        with open(filename, "rb") as f:
+            self.bucket.objects[self.name] = f.read()
+
+    def download_to_filename(self, filename: str):
+        with open(filename, "wb") as f:
+            f.write(self.bucket.objects[self.name])
+
+    def delete(self):
+        del self.bucket.objects[self.name]
+
+
+class FakeBucket:
+    """In-memory bucket, also standing in for its client when the checkpoint is cleared"""
+
+    def __init__(self):
+        self.objects = {}
+        self.client = self
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+    def list_blobs(self, bucket, prefix: str = None):
+        return [FakeBlob(self, name) for name in list(self.objects) if name.startswith(prefix or "")]
+
+
+def mirrored(local_dir, bucket: FakeBucket) -> ExtractionCheckpoint:
+    checkpoint = ExtractionCheckpoint(str(local_dir))
+    checkpoint._bucket = bucket
+    checkpoint._prefix = "checkpoints/row_000001"
+    return checkpoint
+
+
+def block(start: int, end: int) -> LandmarkBlock:
+    """Rows for frames [start, end) with the pose x of every frame set to its number"""
+    result = LandmarkBlock(capacity=end - start)
+    for frame in range(start, end):
+        result.append_skipped(frame)
+        result.data[len(result) - 1, LANDMARK_OFFSETS["pose"], 0] = frame
+    return result
+
+
+def extract(output_path: str, checkpoint: ExtractionCheckpoint, num_frames: int, row_group_frames: int, crash_after: int = None):
+    """Write row groups like extract_video_landmarks, resuming after the checkpointed frames"""
+    last_frame = checkpoint.restore()
+    start = 0 if last_frame is None else last_frame + 1
+    with LandmarkParquetWriter(output_path) as writer:
+        for part_path in checkpoint.part_paths("landmarks"):
+            writer.write_parquet(part_path)
+        for commits, group_start in enumerate(range(start, num_frames, row_group_frames)):
+            if crash_after is not None and commits == crash_after:
+                return
+            rows = block(group_start, min(group_start + row_group_frames, num_frames))
+            checkpoint.commit({"landmarks": writer.write_block(rows)}, rows.frames[len(rows) - 1])
+
+
+def test_nothing_to_resume(tmp_path):
+    assert ExtractionCheckpoint(str(tmp_path / "checkpoint")).restore() is None
+
+
+def test_resume_after_a_crash_writes_every_frame_once(tmp_path):
+    checkpoint_dir = str(tmp_path / "checkpoint")
+    extract(str(tmp_path / "partial.parquet"), ExtractionCheckpoint(checkpoint_dir), 50, 10, crash_after=3)
+
+    checkpoint = ExtractionCheckpoint(checkpoint_dir)
+    assert checkpoint.restore() == 29
+    extract(str(tmp_path / "out.parquet"), checkpoint, 50, 10)
+
+    table = pq.read_table(str(tmp_path / "out.parquet"))
+    assert table.column("frame").to_pylist() == list(range(50))
+    np.testing.assert_array_equal(table.column("pose-0-x").to_numpy(), np.arange(50))
+
+
+def test_clear_removes_the_checkpoint(tmp_path):
+    checkpoint = ExtractionCheckpoint(str(tmp_path / "checkpoint"))
+    extract(str(tmp_path / "out.parquet"), checkpoint, 20, 10)
+
+    checkpoint.clear()
+
+    assert not os.path.exists(tmp_path / "checkpoint")
+    assert checkpoint.part_paths("landmarks") == []
+
+
+def test_missing_local_part_starts_over(tmp_path):
+    checkpoint_dir = tmp_path / "checkpoint"
+    extract(str(tmp_path / "out.parquet"), ExtractionCheckpoint(str(checkpoint_dir)), 30, 10, crash_after=2)
+    os.remove(checkpoint_dir / "landmarks-00000.parquet")
+
+    checkpoint = ExtractionCheckpoint(str(checkpoint_dir))
+
+    assert checkpoint.restore() is None
+    assert os.listdir(checkpoint_dir) == []
+
+
+def test_preempted_worker_resumes_on_a_fresh_machine(tmp_path):
+    bucket = FakeBucket()
+    extract(str(tmp_path / "partial.parquet"), mirrored(tmp_path / "machine1", bucket), 40, 10, crash_after=2)
+    shutil.rmtree(tmp_path / "machine1")
+
+    checkpoint = mirrored(tmp_path / "machine2", bucket)
+    assert checkpoint.restore() == 19
+    extract(str(tmp_path / "out.parquet"), checkpoint, 40, 10)
+
+    assert pq.read_table(str(tmp_path / "out.parquet")).column("frame").to_pylist() == list(range(40))
+    checkpoint.clear()
+    assert bucket.objects == {}
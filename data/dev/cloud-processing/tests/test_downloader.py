@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import downloader
+
+DATA = bytes(range(256)) * 400
+
+
+class VideoHandler(BaseHTTPRequestHandler):
+    """Serves DATA with Range support, cut off after `truncate_at` bytes when set"""
+
+    truncate_at = None
+    honor_range = True
+    ranges = []
+
+    def do_GET(self):
+        header = self.headers.get("Range")
+        type(self).ranges.append(header)
+        start = int(header[len("bytes="):-1]) if header and self.honor_range else 0
+        if start >= len(DATA):
+            self.send_response(416)
+            self.end_headers()
+            return
+
+        if start:
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(DATA) - 1}/{len(DATA)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(DATA) - start))
+        self.end_headers()
+        end = len(DATA) if self.truncate_at is None else max(self.truncate_at, start)
+        self.wfile.write(DATA[start:end])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(downloader.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(VideoHandler, "truncate_at", None)
+    monkeypatch.setattr(VideoHandler, "honor_range", True)
+    monkeypatch.setattr(VideoHandler, "ranges", [])
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), VideoHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/video.webm"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_download(server, tmp_path):
+    path = str(tmp_path / "video.webm")
+
+    downloader.download(server, path, chunk_size=4096, sha256=hashlib.sha256(DATA).hexdigest())
+
+    assert read(path) == DATA
+    assert not os.path.exists(f"{path}.part")
+
+
+def test_partial_file_is_resumed_with_a_range_request(server, tmp_path):
+    path = str(tmp_path / "video.webm")
+    with open(f"{path}.part", "wb") as f:
+        f.write(DATA[:30000])
+
+    downloader.download(server, path)
+
+    assert VideoHandler.ranges == ["bytes=30000-"]
+    assert read(path) == DATA
+
+
+def test_server_ignoring_the_range_starts_over(server, tmp_path):
+    VideoHandler.honor_range = False
+    path = str(tmp_path / "video.webm")
+    with open(f"{path}.part", "wb") as f:
+        f.write(b"stale" * 100)
+
+    downloader.download(server, path)
+
+    assert read(path) == DATA
+
+
+def test_interrupted_download_resumes_on_the_next_attempt(server, tmp_path):
+    VideoHandler.truncate_at = 50000
+    path = str(tmp_path / "video.webm")
+
+    with pytest.raises(IOError):
+        downloader.download(server, path, chunk_size=4096, attempts=1)
+    assert not os.path.exists(path)
+    # The chunks written before the connection dropped are kept
+    kept = os.path.getsize(f"{path}.part")
+    assert 0 < kept <= 50000
+
+    VideoHandler.truncate_at = None
+    downloader.download(server, path)
+
+    assert VideoHandler.ranges[-1] == f"bytes={kept}-"
+    assert read(path) == DATA
+
+
+def test_failed_last_attempt_is_not_moved_into_place(server, tmp_path):
+    # Without expected_size the announced size is only known once a response arrives, the
+    # final attempt failing must not pass the partial file off as complete
+    VideoHandler.truncate_at = 0
+    path = str(tmp_path / "video.webm")
+
+    with pytest.raises(IOError):
+        downloader.download(server, path, attempts=2)
+
+    assert not os.path.exists(path)
+
+
+def test_checksum_mismatch_discards_the_file(server, tmp_path):
+    path = str(tmp_path / "video.webm")
+
+    with pytest.raises(IOError, match="Checksum"):
+        downloader.download(server, path, sha256="0" * 64)
+
+    assert not os.path.exists(path)
+    assert not os.path.exists(f"{path}.part")
+
+
+def test_fetch_takes_over_a_prefetched_download(server, tmp_path):
+    path = str(tmp_path / "video.webm")
+    downloader.prefetch(server).result()
+
+    downloader.fetch(server, path)
+
+    assert read(path) == DATA
+    assert len(VideoHandler.ranges) == 1
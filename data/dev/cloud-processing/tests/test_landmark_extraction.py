@@ -0,0 +1,148 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from landmark_extraction import (
+    EXPECTED_LANDMARKS,
+    LANDMARK_OFFSETS,
+    NUM_LANDMARKS,
+    FrameSampler,
+    LandmarkBlock,
+    interpolate_landmarks
+)
+
+
+def pose_results(value: float):
+    """Holistic results with every pose landmark at (value, value, value, 1) and nothing else detected"""
+    landmark = SimpleNamespace(x=value, y=value, z=value, visibility=1.0)
+    return SimpleNamespace(
+        pose_landmarks=SimpleNamespace(landmark=[landmark] * EXPECTED_LANDMARKS["pose"]),
+        face_landmarks=None,
+        left_hand_landmarks=None,
+        right_hand_landmarks=None
+    )
+
+
+def pose_x(block: LandmarkBlock) -> np.ndarray:
+    return block.data[:len(block), LANDMARK_OFFSETS["pose"], 0]
+
+
+def extract(processed: set, values: dict, num_frames: int, capacity: int = 4) -> LandmarkBlock:
+    """Run the sampling loop of extract_video_landmarks over a fixed set of processed frames"""
+    block = LandmarkBlock(capacity=capacity)
+    pending, previous_frame, previous_row = 0, None, None
+    for frame_number in range(num_frames):
+        if frame_number not in processed:
+            block.append_skipped(frame_number)
+            pending += 1
+            continue
+        block.append(frame_number, pose_results(values[frame_number]))
+        if pending:
+            block.fill_skipped(pending, previous_frame, previous_row)
+            pending = 0
+        previous_frame, previous_row = frame_number, block.data[len(block) - 1].copy()
+    if pending:
+        block.fill_skipped(pending, previous_frame, previous_row, trailing=True)
+    return block
+
+
+def test_interpolate_landmarks_is_linear():
+    previous = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    following = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    previous[0] = 1.0
+    following[0] = 3.0
+
+    rows = interpolate_landmarks(previous, following, np.array([0.0, 0.5, 1.0], dtype=np.float32))
+
+    assert rows.shape == (3, NUM_LANDMARKS, 4)
+    np.testing.assert_allclose(rows[:, 0, 0], [1.0, 2.0, 3.0])
+
+
+def test_interpolate_landmarks_holds_landmarks_missing_on_either_side():
+    previous = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    following = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    # Landmark 0 disappears, landmark 1 appears, neither is interpolated
+    previous[0] = 1.0
+    following[1] = 1.0
+
+    rows = interpolate_landmarks(previous, following, np.array([0.5], dtype=np.float32))
+
+    np.testing.assert_array_equal(rows[0, 0], previous[0])
+    np.testing.assert_array_equal(rows[0, 1], previous[1])
+
+
+def test_interpolate_landmarks_without_weights():
+    row = np.ones((NUM_LANDMARKS, 4), dtype=np.float32)
+    assert interpolate_landmarks(row, row, np.zeros(0, dtype=np.float32)).shape == (0, NUM_LANDMARKS, 4)
+
+
+@pytest.mark.parametrize("mode", ["stride", "motion"])
+def test_sampler_always_processes_the_first_frame(mode):
+    sampler = FrameSampler(mode=mode, stride=5, motion_threshold=1.0)
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    assert sampler.should_process(image)
+    assert not sampler.should_process(image)
+
+
+def test_stride_sampler_pattern():
+    sampler = FrameSampler(mode="stride", stride=3)
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    decisions = [sampler.should_process(image) for _ in range(7)]
+
+    assert decisions == [True, False, False, True, False, False, True]
+    assert (sampler.processed, sampler.skipped) == (3, 4)
+
+
+def test_motion_sampler_respects_max_gap():
+    sampler = FrameSampler(mode="motion", motion_threshold=1.0, max_gap=2)
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    decisions = [sampler.should_process(image) for _ in range(7)]
+
+    assert decisions == [True, False, False, True, False, False, True]
+
+
+def test_skipped_frames_between_processed_frames_are_interpolated():
+    block = extract(processed={0, 3, 6}, values={0: 0.0, 3: 0.3, 6: 0.9}, num_frames=7)
+
+    np.testing.assert_allclose(pose_x(block), [0.0, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9], atol=1e-6)
+    np.testing.assert_array_equal(block.frames[:len(block)], np.arange(7))
+    assert block.skipped[:len(block)].tolist() == [False, True, True, False, True, True, False]
+
+
+def test_trailing_skipped_frames_hold_the_last_processed_frame():
+    block = extract(processed={0, 2}, values={0: 0.2, 2: 0.4}, num_frames=5)
+
+    np.testing.assert_allclose(pose_x(block), [0.2, 0.3, 0.4, 0.4, 0.4], atol=1e-6)
+    # Only the pose is detected, the filled rows keep the other landmarks empty
+    assert not block.data[3, LANDMARK_OFFSETS["face"]:].any()
+
+
+def test_interpolation_after_a_flushed_row_group():
+    block = extract(processed={0}, values={0: 1.0}, num_frames=1)
+    previous_row = block.data[0].copy()
+    block.clear()
+
+    # The next row group starts with skipped frames whose left neighbour was already written
+    block.append_skipped(1)
+    block.append(2, pose_results(3.0))
+    block.fill_skipped(1, 0, previous_row)
+
+    np.testing.assert_allclose(pose_x(block), [2.0, 3.0], atol=1e-6)
+
+
+def test_block_grows_past_its_capacity():
+    block = extract(processed=set(range(0, 10, 3)), values={i: float(i) for i in range(10)}, num_frames=10, capacity=1)
+
+    assert len(block) == 10
+    np.testing.assert_allclose(pose_x(block), [0, 1, 2, 3, 4, 5, 6, 7, 8, 9], atol=1e-5)
+
+
+def test_to_table_includes_the_skipped_column():
+    block = extract(processed={0, 2}, values={0: 0.0, 2: 1.0}, num_frames=3)
+
+    table = block.to_table(skipped_column=True)
+
+    assert table.column_names[:2] == ["frame", "skipped"]
+    assert table.column("skipped").to_pylist() == [False, True, False]
+    assert table.num_rows == 3
@@ -0,0 +1,45 @@
+import numpy as np
+from length_bucketing import LengthBucketBatchSampler, padding_ratio, random_batches
+
+
+def test_every_example_is_batched_once():
+    lengths = np.random.default_rng(0).integers(10, 500, size=257)
+    sampler = LengthBucketBatchSampler(lengths, max_frames=2000, pool_batches=4)
+
+    indices = sorted(index for batch in sampler for index in batch)
+
+    assert indices == list(range(len(lengths)))
+
+
+def test_batches_stay_within_the_frame_budget():
+    lengths = np.random.default_rng(1).integers(10, 500, size=200)
+    sampler = LengthBucketBatchSampler(lengths, max_frames=2000, max_batch_size=8)
+
+    for batch in sampler:
+        assert len(batch) <= 8
+        assert len(batch) * lengths[batch].max() <= 2000
+
+
+def test_example_longer_than_the_budget_gets_its_own_batch():
+    sampler = LengthBucketBatchSampler([10, 5000, 20], max_frames=100, shuffle=False)
+    assert [1] in sampler.batches()
+
+
+def test_epochs_change_the_order():
+    sampler = LengthBucketBatchSampler(np.arange(1, 101), max_frames=200)
+    first = sampler.batches()
+    sampler.set_epoch(1)
+    assert sampler.batches() != first
+
+
+def test_no_examples():
+    sampler = LengthBucketBatchSampler([], max_frames=100)
+    assert len(sampler) == 0
+    assert padding_ratio([], []) == 0.0
+
+
+def test_bucketing_pads_less_than_random_batches():
+    lengths = np.random.default_rng(2).integers(10, 500, size=1000)
+    sampler = LengthBucketBatchSampler(lengths, max_frames=4000)
+
+    assert padding_ratio(lengths, sampler.batches()) < padding_ratio(lengths, random_batches(len(lengths), 16))
@@ -0,0 +1,96 @@
+import os
+import numpy as np
+from transcript_cache import TranscriptCache, transcript_key
+
+SEGMENTS = [{"start": 0.0, "end": 1.5, "text": " Guten Abend", "words": []}]
+
+
+class FakeBlob:
+    def __init__(self, objects: dict, name: str):
+        self.objects = objects
+        self.name = name
+
+    def exists(self) -> bool:
+        return self.name in self.objects
+
+    def download_as_bytes(self) -> bytes:
+        self.objects["downloads"] = self.objects.get("downloads", 0) + 1
+        return self.objects[self.name]
+
+    def upload_from_string(self, data, content_type: str = None):
+        self.objects[self.name] = data
+
+
+class FakeBucket:
+    def __init__(self):
+        self.objects = {}
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self.objects, name)
+
+
+def bucket_cache(local_dir, bucket: FakeBucket, **kwargs) -> TranscriptCache:
+    """Cache with the given local tier in front of an in-memory bucket"""
+    cache = TranscriptCache(str(local_dir), **kwargs)
+    cache._bucket = bucket
+    cache._prefix = "transcript-cache"
+    return cache
+
+
+def test_key_depends_on_audio_model_and_options():
+    audio = np.zeros(16000, dtype=np.float32)
+    key = transcript_key(audio, "large-v3", {"language": "de", "batch_size": None})
+
+    assert key == transcript_key(audio.astype(np.float64), "large-v3", {"batch_size": None, "language": "de"})
+    assert key != transcript_key(audio[:-1], "large-v3", {"language": "de", "batch_size": None})
+    assert key != transcript_key(audio, "medium", {"language": "de", "batch_size": None})
+    assert key != transcript_key(audio, "large-v3", {"language": "de", "batch_size": 8})
+
+
+def test_miss_then_hit(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+
+    assert cache.get("a") is None
+    cache.put("a", SEGMENTS)
+    assert cache.get("a") == SEGMENTS
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    with open(tmp_path / "a.json", "w") as f:
+        f.write("[{")
+
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    size = len(b'[{"start": 0.0, "end": 1.5, "text": " Guten Abend", "words": []}]')
+    cache = TranscriptCache(str(tmp_path), max_bytes=2 * size)
+    cache.put("a", SEGMENTS)
+    cache.put("b", SEGMENTS)
+    # Reading a makes b the least recently used entry
+    os.utime(tmp_path / "a.json", (1, 1))
+    os.utime(tmp_path / "b.json", (2, 2))
+    cache.get("a")
+
+    cache.put("c", SEGMENTS)
+
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "c.json"]
+
+
+def test_bucket_hits_are_kept_locally(tmp_path):
+    bucket = FakeBucket()
+    bucket_cache(tmp_path / "worker1", bucket).put("a", SEGMENTS)
+    assert "transcript-cache/a.json" in bucket.objects
+
+    # Another worker finds it in the bucket once, then in its local directory
+    cache = bucket_cache(tmp_path / "worker2", bucket)
+    assert cache.get("a") == SEGMENTS
+    assert cache.get("a") == SEGMENTS
+    assert bucket.objects["downloads"] == 1
+    assert os.listdir(tmp_path / "worker2") == ["a.json"]
+
+
+def test_bucket_miss(tmp_path):
+    cache = bucket_cache(tmp_path, FakeBucket())
+    assert cache.get("a") is None
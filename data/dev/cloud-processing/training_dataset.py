@@ -0,0 +1,265 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from alignment import align_files
+
+INDEX_FILE = "index.json"
+EXAMPLES_FILE = "examples.parquet"
+
+# Columns of the landmark parquet that are not landmark features
+NON_FEATURE_COLUMNS = ("frame", "skipped")
+
+# Target size of the feature array of one shard
+DEFAULT_SHARD_BYTES = 256 * 1024 ** 2
+
+
+def whisper_tokenizer(language: str = "de"):
+    """Encode text with the multilingual Whisper tokenizer, matching the Whisper-based model."""
+    from whisper.tokenizer import get_tokenizer
+    tokenizer = get_tokenizer(multilingual=True, language=language, task="transcribe")
+    return tokenizer.encode
+
+
+def _shard_file(shard: int, name: str) -> str:
+    return f"shard-{shard:05d}.{name}.npy"
+
+
+class TrainingShardWriter:
+    """
+    Packs aligned (landmark sequence, text) examples into fixed-size shards.
+
+    Every shard is a set of .npy files: the landmark frames of all its examples as one
+    contiguous (frames, features) array, the token ids as one contiguous int32 array and
+    the offsets of every example into both. index.json describes the shards and
+    examples.parquet holds one row per example (text, source, lengths), which doubles as
+    the length index for batching.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        feature_columns: list,
+        dtype: str = "float16",
+        shard_bytes: int = DEFAULT_SHARD_BYTES,
+        tokenize=None
+    ):
+        """
+        Args:
+            output_dir: Directory the shards are written to
+            feature_columns: Landmark column names, in the order of the feature axis
+            dtype: "float16" halves the size and read time, "float32" keeps full precision
+            shard_bytes: A shard is closed once its feature array reaches this size
+            tokenize: Callable turning text into token ids, defaults to whisper_tokenizer()
+        """
+        self.output_dir = output_dir
+        self.feature_columns = list(feature_columns)
+        self.dtype = np.dtype(dtype)
+        self.shard_bytes = shard_bytes
+        self.tokenize = tokenize or whisper_tokenizer()
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.shards = []
+        self.examples = []
+        self._features = []
+        self._tokens = []
+        self._shard_frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, features: np.ndarray, text: str, **info):
+        """
+        Add one example.
+
+        Args:
+            features: (frames, features) landmark array of the example
+            text: Transcript text of the example
+            **info: Extra per-example values stored in examples.parquet, e.g. video_id
+        """
+        features = np.asarray(features, dtype=self.dtype)
+        if features.ndim != 2 or features.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected features of shape (frames, {len(self.feature_columns)}), got {features.shape}")
+
+        tokens = np.asarray(self.tokenize(text), dtype=np.int32)
+        self.examples.append({
+            "shard": len(self.shards),
+            "index": len(self._features),
+            "num_frames": len(features),
+            "num_tokens": len(tokens),
+            "text": text,
+            **info
+        })
+        self._features.append(features)
+        self._tokens.append(tokens)
+        self._shard_frames += len(features)
+
+        if self._shard_frames * features.shape[1] * self.dtype.itemsize >= self.shard_bytes:
+            self.flush()
+
+    def flush(self):
+        """Write the pending examples as one shard."""
+        if not self._features:
+            return
+
+        shard = len(self.shards)
+        frame_offsets = np.zeros(len(self._features) + 1, dtype=np.int64)
+        np.cumsum([len(features) for features in self._features], out=frame_offsets[1:])
+        token_offsets = np.zeros(len(self._tokens) + 1, dtype=np.int64)
+        np.cumsum([len(tokens) for tokens in self._tokens], out=token_offsets[1:])
+
+        arrays = {
+            "features": np.concatenate(self._features).reshape(-1, len(self.feature_columns)),
+            "offsets": frame_offsets,
+            "tokens": np.concatenate(self._tokens) if self._tokens else np.zeros(0, dtype=np.int32),
+            "token_offsets": token_offsets
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(self.output_dir, _shard_file(shard, name)), array)
+
+        self.shards.append({"examples": len(self._features), "frames": int(frame_offsets[-1])})
+        print(f"Wrote shard {shard}: {len(self._features)} examples, {frame_offsets[-1]} frames")
+        self._features, self._tokens = [], []
+        self._shard_frames = 0
+
+    def close(self):
+        """Write the last shard, the example table and the index."""
+        self.flush()
+        pq.write_table(pa.Table.from_pandas(pd.DataFrame(self.examples), preserve_index=False),
+                       os.path.join(self.output_dir, EXAMPLES_FILE))
+        with open(os.path.join(self.output_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "dtype": self.dtype.name,
+                "feature_columns": self.feature_columns,
+                "shards": self.shards,
+                "num_examples": len(self.examples)
+            }, f)
+
+
+def build_training_shards(
+    videos: dict,
+    output_dir: str,
+    columns: list = None,
+    level: str = "segment",
+    dtype: str = "float16",
+    shard_bytes: int = DEFAULT_SHARD_BYTES,
+    tokenize=None,
+    **align_options
+) -> str:
+    """
+    Align landmark parquet files with their transcripts and pack the examples into shards.
+
+    Args:
+        videos: {video_id: (landmark_path, transcript_path)}
+        output_dir: Directory the shards are written to
+        columns: Landmark columns used as features, defaults to all of them
+        level: "segment" or "word", see alignment.transcript_spans
+        dtype: Feature dtype of the shards
+        shard_bytes: Target size of the feature array of one shard
+        tokenize: Callable turning text into token ids, defaults to whisper_tokenizer()
+        **align_options: Passed on to alignment.align_files, e.g. cut_times or min_frames
+
+    Returns:
+        str: output_dir
+    """
+    writer = None
+    for video_id, (landmark_path, transcript_path) in videos.items():
+        examples = align_files(landmark_path, transcript_path, level=level, **align_options)
+        if not len(examples):
+            continue
+
+        schema = pq.read_schema(landmark_path)
+        feature_columns = columns or [name for name in schema.names if name not in NON_FEATURE_COLUMNS]
+        if writer is None:
+            writer = TrainingShardWriter(output_dir, feature_columns, dtype=dtype, shard_bytes=shard_bytes, tokenize=tokenize)
+        elif feature_columns != writer.feature_columns:
+            raise ValueError(f"Landmark columns of {landmark_path} differ from the first video")
+
+        # One (frames, features) array per video, examples are slices of it
+        table = pq.read_table(landmark_path, columns=feature_columns)
+        features = np.empty((table.num_rows, len(feature_columns)), dtype=writer.dtype)
+        for position, column in enumerate(table.columns):
+            features[:, position] = column.to_numpy()
+
+        for example in examples.to_pylist():
+            writer.add(
+                features[example["row_start"]:example["row_end"]],
+                example["text"],
+                video_id=video_id,
+                start_frame=example["start_frame"],
+                end_frame=example["end_frame"]
+            )
+
+    if writer is None:
+        raise ValueError("No aligned examples found")
+    writer.close()
+    return output_dir
+
+
+class TrainingShards:
+    """
+    Zero-copy random access to shards written by TrainingShardWriter.
+
+    Shards are memory-mapped on first use, an example is a view into the mapped arrays,
+    so only the pages that are read are loaded. Works as a map-style dataset for a
+    PyTorch DataLoader; mapped arrays are not pickled, every worker maps its own.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Directory written by TrainingShardWriter
+        """
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.examples = pq.read_table(os.path.join(path, EXAMPLES_FILE)).to_pandas()
+        self.feature_columns = self.index["feature_columns"]
+
+        # Global example index -> (shard, index within shard)
+        self._shard_starts = np.cumsum([0] + [shard["examples"] for shard in self.index["shards"]])
+        self._shards = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        return state
+
+    def __len__(self) -> int:
+        return int(self._shard_starts[-1])
+
+    def _shard(self, shard: int) -> dict:
+        if shard not in self._shards:
+            self._shards[shard] = {
+                name: np.load(os.path.join(self.path, _shard_file(shard, name)), mmap_mode="r")
+                for name in ("features", "offsets", "tokens", "token_offsets")
+            }
+        return self._shards[shard]
+
+    def lengths(self) -> np.ndarray:
+        """Number of frames of every example, e.g. for length-bucketed batching."""
+        return self.examples["num_frames"].to_numpy()
+
+    def __getitem__(self, index: int) -> dict:
+        """
+        Returns:
+            dict: "features" (frames, features) and "tokens" arrays, both views into the shard
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Example {index} out of range for {len(self)} examples")
+
+        shard = int(np.searchsorted(self._shard_starts, index, side="right")) - 1
+        local = index - self._shard_starts[shard]
+        arrays = self._shard(shard)
+        offsets, token_offsets = arrays["offsets"], arrays["token_offsets"]
+        return {
+            "features": arrays["features"][offsets[local]:offsets[local + 1]],
+            "tokens": arrays["tokens"][token_offsets[local]:token_offsets[local + 1]]
+        }
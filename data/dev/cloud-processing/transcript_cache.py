@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# Bound of the local cache directory, least recently used transcripts are evicted beyond it
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Local tier in front of a bucket location, overridden by $TRANSCRIPT_CACHE_DIR
+LOCAL_DIR_ENV = "TRANSCRIPT_CACHE_DIR"
+DEFAULT_LOCAL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "transcripts")
+
+
+def transcript_key(audio: np.ndarray, model_name: str, options: dict = None) -> str:
+    """
+    Content address of a transcript.
+
+    Hashes the decoded samples rather than the video file, so re-encoded or renamed
+    copies of the same broadcast share an entry, while a different model or different
+    options that change the output get their own.
+
+    Args:
+        audio: Decoded mono float32 samples, see audio.load_audio
+        model_name: Whisper model name
+        options: Transcription options that affect the result, e.g. language and batch size
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+    digest.update(json.dumps({"model": model_name, **(options or {})}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """
+    Transcript segments stored under their content address.
+
+    The location is either a local directory or a gs://bucket/prefix shared by every
+    worker, which is left to the bucket's lifecycle rules. A bucket location gets a local
+    directory in front of it, so a worker serves the transcripts it has seen before without
+    a bucket request. The local directory is bounded to max_bytes by evicting the least
+    recently used entries.
+    """
+
+    def __init__(self, location: str, max_bytes: int = DEFAULT_MAX_BYTES, local_dir: str = None):
+        """
+        Args:
+            location: Local directory or gs://bucket/prefix
+            max_bytes: Size bound of the local directory, None disables eviction
+            local_dir: Local tier of a bucket location, defaults to $TRANSCRIPT_CACHE_DIR
+                or ~/.cache/transcripts. Ignored for a local location
+        """
+        self.location = location.rstrip("/")
+        self.max_bytes = max_bytes
+
+        self._bucket = None
+        self._prefix = ""
+        self.local_dir = self.location
+        if self.location.startswith("gs://"):
+            from google.cloud import storage
+            bucket_name, _, self._prefix = self.location[len("gs://"):].partition("/")
+            self._bucket = storage.Client().bucket(bucket_name)
+            self.local_dir = local_dir or os.environ.get(LOCAL_DIR_ENV) or DEFAULT_LOCAL_DIR
+        os.makedirs(self.local_dir, exist_ok=True)
+
+    def _name(self, key: str) -> str:
+        return f"{key}.json"
+
+    def _blob(self, key: str):
+        return self._bucket.blob(f"{self._prefix}/{self._name(key)}" if self._prefix else self._name(key))
+
+    def _local_path(self, key: str) -> str:
+        return os.path.join(self.local_dir, self._name(key))
+
+    def _get_local(self, key: str):
+        path = self._local_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                segments = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Mark as recently used for eviction
+        os.utime(path)
+        return segments
+
+    def _put_local(self, key: str, data: bytes):
+        # Written under a temporary name first so concurrent readers never see a partial file
+        path = self._local_path(key)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{path}.tmp", path)
+        self.evict()
+
+    def get(self, key: str):
+        """
+        Look up a transcript, in the local directory first.
+
+        Returns:
+            list: Cached segments, or None on a miss
+        """
+        segments = self._get_local(key)
+        if segments is not None or self._bucket is None:
+            return segments
+
+        blob = self._blob(key)
+        if not blob.exists():
+            return None
+        data = blob.download_as_bytes()
+        self._put_local(key, data)
+        return json.loads(data)
+
+    def put(self, key: str, segments: list):
+        """Store the segments of a transcript locally and in the bucket."""
+        data = json.dumps(segments, ensure_ascii=False).encode("utf-8")
+        if self._bucket is not None:
+            self._blob(key).upload_from_string(data, content_type="application/json")
+        self._put_local(key, data)
+
+    def evict(self):
+        """Delete the least recently used local entries until the directory fits into max_bytes."""
+        if self.max_bytes is None:
+            return
+
+        entries = []
+        for entry in os.scandir(self.local_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,199 @@
+import json
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from audio import WHISPER_SAMPLE_RATE, load_audio
+from batched_whisper import transcribe_batched
+from transcript_cache import TranscriptCache, transcript_key
+from whisper_models import load_whisper_model
+
+# Long-lived transcription process, kept across videos so its Whisper model cache survives
+_POOL = None
+_POOL_CPUS = None
+
+
+def available_cpus() -> list:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpus(transcription_cpus: int = None):
+    """
+    Split the available CPUs between the transcription and the landmark branch.
+
+    Args:
+        transcription_cpus: CPUs given to transcription, None gives it half of them
+
+    Returns:
+        tuple: (transcription CPUs, landmark CPUs), both get every CPU on a single-core machine
+    """
+    cpus = available_cpus()
+    if len(cpus) < 2:
+        return cpus, cpus
+    if transcription_cpus is None:
+        transcription_cpus = len(cpus) // 2
+    transcription_cpus = min(max(int(transcription_cpus), 1), len(cpus) - 1)
+    return cpus[:transcription_cpus], cpus[transcription_cpus:]
+
+
+def _pin_to_cpus(cpus):
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def _init_transcription_worker(cpus):
+    _pin_to_cpus(cpus)
+    if cpus:
+        import torch
+        torch.set_num_threads(len(cpus))
+
+
+@contextmanager
+def cpu_affinity(cpus):
+    """Pin this process (and the processes it starts) to the given CPUs for the duration of the block."""
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        yield
+        return
+
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+def transcribe_video(
+    video_path: str,
+    output_path: str,
+    model_name: str = "large-v3",
+    cache_dir: str = None,
+    language: str = "de",
+    batch_size: int = None,
+    transcript_cache: str = None
+) -> str:
+    """
+    Transcribe the audio track of a video with word-level timestamps and save the segments as JSON.
+
+    The audio is decoded straight into memory, if it cannot be decoded an empty transcript is written.
+    With a transcript_cache, audio that was transcribed before with the same model and
+    options is served from the cache without loading Whisper.
+
+    Args:
+        video_path: Path to the video file
+        output_path: Path of the transcript JSON file
+        model_name: Whisper model name, see whisper_models.load_whisper_model
+        cache_dir: Local Whisper checkpoint cache
+        language: Spoken language passed to Whisper
+        batch_size: Split the audio at pauses and decode this many chunks per forward pass,
+            see batched_whisper.transcribe_batched. None uses Whisper's sequential transcribe
+        transcript_cache: Local directory or gs://bucket/prefix of a transcript_cache.TranscriptCache
+
+    Returns:
+        str: Path to the transcript JSON file
+    """
+    try:
+        audio = load_audio(video_path)
+        print(f"Audio extracted successfully ({len(audio) / WHISPER_SAMPLE_RATE:.0f}s)")
+    except subprocess.CalledProcessError as e:
+        print(f"Warning: Audio extraction failed: {e}")
+        # Create empty transcript file
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump([], f)
+        return output_path
+
+    cache = None
+    segments = None
+    if transcript_cache:
+        cache = TranscriptCache(transcript_cache)
+        key = transcript_key(audio, model_name, {"language": language, "batch_size": batch_size})
+        segments = cache.get(key)
+        print(f"Transcript cache {'hit' if segments is not None else 'miss'}: {key[:12]}")
+
+    if segments is None:
+        # Load Whisper model, cached for the following videos handled by this process
+        model = load_whisper_model(model_name, cache_dir=cache_dir)
+
+        # Transcribe audio with word-level timestamps
+        if batch_size:
+            result = transcribe_batched(model, audio, language=language, batch_size=batch_size)
+        else:
+            result = model.transcribe(
+                audio,
+                language=language,
+                word_timestamps=True  # Enable word-level timestamps
+            )
+        segments = result.get("segments", [])
+        if cache is not None:
+            cache.put(key, segments)
+
+    # Save word segments to JSON
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(segments, f, ensure_ascii=False, indent=2)
+
+    print(f"Saved transcript: {output_path}")
+    return output_path
+
+
+def transcription_pool(cpus=None) -> ProcessPoolExecutor:
+    """
+    Get the single-process transcription pool, started on first use and reused across videos.
+
+    Args:
+        cpus: CPUs the transcription process is pinned to, its torch thread count matches
+    """
+    global _POOL, _POOL_CPUS
+    cpus = list(cpus) if cpus else None
+    if _POOL is not None and cpus != _POOL_CPUS:
+        _POOL.shutdown()
+        _POOL = None
+
+    if _POOL is None:
+        # spawn keeps the worker independent of the parent's MediaPipe and torch state
+        _POOL = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_transcription_worker,
+            initargs=(cpus,)
+        )
+        _POOL_CPUS = cpus
+    return _POOL
+
+
+def submit_transcription(video_path: str, output_path: str, cpus=None, **kwargs):
+    """
+    Start transcribe_video in the transcription process.
+
+    Args:
+        video_path: Path to the video file
+        output_path: Path of the transcript JSON file
+        cpus: CPUs reserved for transcription, see split_cpus
+        **kwargs: Passed on to transcribe_video
+
+    Returns:
+        concurrent.futures.Future: Resolves to the transcript path
+    """
+    return transcription_pool(cpus).submit(transcribe_video, video_path, output_path, **kwargs)
+
+
+def cancel_transcription(future):
+    """
+    Stop a submitted transcription without waiting for it, e.g. after the landmark branch failed.
+
+    A queued transcription is cancelled. A running one is stopped by terminating the
+    transcription process, the next submit_transcription starts a new one.
+    """
+    global _POOL, _POOL_CPUS
+    if future.cancel() or future.done():
+        return
+    pool, _POOL, _POOL_CPUS = _POOL, None, None
+    if pool is None:
+        return
+    # ProcessPoolExecutor has no public way to stop a running call
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
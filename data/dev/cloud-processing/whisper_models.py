@@ -0,0 +1,91 @@
+import os
+import time
+
+# Loaded models keyed by (model name, device), shared by every call in this process
+_MODELS = {}
+_STATS = {"hits": 0, "misses": 0, "load_seconds": 0.0}
+
+
+def _default_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _load_memory_mapped(name: str, cache_dir: str):
+    """Load an official Whisper checkpoint for CPU decoding from the memory-mapped local cache."""
+    import torch
+    import whisper
+    from whisper.model import ModelDimensions, Whisper
+
+    # Downloads (and checksums) the checkpoint once, later calls reuse the cached file
+    checkpoint_path = whisper._download(whisper._MODELS[name], cache_dir, False)
+    checkpoint = torch.load(checkpoint_path, map_location="cpu", mmap=True, weights_only=True)
+
+    model = Whisper(ModelDimensions(**checkpoint["dims"]))
+    # The official checkpoints store fp16 weights, they are copied page by page into the fp32
+    # parameters CPU decoding (fp16=False) needs, like whisper.load_model does
+    model.load_state_dict(checkpoint["model_state_dict"])
+    model.set_alignment_heads(whisper._ALIGNMENT_HEADS[name])
+    return model
+
+
+def load_whisper_model(name: str = "large-v3", device: str = None, cache_dir: str = None, mmap: bool = True):
+    """
+    Get a Whisper model, loading it only on the first call per process.
+
+    CloudProcessor jobs call the processing function once per input file in the same
+    process, so the weights are loaded once per worker instead of once per video.
+
+    Args:
+        name: Whisper model name, e.g. "large-v3", or a path to a checkpoint
+        device: Torch device, defaults to CUDA when available
+        cache_dir: Directory the checkpoint is downloaded to and loaded from, defaults to
+            $WHISPER_CACHE_DIR or Whisper's own cache (~/.cache/whisper)
+        mmap: Memory-map the cached checkpoint instead of reading it into memory first, on CPU
+            only since moving the weights to a GPU copies them anyway. Falls back to
+            whisper.load_model for custom checkpoints, legacy checkpoint files or older torch versions
+
+    Returns:
+        whisper.model.Whisper: The cached model
+    """
+    import whisper
+
+    device = device or _default_device()
+    key = (name, device)
+    if key in _MODELS:
+        _STATS["hits"] += 1
+        print(f"Whisper model cache hit: {name} on {device} (hits {_STATS['hits']}, misses {_STATS['misses']})")
+        return _MODELS[key]
+
+    _STATS["misses"] += 1
+    cache_dir = cache_dir or os.environ.get("WHISPER_CACHE_DIR")
+    start = time.perf_counter()
+
+    model = None
+    if mmap and device == "cpu" and name in whisper._MODELS:
+        try:
+            model = _load_memory_mapped(name, cache_dir or os.path.join(os.path.expanduser("~"), ".cache", "whisper"))
+        except (TypeError, RuntimeError) as e:
+            # torch.load(mmap=...) needs torch >= 2.1 (TypeError) and a zip-format checkpoint (RuntimeError)
+            print(f"Memory-mapped Whisper loading unavailable ({e}), loading normally")
+    if model is None:
+        model = whisper.load_model(name, device=device, download_root=cache_dir)
+
+    load_seconds = time.perf_counter() - start
+    _STATS["load_seconds"] += load_seconds
+    _MODELS[key] = model
+    print(
+        f"Whisper model cache miss: loaded {name} on {device} in {load_seconds:.1f}s "
+        f"(hits {_STATS['hits']}, misses {_STATS['misses']})"
+    )
+    return model
+
+
+def whisper_cache_stats() -> dict:
+    """Hit and miss counts and total load time of the process-wide model cache."""
+    return {**_STATS, "models": [f"{name}@{device}" for name, device in _MODELS]}
+
+
+def clear_whisper_models():
+    """Drop the cached models, e.g. to free GPU memory between jobs."""
+    _MODELS.clear()
@@ -1,34 +1,32 @@
-import pandas as pd
-import requests
+import csv
 import mediapipe as mp
 import cv2
 import os
-import json
-from natsort import natsorted
-
-# Function to download a file from a URL
+import sys
+from itertools import islice
+
+# Share the landmark extraction core with the cloud processing pipeline
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cloud-processing"))
+from landmark_extraction import LandmarkBlock, LandmarkParquetWriter
+from frame_source import RIGHT_HALF, open_frame_source
+from interpreter_region import estimate_interpreter_region
+from checkpoint import ExtractionCheckpoint
+from downloader import download
+
+# Function to download a file from a URL, in large chunks and resuming after interruptions
 def download_file(url, file_name):
-    response = requests.get(url, stream=True)
-    if response.status_code == 200:
-        with open(file_name, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=1024):
-                if chunk:
-                    file.write(chunk)
-        print(f"Downloaded {file_name}")
-    else:
-        print(f"Failed to download {file_name}. Status code: {response.status_code}")
-
-# Define expected number of landmarks for each type
-EXPECTED_LANDMARKS = {
-    'pose': 33,
-    'face': 468,
-    'left_hand': 21,
-    'right_hand': 21
-}
+    download(url, file_name)
+    print(f"Downloaded {file_name}")
 
 # Define batch size for processing
 BATCH_SIZE = 1000  # Adjust this based on your available memory
 
+# Frame decoder: 'opencv' decodes full frames, 'ffmpeg' crops to the interpreter before converting
+DECODER = 'opencv'
+
+# Detect the interpreter box with a cheap pose pass instead of cropping the right half
+AUTO_REGION = False
+
 # Landmark definitions
 # Silhouette/face contour
 silhouette = [
@@ -113,66 +111,15 @@ all_facial_landmarks = (
 all_facial_landmarks = list(dict.fromkeys(all_facial_landmarks))
 pose_landmarks = [11, 12, 13, 14, 15, 16, 23, 24]
 
-def create_landmark_column_filters(facial_landmarks, pose_landmarks):
-    """
-    Create column selectors for facial and pose landmarks from the given indices.
+def process_batch(start_frame, end_frame, frames, holistic, video_file_name):
     """
-    columns_to_select = []
-    
-    for landmark in facial_landmarks:
-        columns_to_select.extend([
-            f'face-{landmark}-visibility',
-            f'face-{landmark}-x',
-            f'face-{landmark}-y',
-            f'face-{landmark}-z'
-        ])
+    Process a batch of frames and return the landmark data as a LandmarkBlock.
     
-    for landmark in pose_landmarks:
-        columns_to_select.extend([
-            f'pose-{landmark}-visibility',
-            f'pose-{landmark}-x',
-            f'pose-{landmark}-y',
-            f'pose-{landmark}-z'
-        ])
-    
-    return columns_to_select
-
-def filter_landmarks_df(df, facial_landmarks, pose_landmarks):
+    `frames` is the iterator of a frame source, positioned at start_frame.
     """
-    Filter the DataFrame to include only the specified landmarks.
-    """
-    columns = create_landmark_column_filters(facial_landmarks, pose_landmarks)
-    return df[columns]
-
-def process_batch(start_frame, end_frame, cap, holistic, video_file_name):
-    """
-    Process a batch of frames and return the landmark data.
-    """
-    frame_data = {}
-    frame_count = start_frame - 1
+    block = LandmarkBlock(capacity=end_frame - start_frame)
     
-    while frame_count < end_frame and cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-            
-        frame_count += 1
-        
-        # Initialize frame data dictionary with zeros
-        current_frame_data = {'frame': frame_count}
-        
-        for landmark_type, num_landmarks in EXPECTED_LANDMARKS.items():
-            for idx in range(num_landmarks):
-                current_frame_data[f'{landmark_type}-{idx}-x'] = 0
-                current_frame_data[f'{landmark_type}-{idx}-y'] = 0
-                current_frame_data[f'{landmark_type}-{idx}-z'] = 0
-                current_frame_data[f'{landmark_type}-{idx}-visibility'] = 0
-        
-        # Get frame dimensions and crop
-        height, width, _ = frame.shape
-        right_half = frame[:, width // 2:]
-        image = cv2.cvtColor(right_half, cv2.COLOR_BGR2RGB)
-        
+    for frame_count, image in islice(frames, end_frame - start_frame):
         # Process frame
         results = holistic.process(image)
         
@@ -195,67 +142,28 @@ def process_batch(start_frame, end_frame, cap, holistic, video_file_name):
             output_path = os.path.join('output_frames', f'frame_{frame_count}.jpg')
             cv2.imwrite(output_path, image)
         
-        # Update landmarks when detected
-        if results.pose_landmarks:
-            for idx, landmark in enumerate(results.pose_landmarks.landmark):
-                current_frame_data[f'pose-{idx}-x'] = landmark.x
-                current_frame_data[f'pose-{idx}-y'] = landmark.y
-                current_frame_data[f'pose-{idx}-z'] = landmark.z
-                current_frame_data[f'pose-{idx}-visibility'] = landmark.visibility
-        
-        if results.face_landmarks:
-            for idx, landmark in enumerate(results.face_landmarks.landmark):
-                current_frame_data[f'face-{idx}-x'] = landmark.x
-                current_frame_data[f'face-{idx}-y'] = landmark.y
-                current_frame_data[f'face-{idx}-z'] = landmark.z
-                current_frame_data[f'face-{idx}-visibility'] = 1
-        
-        if results.left_hand_landmarks:
-            for idx, landmark in enumerate(results.left_hand_landmarks.landmark):
-                current_frame_data[f'left_hand-{idx}-x'] = landmark.x
-                current_frame_data[f'left_hand-{idx}-y'] = landmark.y
-                current_frame_data[f'left_hand-{idx}-z'] = landmark.z
-                current_frame_data[f'left_hand-{idx}-visibility'] = 1
-        
-        if results.right_hand_landmarks:
-            for idx, landmark in enumerate(results.right_hand_landmarks.landmark):
-                current_frame_data[f'right_hand-{idx}-x'] = landmark.x
-                current_frame_data[f'right_hand-{idx}-y'] = landmark.y
-                current_frame_data[f'right_hand-{idx}-z'] = landmark.z
-                current_frame_data[f'right_hand-{idx}-visibility'] = 1
-        
-        frame_data[frame_count] = current_frame_data
+        block.append(frame_count, results)
         
         if frame_count % 100 == 0:
             print(f"Processing frame {frame_count}")
     
-    return frame_data
+    return block
 
-def save_batch_to_parquet(frame_data, output_file, mode='w'):
+def save_batch_to_parquet(block, writer, filtered_writer):
     """
-    Save batch data to a parquet file.
+    Append batch data as one row group to the full and the filtered parquet file.
+    Returns the written tables for checkpointing.
     """
-    # Convert frame data to DataFrame
-    df = pd.DataFrame.from_dict(frame_data, orient='index')
-    
-    # Sort columns
-    cols = ['frame'] + sorted([col for col in df.columns if col != 'frame'])
-    df = df[cols]
-    
-    # Save to parquet
-    if mode == 'w':
-        df.to_parquet(output_file, index=False, engine="pyarrow")
-    else:
-        # Append to existing file
-        existing_df = pd.read_parquet(output_file)
-        combined_df = pd.concat([existing_df, df])
-        combined_df.to_parquet(output_file, index=False, engine="pyarrow")
+    return {
+        'landmarks': writer.write_block(block),
+        'filtered': filtered_writer.write_block(block)
+    }
 
 def main():
     # Read CSV and get video URL
     csv_file_path = 'tagesschau_sign_language_video_links.csv'
-    tagesschau_links_df = pd.read_csv(csv_file_path)
-    video_url = tagesschau_links_df['webm'].iloc[-1]
+    with open(csv_file_path, newline='', encoding='utf-8') as f:
+        video_url = list(csv.DictReader(f))[-1]['webm']
     
     # Download video
     video_file_name = video_url.split('/')[-1]
@@ -266,46 +174,65 @@ def main():
     
     # Create output directories
     os.makedirs('output_frames', exist_ok=True)
-    os.makedirs('output_json', exist_ok=True)
     
-    # Open video
-    cap = cv2.VideoCapture(video_file_name)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    # Resume after the last checkpointed batch of an interrupted run
+    checkpoint = ExtractionCheckpoint(f"{video_file_name}.checkpoint")
+    last_frame = checkpoint.restore()
+    resume_frame = 0 if last_frame is None else last_frame + 1
+    if last_frame is not None:
+        print(f"Resuming after frame {last_frame} from checkpoint")
+    
+    region = RIGHT_HALF
+    if AUTO_REGION:
+        region = estimate_interpreter_region(video_file_name) or RIGHT_HALF
+        print(f"Interpreter region: {region}")
+    
+    # Open video, frames are decoded and cropped ahead on a background thread
+    source = open_frame_source(video_file_name, decoder=DECODER, region=region, start_frame=resume_frame)
+    total_frames = source.total_frames
     print(f"Total frames: {total_frames}")
     
-    # Process video in batches
+    # Process video in batches, each batch is written as one row group of a single parquet file,
+    # the filtered landmarks are cut from the same batch instead of re-reading the full file
     with mp_holistic.Holistic(static_image_mode=False,
                              model_complexity=2,
                              enable_segmentation=True,
-                             refine_face_landmarks=True) as holistic:
+                             refine_face_landmarks=True) as holistic, \
+         LandmarkParquetWriter(f"{video_file_name}.parquet",
+                               column_order='lexicographic',
+                               metadata={'region': list(region)}) as writer, \
+         LandmarkParquetWriter(f"{video_file_name}_filtered.parquet",
+                               column_order='natural',
+                               metadata={'region': list(region)},
+                               selection={'face': all_facial_landmarks, 'pose': pose_landmarks}) as filtered_writer, \
+         source:
+        
+        # Copy the batches completed before the restart
+        for writer_name, parquet_writer in (('landmarks', writer), ('filtered', filtered_writer)):
+            for part_path in checkpoint.part_paths(writer_name):
+                parquet_writer.write_parquet(part_path)
         
-        for batch_start in range(0, total_frames, BATCH_SIZE):
+        frames = iter(source)
+        for batch_start in range(source.start_frame, total_frames, BATCH_SIZE):
             batch_end = min(batch_start + BATCH_SIZE, total_frames)
             print(f"Processing batch: frames {batch_start} to {batch_end}")
             
             # Process batch
-            frame_data = process_batch(batch_start, batch_end, cap, holistic, video_file_name)
+            block = process_batch(batch_start, batch_end, frames, holistic, video_file_name)
             
             # Save batch
-            mode = 'w' if batch_start == 0 else 'a'
-            save_batch_to_parquet(frame_data, f"{video_file_name}.parquet", mode)
+            tables = save_batch_to_parquet(block, writer, filtered_writer)
             
-            # Save JSON checkpoint
-            with open(f"output_json/{video_file_name}_batch_{batch_start}.json", "w") as f:
-                json.dump(frame_data, f)
+            # Checkpoint the completed batch and the last frame it covers
+            if len(block):
+                checkpoint.commit(tables, block.frames[len(block) - 1])
             
-            # Clear frame data to free memory
-            del frame_data
+            # Clear landmark block to free memory
+            del block
     
-    cap.release()
+    source.report()
+    checkpoint.clear()
     cv2.destroyAllWindows()
-    
-    # Apply final filtering
-    print("Applying final landmark filtering...")
-    final_df = pd.read_parquet(f"{video_file_name}.parquet")
-    filtered_df = filter_landmarks_df(final_df, all_facial_landmarks, pose_landmarks)
-    filtered_df = filtered_df[natsorted(filtered_df.columns)]
-    filtered_df.to_parquet(f"{video_file_name}_filtered.parquet", engine="pyarrow")
     print("Processing complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+Train a landmark-to-text baseline on shards written by training_dataset.build_training_shards.
+
+Submit with ModelTrainer, shipping the data modules from data/dev/cloud-processing:
+
+    trainer.submit_training_job(
+        script_path="models/scripts/training/train.py",
+        args={"data-folder": "/gcs/<data bucket>/training/shards", "bucketing": True, "max-frames": 20000},
+        dependencies=[training_dataset, length_bucketing, alignment]
+    )
+
+With --bucketing the batches are built by length_bucketing.LengthBucketBatchSampler under a
+frame budget instead of fixed-size random batches, and the padding of both is reported.
+"""
+import argparse
+import os
+import time
+import numpy as np
+import torch
+from torch import nn
+from torch.utils.data import DataLoader
+from length_bucketing import LengthBucketBatchSampler, random_batches, report_padding
+from training_dataset import TrainingShards
+
+# Vocabulary of the multilingual Whisper tokenizer (large-v3) the shards are tokenized with
+WHISPER_VOCAB_SIZE = 51866
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train a landmark-to-text model")
+    parser.add_argument("--data-folder", required=True, help="Directory written by build_training_shards")
+    parser.add_argument("--model-folder", default=os.environ.get("AIP_MODEL_DIR", "model"))
+    parser.add_argument("--learning_rate", type=float, default=1e-4)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32, help="Examples per batch without --bucketing")
+    parser.add_argument("--bucketing", action="store_true", help="Length-bucketed batches under --max-frames")
+    parser.add_argument("--max-frames", type=int, default=20000, help="Frame budget of a bucketed batch")
+    parser.add_argument("--pad-to", type=int, default=None, help="Fixed length the unbucketed baseline is reported with")
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--vocab-size", type=int, default=WHISPER_VOCAB_SIZE)
+    parser.add_argument("--num-workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def pad_collate(items):
+    """Pad features to the longest example of the batch and concatenate the targets for CTC."""
+    lengths = torch.tensor([len(item["features"]) for item in items])
+    features = torch.zeros(len(items), int(lengths.max()), items[0]["features"].shape[1])
+    for position, item in enumerate(items):
+        features[position, :len(item["features"])] = torch.from_numpy(np.asarray(item["features"], dtype=np.float32))
+
+    targets = [torch.from_numpy(np.asarray(item["tokens"], dtype=np.int64)) for item in items]
+    return {
+        "features": features,
+        "lengths": lengths,
+        "targets": torch.cat(targets),
+        "target_lengths": torch.tensor([len(target) for target in targets]),
+    }
+
+
+class LandmarkCTCBaseline(nn.Module):
+    """Bidirectional GRU over landmark frames with a CTC head on the token vocabulary."""
+
+    def __init__(self, num_features: int, hidden_size: int, vocab_size: int):
+        super().__init__()
+        self.projection = nn.Linear(num_features, hidden_size)
+        self.encoder = nn.GRU(hidden_size, hidden_size, num_layers=2, batch_first=True, bidirectional=True)
+        # The last class is the CTC blank
+        self.head = nn.Linear(2 * hidden_size, vocab_size + 1)
+
+    def forward(self, features, lengths):
+        hidden = torch.relu(self.projection(features))
+        packed = nn.utils.rnn.pack_padded_sequence(hidden, lengths.cpu(), batch_first=True, enforce_sorted=False)
+        encoded, _ = self.encoder(packed)
+        encoded, _ = nn.utils.rnn.pad_packed_sequence(encoded, batch_first=True)
+        return self.head(encoded).log_softmax(-1)
+
+
+def main():
+    args = parse_args()
+    torch.manual_seed(args.seed)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    dataset = TrainingShards(args.data_folder)
+    lengths = dataset.lengths()
+    print(f"{len(dataset)} examples, {lengths.sum()} frames, {len(dataset.feature_columns)} features")
+
+    sampler = LengthBucketBatchSampler(lengths, max_frames=args.max_frames, seed=args.seed)
+    report_padding(lengths, sampler, args.batch_size, pad_to=args.pad_to)
+
+    model = LandmarkCTCBaseline(len(dataset.feature_columns), args.hidden_size, args.vocab_size).to(device)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=args.learning_rate)
+    ctc_loss = nn.CTCLoss(blank=args.vocab_size, zero_infinity=True)
+
+    for epoch in range(args.epochs):
+        if args.bucketing:
+            sampler.set_epoch(epoch)
+            batches = sampler
+        else:
+            batches = random_batches(len(dataset), args.batch_size, seed=args.seed + epoch)
+        loader = DataLoader(dataset, batch_sampler=batches, collate_fn=pad_collate, num_workers=args.num_workers)
+
+        model.train()
+        start = time.perf_counter()
+        total_loss, samples = 0.0, 0
+        for batch in loader:
+            log_probs = model(batch["features"].to(device), batch["lengths"])
+            loss = ctc_loss(
+                log_probs.transpose(0, 1),
+                batch["targets"].to(device),
+                batch["lengths"],
+                batch["target_lengths"]
+            )
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch["lengths"])
+            samples += len(batch["lengths"])
+
+        elapsed = time.perf_counter() - start
+        print(f"Epoch {epoch}: loss {total_loss / max(samples, 1):.4f}, {samples / elapsed:.1f} samples/s")
+
+    # Vertex AI mounts Cloud Storage under /gcs
+    model_folder = args.model_folder.replace("gs://", "/gcs/", 1)
+    os.makedirs(model_folder, exist_ok=True)
+    torch.save(model.state_dict(), os.path.join(model_folder, "model.pt"))
+    print(f"Saved model to {model_folder}")
+
+
+if __name__ == "__main__":
+    main()
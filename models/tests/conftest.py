@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Jobs import work_queue by name from their working directory, the tests do the same
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "vertex_ai"))
+# The processors are imported from the models.vertex_ai package, like the notebooks do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -0,0 +1,40 @@
+import pytest
+
+# The package loads the environment configuration on import
+pytest.importorskip("yaml")
+pytest.importorskip("dotenv")
+from models.vertex_ai.cloud_processor import CloudProcessor
+
+
+def test_inputs_without_duration_count_as_the_mean():
+    items = [{"duration_minutes": 10.0}, {"duration_minutes": None}, {"duration_minutes": 30.0}, {}]
+
+    assert CloudProcessor._estimate_minutes(items) == [10.0, 20.0, 30.0, 20.0]
+    assert CloudProcessor._estimate_minutes([{"duration_minutes": None}]) == [1.0]
+
+
+def test_lpt_balances_the_load():
+    costs = [5, 1, 8, 3, 7, 2, 4, 6]
+
+    assignments = CloudProcessor._assign_lpt(costs, 3)
+
+    assert sorted(index for assigned in assignments for index in assigned) == list(range(len(costs)))
+    loads = [sum(costs[index] for index in assigned) for assigned in assignments]
+    assert loads == [13, 12, 11]
+    # Every worker starts with its longest input
+    assert [assigned[0] for assigned in assignments] == [2, 4, 7]
+
+
+def test_lpt_beats_a_contiguous_split():
+    # Both long videos fall into the first contiguous block, 130 against 40 minutes
+    costs = [60, 60, 10, 10, 10, 10]
+
+    assignments = CloudProcessor._assign_lpt(costs, 2)
+
+    assert [sum(costs[index] for index in assigned) for assigned in assignments] == [80, 80]
+
+
+def test_more_workers_than_inputs():
+    assignments = CloudProcessor._assign_lpt([3.0, 1.0], 4)
+
+    assert assignments == [[0], [1], [], []]
@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import pytest
+
+# The package loads the environment configuration on import
+pytest.importorskip("yaml")
+pytest.importorskip("dotenv")
+from models.vertex_ai import LocalProcessor
+from models.vertex_ai import local_storage
+
+
+def count_words(input_path, temp_dir, scale=1):
+    """Processing function of the test jobs, its source is shipped with the job script"""
+    import json
+    import os
+    with open(input_path, "r", encoding="utf-8") as f:
+        row = json.load(f)
+    output_path = os.path.join(temp_dir, "words.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"id": row["id"], "words": len(row["text"].split()) * scale}, f)
+    return output_path
+
+
+def fail_on_row_2(input_path, temp_dir):
+    """Processing function of a job with a failing input"""
+    if input_path.endswith("row_2.json"):
+        raise ValueError("Corrupt row")
+    return input_path
+
+
+def upload_rows(root, ids):
+    bucket = local_storage.Client(str(root)).bucket("data")
+    for row_id in ids:
+        bucket.blob(f"csv-rows/row_{row_id}.json").upload_from_string(
+            json.dumps({"id": row_id, "text": "guten abend " * row_id})
+        )
+
+
+def outputs(root) -> dict:
+    """Output name to (content, fingerprint) of every processed row"""
+    client = local_storage.Client(str(root))
+    return {
+        blob.name: (json.loads(blob.download_as_text()), (blob.metadata or {}).get("fingerprint"))
+        for blob in client.list_blobs("data", prefix="landmarks/")
+    }
+
+
+def submit(processor: LocalProcessor, **kwargs):
+    return processor.submit_job(
+        processing_fn=count_words,
+        input_folder="csv-rows/",
+        output_folder="landmarks/",
+        show_progress=False,
+        **kwargs
+    )
+
+
+def test_fingerprint_covers_code_parameters_and_dependencies():
+    fingerprint = LocalProcessor._fingerprint("def f(): pass", {"a": 1, "b": 2}, {"m": "x = 1", "n": "y = 2"})
+
+    # Independent of the order the parameters and dependencies are given in
+    assert fingerprint == LocalProcessor._fingerprint("def f(): pass", {"b": 2, "a": 1}, {"n": "y = 2", "m": "x = 1"})
+    assert fingerprint != LocalProcessor._fingerprint("def f(): return", {"a": 1, "b": 2}, {"m": "x = 1", "n": "y = 2"})
+    assert fingerprint != LocalProcessor._fingerprint("def f(): pass", {"a": 1, "b": 3}, {"m": "x = 1", "n": "y = 2"})
+    assert fingerprint != LocalProcessor._fingerprint("def f(): pass", {"a": 1, "b": 2}, {"m": "x = 2", "n": "y = 2"})
+
+
+def test_incremental_run_processes_only_new_and_stale_inputs(tmp_path):
+    processor = LocalProcessor(str(tmp_path))
+    upload_rows(tmp_path, [1, 2])
+    assert submit(processor, incremental=True).num_inputs == 2
+    fingerprint = outputs(tmp_path)["landmarks/processed_row_1.json"][1]
+
+    # A new row is the only input of the next run, nothing is left after it
+    upload_rows(tmp_path, [3])
+    assert submit(processor, incremental=True).num_inputs == 1
+    assert submit(processor, incremental=True) is None
+    assert {name: result[1] for name, result in outputs(tmp_path).items()} == {
+        "landmarks/processed_row_1.json": fingerprint,
+        "landmarks/processed_row_2.json": fingerprint,
+        "landmarks/processed_row_3.json": fingerprint,
+    }
+
+    # Changed parameters make every output stale
+    assert submit(processor, incremental=True, processing_kwargs={"scale": 2}).num_inputs == 3
+    assert outputs(tmp_path)["landmarks/processed_row_3.json"][0] == {"id": 3, "words": 12}
+    assert outputs(tmp_path)["landmarks/processed_row_3.json"][1] != fingerprint
+
+
+@pytest.mark.parametrize("scheduling", ["static", "lpt", "queue"])
+def test_job_processes_every_input(tmp_path, scheduling):
+    processor = LocalProcessor(str(tmp_path))
+    upload_rows(tmp_path, range(1, 6))
+
+    job = submit(processor, workers=2, batch_size=2, scheduling=scheduling)
+
+    assert job.state == "JOB_STATE_SUCCEEDED"
+    assert job.num_inputs == 5
+    assert os.path.exists(job.resource_name)
+    assert outputs(tmp_path)["landmarks/processed_row_4.json"][0] == {"id": 4, "words": 8}
+    assert len(outputs(tmp_path)) == 5
+    # Nothing of a local run talks to Google Cloud
+    assert "google.cloud.aiplatform" not in sys.modules
+
+
+def test_worker_error_fails_the_job(tmp_path):
+    processor = LocalProcessor(str(tmp_path))
+    upload_rows(tmp_path, [1, 2])
+
+    with pytest.raises(ValueError, match="Corrupt row"):
+        processor.submit_job(fail_on_row_2, "csv-rows/", "landmarks/", show_progress=False)
@@ -0,0 +1,78 @@
+import os
+import time
+import pytest
+from work_queue import LeaseLost, LocalWorkQueue
+
+ITEMS = [{"input": f"row_{index}"} for index in range(3)]
+
+
+def make_queue(directory, worker_id: str, **kwargs) -> LocalWorkQueue:
+    return LocalWorkQueue(str(directory), ITEMS, worker_id=worker_id, **kwargs)
+
+
+def expire(queue: LocalWorkQueue, index: int, seconds: float):
+    path = queue._lease_path(queue._key(index))
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_workers_claim_different_items(tmp_path):
+    first, second = make_queue(tmp_path, "a"), make_queue(tmp_path, "b")
+
+    assert [first.claim(), second.claim(), first.claim(), second.claim()] == [0, 1, 2, None]
+    assert first.remaining() == 3
+
+
+def test_completed_items_are_not_claimed_again(tmp_path):
+    queue = make_queue(tmp_path, "a")
+    for _ in ITEMS:
+        queue.complete(queue.claim())
+
+    assert queue.claim() is None
+    assert queue.remaining() == 0
+    assert os.listdir(queue.lease_dir) == []
+
+
+def test_expired_lease_is_taken_over_once(tmp_path):
+    owner = make_queue(tmp_path, "a", lease_seconds=60)
+    first, second = make_queue(tmp_path, "b", lease_seconds=60), make_queue(tmp_path, "c", lease_seconds=60)
+    assert owner.claim() == 0
+    expire(owner, 0, 120)
+
+    # Both see the same expired lease, only one of them gets it
+    _, leases = first._state()
+    token = leases[first._key(0)][1]
+    assert first._take_over(first._key(0), token)
+    assert not second._take_over(second._key(0), token)
+
+    with pytest.raises(LeaseLost):
+        owner.heartbeat(0)
+    first.heartbeat(0)
+
+
+def test_live_lease_is_not_taken_over(tmp_path):
+    owner, other = make_queue(tmp_path, "a", lease_seconds=60), make_queue(tmp_path, "b", lease_seconds=60)
+    assert owner.claim() == 0
+    expire(owner, 0, 30)
+
+    assert other.claim() == 1
+
+
+def test_run_processes_every_item(tmp_path):
+    queue = make_queue(tmp_path, "a", lease_seconds=60, poll_seconds=0.1)
+    processed = []
+
+    assert queue.run(processed.append) == len(ITEMS)
+    assert processed == ITEMS
+    assert queue.run(processed.append) == 0
+
+
+def test_run_picks_up_items_of_a_preempted_worker(tmp_path):
+    preempted = make_queue(tmp_path, "a", lease_seconds=0.5)
+    assert preempted.claim() == 0
+    queue = make_queue(tmp_path, "b", lease_seconds=0.5, poll_seconds=0.1)
+    processed = []
+
+    # Item 0 is leased until its heartbeat is overdue, then taken over
+    assert queue.run(processed.append) == len(ITEMS)
+    assert sorted(item["input"] for item in processed) == ["row_0", "row_1", "row_2"]
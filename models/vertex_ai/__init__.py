@@ -115,12 +115,14 @@ def get_config(environment: str = "dev") -> ModelConfig:
 # Import classes from their respective modules
 from .model_deployer import ModelDeployer
 from .cloud_processor import CloudProcessor, MachineConfig, JobConfig
+from .local_processor import LocalProcessor
 
 __all__ = [
     'ModelConfig',
     'get_config',
     'ModelDeployer',
     'CloudProcessor',
+    'LocalProcessor',
     'MachineConfig',
     'JobConfig'
 ]
\ No newline at end of file
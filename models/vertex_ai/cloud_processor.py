@@ -1,11 +1,19 @@
+import hashlib
+import heapq
 import inspect
-from google.cloud import aiplatform
-from google.cloud import storage
+import io
+import json
+import math
+import shlex
+from types import ModuleType
 from dataclasses import dataclass
-from typing import Callable, Optional, Literal, List
+from typing import Callable, Optional, Literal, List, Dict, Any
 from threading import Thread
 from tqdm import tqdm
 import time
+import uuid
+import zipfile
+from . import work_queue
 
 @dataclass
 class MachineConfig:
@@ -13,6 +21,8 @@ class MachineConfig:
     accelerator_type: Optional[str] = None
     accelerator_count: int = 0
     disk_size_gb: int = 100
+    # Measured processing seconds per minute of video on this machine, to predict job durations
+    seconds_per_minute: Optional[float] = None
 
 @dataclass
 class JobConfig:
@@ -21,6 +31,9 @@ class JobConfig:
     timeout_days: Optional[float] = 2.0
 
 class CloudProcessor:
+    # How the job script imports the storage client, see LocalProcessor for a stand-in
+    STORAGE_IMPORT = "from google.cloud import storage"
+
     def __init__(
         self, 
         project_id: str, 
@@ -43,6 +56,8 @@ class CloudProcessor:
         if data_bucket:
             data_bucket = data_bucket.replace('gs://', '')
         
+        # Imported where needed, so LocalProcessor runs without the Google Cloud SDK
+        from google.cloud import aiplatform
         aiplatform.init(
             project=project_id, 
             location=location, 
@@ -53,22 +68,167 @@ class CloudProcessor:
         self.staging_bucket = staging_bucket
         self.data_bucket = data_bucket
 
-    def _monitor_job_progress(self, input_bucket: str, output_bucket: str):
-        """Monitor job progress by counting files in output bucket"""
-        client = storage.Client()
-        input_files = list(client.list_blobs(input_bucket))
-        total_files = len(input_files)
+    def _storage_client(self):
+        """Client of the storage the job reads from and writes to"""
+        from google.cloud import storage
+        return storage.Client()
+
+    def _list_inputs(self, input_bucket: str, input_folder: str) -> List[Dict[str, Any]]:
+        """List the input objects under the input folder once, with their size and duration if known"""
+        client = self._storage_client()
+        items = []
+        for blob in client.list_blobs(input_bucket, prefix=input_folder):
+            if blob.name.endswith("/"):
+                continue
+            # Row files uploaded by csv_processor carry the video duration as custom metadata
+            duration = (blob.metadata or {}).get("duration_minutes")
+            items.append({
+                "name": blob.name,
+                "size": blob.size,
+                "duration_minutes": float(duration) if duration else None
+            })
+        return items
+
+    @staticmethod
+    def _fingerprint(processing_fn_source: str, processing_kwargs: Dict[str, Any], dependency_sources: Dict[str, str]) -> str:
+        """Hash of everything that determines the outputs: function source, its parameters and shipped modules"""
+        digest = hashlib.sha256(processing_fn_source.encode("utf-8"))
+        digest.update(repr(sorted(processing_kwargs.items())).encode("utf-8"))
+        for module_name, module_source in sorted(dependency_sources.items()):
+            digest.update(module_name.encode("utf-8"))
+            digest.update(module_source.encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def _list_outputs(self, output_bucket: str, output_folder: str) -> Dict[str, Optional[str]]:
+        """Existing output objects under the output folder and the fingerprint they were written with"""
+        client = self._storage_client()
+        return {
+            blob.name: (blob.metadata or {}).get("fingerprint")
+            for blob in client.list_blobs(output_bucket, prefix=output_folder)
+        }
+
+    @staticmethod
+    def _new_run_id() -> str:
+        """Unique name of a submission, jobs submitted within the same second must not share staging objects"""
+        return f"video-process-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def _write_manifest(self, run_id: str, items: List[Dict[str, Any]], assignments: List[List[int]] = None) -> str:
+        """Upload the input list and optional per-worker item indices to the staging bucket, returns the object name"""
+        manifest_name = f"manifests/{run_id}.json"
+        manifest = {"items": items}
+        if assignments is not None:
+            manifest["assignments"] = assignments
+        self._storage_client().bucket(self.staging_bucket).blob(manifest_name).upload_from_string(
+            json.dumps(manifest),
+            content_type="application/json"
+        )
+        return manifest_name
+
+    def _upload_sources(self, run_id: str, sources: Dict[str, str]) -> str:
+        """Upload module sources as one zip to the staging bucket, returns the object name"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for module_name, module_source in sources.items():
+                archive.writestr(module_name + ".py", module_source)
+        sources_name = f"manifests/{run_id}-sources.zip"
+        self._storage_client().bucket(self.staging_bucket).blob(sources_name).upload_from_string(
+            buffer.getvalue(),
+            content_type="application/zip"
+        )
+        return sources_name
+
+    @staticmethod
+    def _estimate_minutes(items: List[Dict[str, Any]]) -> List[float]:
+        """Video minutes of every input, inputs without a duration count as the mean of the known ones"""
+        known = [item["duration_minutes"] for item in items if item.get("duration_minutes")]
+        default = sum(known) / len(known) if known else 1.0
+        return [item.get("duration_minutes") or default for item in items]
+
+    @staticmethod
+    def _assign_lpt(costs: List[float], workers: int) -> List[List[int]]:
+        """Greedy longest processing time first: every input goes to the least loaded worker, longest first"""
+        loads = [(0.0, worker) for worker in range(workers)]
+        assignments = [[] for _ in range(workers)]
+        for index in sorted(range(len(costs)), key=lambda i: costs[i], reverse=True):
+            load, worker = heapq.heappop(loads)
+            assignments[worker].append(index)
+            heapq.heappush(loads, (load + costs[index], worker))
+        return assignments
+
+    @staticmethod
+    def _report_schedule(minutes: List[float], assignments: List[List[int]], machine_config: MachineConfig):
+        """Print the load of every worker and the predicted makespan against a contiguous split"""
+        def describe(video_minutes):
+            if machine_config.seconds_per_minute:
+                return f"{video_minutes:.0f} video min (~{video_minutes * machine_config.seconds_per_minute / 3600:.1f} h)"
+            return f"{video_minutes:.0f} video min"
+
+        workers = len(assignments)
+        loads = [sum(minutes[index] for index in assigned) for assigned in assignments]
+        print(f"LPT schedule of {len(minutes)} inputs ({describe(sum(minutes))}) on {workers} workers:")
+        for worker, (assigned, load) in enumerate(zip(assignments, loads)):
+            print(f"  worker {worker}: {len(assigned)} inputs, {describe(load)}")
+
+        # What the default scheduling would give, contiguous blocks of equal count
+        per_worker = max(math.ceil(len(minutes) / workers), 1)
+        contiguous = max((sum(minutes[start:start + per_worker]) for start in range(0, len(minutes), per_worker)), default=0)
+        print(
+            f"Predicted makespan: {describe(max(loads, default=0))}, contiguous split: {describe(contiguous)}, "
+            f"lower bound: {describe(sum(minutes) / workers)}"
+        )
+        if not machine_config.seconds_per_minute:
+            print("Set MachineConfig.seconds_per_minute to a measured value to predict hours")
+
+    def plan_schedule(
+        self,
+        input_folder: str,
+        workers: int,
+        machine_config: Optional[MachineConfig] = None,
+        input_bucket: str = None
+    ) -> List[List[int]]:
+        """
+        Print the duration-aware schedule a job would use, without submitting it
+
+        Args:
+            input_folder (str): The folder path for input files (e.g. "csv-rows/")
+            workers (int): The number of workers to plan for
+            machine_config (Optional[MachineConfig]): Machine whose seconds_per_minute converts video minutes to time
+            input_bucket (str, optional): Override the default data bucket for input
+
+        Returns:
+            List[List[int]]: Indices of the listed inputs assigned to every worker
+        """
+        items = self._list_inputs(input_bucket or self.data_bucket, input_folder)
+        minutes = self._estimate_minutes(items)
+        assignments = self._assign_lpt(minutes, workers)
+        self._report_schedule(minutes, assignments, machine_config or MachineConfig())
+        return assignments
+
+    def _monitor_job_progress(self, total_files: int, output_bucket: str, output_folder: str, fingerprint: str = None):
+        """Monitor job progress by counting files in the output folder, only those written with fingerprint if given"""
+        client = self._storage_client()
         
         with tqdm(total=total_files, desc="Processing files") as pbar:
             processed_count = 0
             while processed_count < total_files:
-                # Count processed files in output bucket
-                new_count = len(list(client.list_blobs(output_bucket)))
+                # Count processed files in the output folder
+                new_count = sum(
+                    1 for blob in client.list_blobs(output_bucket, prefix=output_folder)
+                    if fingerprint is None or (blob.metadata or {}).get("fingerprint") == fingerprint
+                )
                 if new_count > processed_count:
                     pbar.update(new_count - processed_count)
                     processed_count = new_count
                 time.sleep(5)  # Check every 5 seconds
     
+    def _runtime_sources(self, scheduling: str) -> Dict[str, str]:
+        """Sources of the modules the job script itself needs on the workers"""
+        return {"work_queue": inspect.getsource(work_queue)} if scheduling == "queue" else {}
+
+    def _queue_code(self, queue_prefix: str, lease_seconds: float) -> str:
+        """Expression creating the work queue of the job script over its batches"""
+        return f'work_queue.GCSWorkQueue("{self.staging_bucket}", "{queue_prefix}", batches, lease_seconds={lease_seconds})'
+
     def submit_job(
         self,
         processing_fn: Callable,
@@ -81,7 +241,12 @@ class CloudProcessor:
         machine_config: Optional[MachineConfig] = None,
         job_config: Optional[JobConfig] = None,
         batch_size: int = 1,
-        show_progress: bool = True
+        show_progress: bool = True,
+        dependencies: List[ModuleType] = None,
+        processing_kwargs: Optional[Dict[str, Any]] = None,
+        scheduling: Literal["static", "lpt", "queue"] = "static",
+        lease_minutes: float = 10.0,
+        incremental: bool = False
     ):
         """
         Submit a processing job to Vertex AI
@@ -97,6 +262,23 @@ class CloudProcessor:
             job_config (Optional[JobConfig]): The job configuration
             batch_size (int): The batch size to use
             show_progress (bool): Whether to show a progress bar in notebooks
+            dependencies (List[ModuleType], optional): Local modules imported by processing_fn,
+                their source is shipped with the job and importable on the workers
+            processing_kwargs (Dict[str, Any], optional): Extra keyword arguments passed to
+                processing_fn after (input_path, temp_dir), must be representable as literals.
+                If processing_fn has a next_input_path parameter, it also receives the local
+                copy of the input the worker processes next (None for its last input).
+                With a "checkpoint_uri" entry, the checkpoint kept under
+                {checkpoint_uri}/{input name without extension}/ is deleted after the upload
+            scheduling (str): "static" gives every worker a contiguous share of the inputs,
+                "lpt" balances the inputs across workers by their duration_minutes, longest
+                first, and prints the predicted load of every worker, "queue" lets workers claim batches from a lease-based queue in the staging
+                bucket, so idle workers take over remaining and preempted work
+            lease_minutes (float): With scheduling="queue", a batch whose worker sent no
+                heartbeat for this long is claimed by another worker
+            incremental (bool): Only process inputs whose "processed_" output is missing or was
+                written with a different fingerprint (processing_fn source, processing_kwargs and
+                dependency sources). Returns None without submitting if everything is up to date
         """
         # Use default data bucket if not overridden
         input_bucket = input_bucket or self.data_bucket
@@ -107,6 +289,9 @@ class CloudProcessor:
 
         machine_config = machine_config or MachineConfig()
         job_config = job_config or JobConfig()
+        processing_kwargs = processing_kwargs or {}
+        if scheduling not in ("static", "lpt", "queue"):
+            raise ValueError(f"Unknown scheduling {scheduling!r}, expected 'static', 'lpt' or 'queue'")
 
         processing_fn_source = inspect.getsource(processing_fn)
         # Extract the main function name from the processing function
@@ -115,33 +300,115 @@ class CloudProcessor:
         except Exception as e:
             raise ValueError(f"Failed to extract function name from processing_fn: {e}")
 
+        # Collect the source of local modules the processing function imports
+        dependency_sources = {
+            module.__name__.split(".")[-1]: inspect.getsource(module)
+            for module in (dependencies or [])
+        }
+        # Every output is stamped with it, so later incremental runs can tell stale outputs apart
+        fingerprint = self._fingerprint(processing_fn_source, processing_kwargs, dependency_sources)
+        # The job script needs these before it can download anything, they are small enough to inline
+        runtime_sources = self._runtime_sources(scheduling)
+
+        # List the inputs once and ship the list with the job, workers never list the bucket
+        manifest = self._list_inputs(input_bucket, input_folder)
+        total_inputs = len(manifest)
+        if incremental:
+            outputs = self._list_outputs(output_bucket, output_folder)
+            manifest = [
+                item for item in manifest
+                if outputs.get(output_folder + "processed_" + item["name"].split("/")[-1], "missing") != fingerprint
+            ]
+            stale = sum(1 for item in manifest if output_folder + "processed_" + item["name"].split("/")[-1] in outputs)
+            print(
+                f"Incremental run {fingerprint}: {total_inputs - len(manifest)} inputs up to date, "
+                f"{len(manifest) - stale} new and {stale} stale inputs to process"
+            )
+            if not manifest:
+                return None
+
+        assignments = None
+        if scheduling == "lpt":
+            minutes = self._estimate_minutes(manifest)
+            assignments = self._assign_lpt(minutes, workers)
+            self._report_schedule(minutes, assignments, machine_config)
+        run_id = self._new_run_id()
+        manifest_name = self._write_manifest(run_id, manifest, assignments)
+        print(f"Manifest: {len(manifest)} inputs under gs://{input_bucket}/{input_folder}, gs://{self.staging_bucket}/{manifest_name}")
+        # Dependencies go to the staging bucket, inlined they would exceed the 128 KiB limit of
+        # a single command line argument (MAX_ARG_STRLEN) once a job ships a dozen modules
+        sources_name = self._upload_sources(run_id, dependency_sources)
+        # Lease and done markers of this run only, a queue shared with another job would skip its items
+        queue_prefix = f"queues/{run_id}"
+
         # Define the script to be executed
         script_contents = f'''
+import io
 import os
-from google.cloud import storage
+import json
+import inspect
 import tempfile
 import shutil
 import math
 import time
 
+import zipfile
+
+# Write the modules the script itself needs next to it, a local run ships its storage stand-in here
+for module_name, module_source in {runtime_sources!r}.items():
+    with open(module_name + ".py", "w", encoding="utf-8") as f:
+        f.write(module_source)
+
+{self.STORAGE_IMPORT}
+
+# Extract the dependency modules uploaded at submission next to the script so processing_fn can import them
+with zipfile.ZipFile(io.BytesIO(storage.Client().bucket("{self.staging_bucket}").blob("{sources_name}").download_as_bytes())) as archive:
+    archive.extractall(".")
+
 {processing_fn_source}
+
+# processing_fn may take the next input of this worker, e.g. to prefetch its data
+PASS_NEXT_INPUT = "next_input_path" in inspect.signature({processing_fn_name}).parameters
+
+def load_manifest():
+    """Input objects of the job and their assignment to workers, written once at submission."""
+    blob = storage.Client().bucket("{self.staging_bucket}").blob("{manifest_name}")
+    return json.loads(blob.download_as_text())
     
-def process_batch(start_idx, end_idx, input_bucket, output_bucket, input_folder, output_folder):
+def clear_checkpoint(checkpoint_uri, input_name):
+    """Delete the checkpoint processing_fn kept for an input under checkpoint_uri, once its output is uploaded."""
+    bucket_name, _, prefix = checkpoint_uri[len("gs://"):].rstrip("/").partition("/")
+    stem = os.path.splitext(os.path.basename(input_name))[0]
+    prefix = (prefix + "/" if prefix else "") + stem + "/"
+    for checkpoint_blob in storage.Client().list_blobs(bucket_name, prefix=prefix):
+        checkpoint_blob.delete()
+
+def process_batch(items, input_bucket, output_bucket, output_folder, next_item=None):
     client = storage.Client()
     bucket = client.bucket(input_bucket)
-    blobs = list(bucket.list_blobs(prefix=input_folder))[start_idx:end_idx]
+    # The input after the batch's last is the next input of this worker
+    following = items[1:] + [next_item]
     
-    for blob in blobs:
+    for item, following_item in zip(items, following):
+        blob = bucket.blob(item["name"])
         with tempfile.TemporaryDirectory() as temp_dir:
             input_path = os.path.join(temp_dir, blob.name.split("/")[-1])
             blob.download_to_filename(input_path)
             
+            kwargs = dict({processing_kwargs!r})
+            if PASS_NEXT_INPUT and following_item is not None:
+                kwargs["next_input_path"] = os.path.join(temp_dir, "next_" + following_item["name"].split("/")[-1])
+                bucket.blob(following_item["name"]).download_to_filename(kwargs["next_input_path"])
+            
             try:
-                output_path = {processing_fn_name}(input_path, temp_dir)
+                output_path = {processing_fn_name}(input_path, temp_dir, **kwargs)
                 output_blob = client.bucket(output_bucket).blob(
                     output_folder + "processed_" + os.path.basename(blob.name)
                 )
+                output_blob.metadata = {{"fingerprint": "{fingerprint}"}}
                 output_blob.upload_from_filename(output_path)
+                if kwargs.get("checkpoint_uri"):
+                    clear_checkpoint(kwargs["checkpoint_uri"], blob.name)
             
             finally:
                 if os.path.exists(input_path):
@@ -151,6 +418,8 @@ def process_batch(start_idx, end_idx, input_bucket, output_bucket, input_folder,
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser()
+    manifest = load_manifest()
+    items = manifest["items"]
     if {workers} > 1:
         parser.add_argument("--worker-id", type=int, default=0)
         parser.add_argument("--num-workers", type=int, required=True)
@@ -163,27 +432,70 @@ if __name__ == "__main__":
             # Master pool (ID 0) gets worker_id 0, worker pool (ID 1) gets task_id + 1
             args.worker_id = task_id + 1 if worker_pool_id == 1 else 0
         
-        total_items = len(list(storage.Client().list_blobs("{input_bucket}")))
-        items_per_worker = math.ceil(total_items / args.num_workers)
+        items_per_worker = math.ceil(len(items) / args.num_workers)
         start_idx = args.worker_id * items_per_worker
-        end_idx = min(start_idx + items_per_worker, total_items)
+        end_idx = min(start_idx + items_per_worker, len(items))
+        worker_id = args.worker_id
     else:
         args = parser.parse_args()
         start_idx = 0
-        end_idx = len(list(storage.Client().list_blobs("{input_bucket}")))
+        end_idx = len(items)
+        worker_id = 0
     
-    for batch_start in range(start_idx, end_idx, {batch_size}):
-        batch_end = min(batch_start + {batch_size}, end_idx)
-        process_batch(
-            batch_start,
-            batch_end,
-            "{input_bucket}",
-            "{output_bucket}",
-            "{input_folder}",
-            "{output_folder}"
+    if "assignments" in manifest:
+        # Balanced by duration at submission, longest inputs first
+        worker_items = [items[index] for index in manifest["assignments"][worker_id]]
+    else:
+        worker_items = items[start_idx:end_idx]
+    
+    if "{scheduling}" == "queue":
+        # Workers claim batches until all are done, the next input is unknown until claimed
+        import work_queue
+        batches = [items[i:i + {batch_size}] for i in range(0, len(items), {batch_size})]
+        queue = {self._queue_code(queue_prefix, lease_minutes * 60)}
+        processed = queue.run(
+            lambda batch: process_batch(batch, "{input_bucket}", "{output_bucket}", "{output_folder}")
         )
+        print(f"Processed {{processed}} of {{len(batches)}} batches")
+    else:
+        for batch_start in range(0, len(worker_items), {batch_size}):
+            batch_end = min(batch_start + {batch_size}, len(worker_items))
+            process_batch(
+                worker_items[batch_start:batch_end],
+                "{input_bucket}",
+                "{output_bucket}",
+                "{output_folder}",
+                next_item=worker_items[batch_end] if batch_end < len(worker_items) else None
+            )
 '''
 
+        return self._run_job(
+            script_contents,
+            run_id=run_id,
+            num_inputs=len(manifest),
+            workers=workers,
+            requirements=requirements,
+            machine_config=machine_config,
+            job_config=job_config,
+            show_progress=show_progress,
+            progress_args=(total_inputs, output_bucket, output_folder, fingerprint if incremental else None)
+        )
+
+    def _run_job(
+        self,
+        script_contents: str,
+        run_id: str,
+        num_inputs: int,
+        workers: int,
+        requirements: Optional[List[str]],
+        machine_config: MachineConfig,
+        job_config: JobConfig,
+        show_progress: bool,
+        progress_args: tuple
+    ):
+        """Run the job script as a Vertex AI CustomJob, returns the job"""
+        from google.cloud import aiplatform
+
         # Define worker pool specifications
         worker_pool_specs = [
             # Master worker pool (always 1 replica)
@@ -201,7 +513,7 @@ if __name__ == "__main__":
                         "-c"
                     ],
                     "args": [
-                        f"pip install {' '.join(requirements) if requirements else ''}; apt-get update && apt-get install -y ffmpeg && python -c '{script_contents}' {f'--num-workers={workers}' if workers > 1 else ''}"
+                        f"pip install {' '.join(requirements) if requirements else ''}; apt-get update && apt-get install -y ffmpeg && python -c {shlex.quote(script_contents)} {f'--num-workers={workers}' if workers > 1 else ''}"
                     ]
                 },
                 "disk_spec": {
@@ -227,7 +539,7 @@ if __name__ == "__main__":
                         "-c"
                     ],
                     "args": [
-                        f"pip install {' '.join(requirements) if requirements else ''}; apt-get update && apt-get install -y ffmpeg && python -c '{script_contents}' {f'--num-workers={workers}'}"
+                        f"pip install {' '.join(requirements) if requirements else ''}; apt-get update && apt-get install -y ffmpeg && python -c {shlex.quote(script_contents)} {f'--num-workers={workers}'}"
                     ]
                 },
                 "disk_spec": {
@@ -238,7 +550,7 @@ if __name__ == "__main__":
 
         # Create custom job
         job = aiplatform.CustomJob(
-            display_name=f"video-process",
+            display_name=run_id,
             worker_pool_specs=worker_pool_specs,
             staging_bucket=self.staging_bucket
         )
@@ -256,7 +568,7 @@ if __name__ == "__main__":
             job_thread = Thread(target=job.run, kwargs=job_kwargs, daemon=True)
             progress_thread = Thread(
                 target=self._monitor_job_progress,
-                args=(input_bucket, output_bucket),
+                args=progress_args,
                 daemon=True
             )
             
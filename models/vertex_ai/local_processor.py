@@ -0,0 +1,119 @@
+import inspect
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from threading import Thread
+from typing import Dict, List, Optional
+from . import local_storage
+from .cloud_processor import CloudProcessor, MachineConfig, JobConfig
+
+
+def _run_worker(script_contents: str, argv: List[str], root: str):
+    """Execute the job script in a pool process, like `python -c script argv` on a Vertex AI worker"""
+    os.environ[local_storage.ROOT_ENV] = root
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="video-process-") as work_dir:
+        # The script writes its dependency modules to the working directory and imports them
+        os.chdir(work_dir)
+        sys.path.insert(0, work_dir)
+        sys.argv = ["video-process"] + argv
+        try:
+            exec(compile(script_contents, "<video-process>", "exec"), {"__name__": "__main__"})
+        finally:
+            sys.path.remove(work_dir)
+            os.chdir(cwd)
+
+
+@dataclass
+class LocalJob:
+    """Finished local job, with the CustomJob attributes callers of submit_job read"""
+    display_name: str
+    resource_name: str
+    state: str
+    elapsed_seconds: float
+    num_inputs: int
+
+
+class LocalProcessor(CloudProcessor):
+    STORAGE_IMPORT = "import local_storage as storage"
+
+    def __init__(self, root: str, staging_bucket: str = "staging", data_bucket: str = "data"):
+        """Run CloudProcessor jobs in local processes against a directory tree instead of Vertex AI and GCS
+        Args:
+            root (str): Directory with one subdirectory per bucket, e.g. <root>/data/csv-rows/
+            staging_bucket (str): Bucket directory for manifests and queues
+            data_bucket (str): Default bucket directory for inputs and outputs
+        """
+        # No aiplatform.init, nothing here talks to Google Cloud
+        self.project_id = None
+        self.location = None
+        self.root = os.path.abspath(root)
+        self.staging_bucket = staging_bucket.replace("gs://", "")
+        self.data_bucket = data_bucket.replace("gs://", "") if data_bucket else None
+        os.makedirs(os.path.join(self.root, self.staging_bucket), exist_ok=True)
+
+    def _storage_client(self):
+        return local_storage.Client(self.root)
+
+    def _runtime_sources(self, scheduling: str) -> Dict[str, str]:
+        sources = super()._runtime_sources(scheduling)
+        sources["local_storage"] = inspect.getsource(local_storage)
+        return sources
+
+    def _queue_code(self, queue_prefix: str, lease_seconds: float) -> str:
+        queue_dir = os.path.join(self.root, self.staging_bucket, queue_prefix)
+        # Local batches are short, idle workers check for expired leases every second
+        return f"work_queue.LocalWorkQueue({queue_dir!r}, batches, lease_seconds={lease_seconds}, poll_seconds=1.0)"
+
+    def _run_job(
+        self,
+        script_contents: str,
+        run_id: str,
+        num_inputs: int,
+        workers: int,
+        requirements: Optional[List[str]],
+        machine_config: MachineConfig,
+        job_config: JobConfig,
+        show_progress: bool,
+        progress_args: tuple
+    ):
+        """Run the job script once per worker in a process pool, returns a LocalJob
+
+        requirements, machine_config and job_config only apply to Vertex AI and are ignored.
+        """
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _run_worker,
+                    script_contents,
+                    [f"--num-workers={workers}", f"--worker-id={worker_id}"] if workers > 1 else [],
+                    self.root
+                )
+                for worker_id in range(workers)
+            ]
+
+            progress_thread = None
+            if show_progress:
+                progress_thread = Thread(target=self._monitor_job_progress, args=progress_args, daemon=True)
+                progress_thread.start()
+
+            # Raises the first worker error, like a failed CustomJob
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+            if progress_thread:
+                progress_thread.join()
+
+        print(f"Local job with {workers} workers: {num_inputs} inputs in {elapsed:.1f}s ({num_inputs / elapsed:.2f} inputs/s)")
+        return LocalJob(
+            display_name=run_id,
+            # The manifest of the run, the closest thing to a job resource
+            resource_name=os.path.join(self.root, self.staging_bucket, "manifests", f"{run_id}.json"),
+            state="JOB_STATE_SUCCEEDED",
+            elapsed_seconds=elapsed,
+            num_inputs=num_inputs
+        )
@@ -0,0 +1,150 @@
+"""
+Filesystem stand-in for the subset of google.cloud.storage used by CloudProcessor jobs.
+
+A bucket is a directory under the root and an object is a file at its name, so
+gs://<bucket>/<name> maps to <root>/<bucket>/<name>. Custom metadata is kept in JSON
+sidecars under <root>/.metadata. Uploads are written to a temporary file and renamed, so
+listings never show partial objects.
+"""
+import datetime
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+# Environment variable with the root directory, used by Client() without arguments
+ROOT_ENV = "LOCAL_STORAGE_ROOT"
+
+_UPLOAD_PREFIX = ".upload-"
+
+
+class Blob:
+    """Object of a local bucket, a file under the bucket directory"""
+
+    def __init__(self, bucket: "Bucket", name: str):
+        self.bucket = bucket
+        self.name = name
+        self.metadata = self._read_metadata()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.bucket.path, self.name)
+
+    @property
+    def _metadata_path(self) -> str:
+        return os.path.join(self.bucket.client.root, ".metadata", self.bucket.name, self.name + ".json")
+
+    def _read_metadata(self) -> Optional[dict]:
+        try:
+            with open(self._metadata_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, write):
+        """Write the object through write(file) into a temporary file, then rename it into place"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=_UPLOAD_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        if self.metadata:
+            os.makedirs(os.path.dirname(self._metadata_path), exist_ok=True)
+            with open(self._metadata_path, "w", encoding="utf-8") as f:
+                json.dump(self.metadata, f)
+        elif os.path.exists(self._metadata_path):
+            os.remove(self._metadata_path)
+
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    @property
+    def updated(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(os.path.getmtime(self.path), datetime.timezone.utc)
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def download_to_filename(self, filename: str):
+        shutil.copyfile(self.path, filename)
+
+    def download_as_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def download_as_text(self, encoding: str = "utf-8") -> str:
+        return self.download_as_bytes().decode(encoding)
+
+    def upload_from_filename(self, filename: str, content_type: str = None):
+        with open(filename, "rb") as source:
+            self._write(lambda f: shutil.copyfileobj(source, f))
+
+    def upload_from_string(self, data, content_type: str = None):
+        data = data.encode("utf-8") if isinstance(data, str) else data
+        self._write(lambda f: f.write(data))
+
+    def delete(self):
+        os.remove(self.path)
+        if os.path.exists(self._metadata_path):
+            os.remove(self._metadata_path)
+
+
+class Bucket:
+    """Directory under the client root"""
+
+    def __init__(self, client: "Client", name: str):
+        self.client = client
+        self.name = name
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.client.root, self.name)
+
+    def blob(self, name: str) -> Blob:
+        return Blob(self, name)
+
+    def list_blobs(self, prefix: str = None):
+        return self.client.list_blobs(self, prefix=prefix)
+
+
+class Client:
+    """Storage client over a local directory tree"""
+
+    def __init__(self, root: str = None, project: str = None):
+        """
+        Args:
+            root: Directory holding one subdirectory per bucket, defaults to $LOCAL_STORAGE_ROOT
+            project: Ignored, accepted for compatibility with storage.Client
+        """
+        root = root or os.environ.get(ROOT_ENV)
+        if not root:
+            raise ValueError(f"No storage root given and {ROOT_ENV} is not set")
+        self.root = os.path.abspath(root)
+
+    def bucket(self, name: str) -> Bucket:
+        return Bucket(self, name.replace("gs://", ""))
+
+    def list_blobs(self, bucket, prefix: str = None):
+        """Objects of a bucket (name or Bucket) whose name starts with prefix, sorted by name"""
+        if isinstance(bucket, str):
+            bucket = self.bucket(bucket)
+        prefix = prefix or ""
+        # Only walk the directory the prefix points into
+        start = os.path.join(bucket.path, os.path.dirname(prefix))
+
+        names = []
+        for directory, _, files in os.walk(start):
+            for file_name in files:
+                if file_name.startswith(_UPLOAD_PREFIX):
+                    continue
+                name = os.path.relpath(os.path.join(directory, file_name), bucket.path).replace(os.sep, "/")
+                if name.startswith(prefix):
+                    names.append(name)
+        return [Blob(bucket, name) for name in sorted(names)]
@@ -1,4 +1,7 @@
+import inspect
+import tempfile
 from dataclasses import dataclass
+from types import ModuleType
 from typing import Optional, Dict, Any, List, Union
 from pathlib import Path
 from google.cloud import aiplatform
@@ -88,7 +91,7 @@ class ModelTrainer:
                 "script_path": script_path,
                 "container_uri": "us-docker.pkg.dev/vertex-ai/training/pytorch-gpu.1-13:latest",
                 "args": args or {},
-                "requirements": ["torch", "transformers", "datasets", "evaluate"],
+                "requirements": ["torch", "transformers", "datasets", "evaluate", "pyarrow", "pandas"],
                 "machine_type": self.config.machine_type,
                 "accelerator_type": self.config.accelerator_type,
                 "accelerator_count": self.config.accelerator_count
@@ -98,15 +101,51 @@ class ModelTrainer:
         job.run()
         return job
     
+    @staticmethod
+    def _bundle_script(script_path: str, dependencies: List[ModuleType], bundle_dir: str) -> str:
+        """Write a copy of the script into bundle_dir that first writes the dependency modules to a temporary directory"""
+        dependency_sources = {
+            module.__name__.split(".")[-1]: inspect.getsource(module)
+            for module in dependencies
+        }
+        prelude = (
+            "import os, sys, tempfile\n"
+            "_dependency_dir = tempfile.mkdtemp(prefix='training-dependencies-')\n"
+            f"for module_name, module_source in {dependency_sources!r}.items():\n"
+            "    with open(os.path.join(_dependency_dir, module_name + '.py'), 'w', encoding='utf-8') as f:\n"
+            "        f.write(module_source)\n"
+            "sys.path.insert(0, _dependency_dir)\n"
+        )
+        bundle_path = Path(bundle_dir) / Path(script_path).name
+        bundle_path.write_text(prelude + "\n" + Path(script_path).read_text(encoding="utf-8"), encoding="utf-8")
+        return str(bundle_path)
+
+    @staticmethod
+    def _format_args(args: Optional[Dict[str, Any]]) -> List[str]:
+        """Turn {"learning_rate": 1e-4, "bucketing": True} into ["--learning_rate=0.0001", "--bucketing"]"""
+        formatted = []
+        for name, value in (args or {}).items():
+            if value is True:
+                formatted.append(f"--{name}")
+            elif value not in (False, None):
+                formatted.append(f"--{name}={value}")
+        return formatted
+
     def submit_training_job(
         self, 
         script_path: str, 
         args: Optional[Dict[str, Any]] = None,
         experiment_name: Optional[str] = None,
         run_name: Optional[str] = None,
-        sync: bool = True
+        sync: bool = True,
+        dependencies: Optional[List[ModuleType]] = None
     ) -> aiplatform.CustomJob:
-        """Submit a training job to Vertex AI with optional experiment tracking"""
+        """Submit a training job to Vertex AI with optional experiment tracking
+
+        Args are passed to the script as --name=value flags (--name for True). Local modules
+        the script imports, e.g. training_dataset and length_bucketing, are shipped with
+        dependencies=[module] and importable on the training machine.
+        """
         # Ensure script exists
         if not Path(script_path).exists():
             raise FileNotFoundError(f"Script not found at {script_path}")
@@ -115,17 +154,22 @@ class ModelTrainer:
         run = None
         if experiment_name and run_name:
             run = self.start_run(experiment_name, run_name, args)
+        
+        with tempfile.TemporaryDirectory(prefix="training-script-") as bundle_dir:
+            if dependencies:
+                script_path = self._bundle_script(script_path, dependencies, bundle_dir)
             
-        job = aiplatform.CustomJob.from_local_script(
-            display_name=f"training-job-{self.environment}",
-            script_path=script_path,
-            container_uri="us-docker.pkg.dev/vertex-ai/training/pytorch-gpu.1-13:latest",
-            args=args or {},
-            requirements=["torch", "transformers", "datasets", "evaluate"],
-            machine_type=self.config.machine_type,
-            accelerator_type=self.config.accelerator_type,
-            accelerator_count=self.config.accelerator_count
-        )
+            # from_local_script packages and uploads the script right away, the bundle is not needed afterwards
+            job = aiplatform.CustomJob.from_local_script(
+                display_name=f"training-job-{self.environment}",
+                script_path=script_path,
+                container_uri="us-docker.pkg.dev/vertex-ai/training/pytorch-gpu.1-13:latest",
+                args=self._format_args(args),
+                requirements=["torch", "transformers", "datasets", "evaluate", "pyarrow", "pandas"],
+                machine_type=self.config.machine_type,
+                accelerator_type=self.config.accelerator_type,
+                accelerator_count=self.config.accelerator_count
+            )
         
         job.run(sync=sync)
         
@@ -0,0 +1,320 @@
+import json
+import os
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class LeaseLost(Exception):
+    """Raised when another worker took over a lease because its heartbeat was missed"""
+
+
+class WorkQueue:
+    """Lease-based queue over a fixed list of work items
+
+    Workers claim one item at a time by creating a lease marker, renew it with heartbeats
+    while they process the item and mark it done afterwards. A lease that was not renewed
+    for lease_seconds, e.g. because its SPOT worker was preempted, is taken over by the next
+    worker that looks for work. Idle workers keep claiming until every item is done, so the
+    makespan approaches the total work divided by the number of workers.
+
+    Subclasses store the markers: `_state`, `_create`, `_take_over`, `_renew`, `_mark_done`
+    and `_release`.
+    """
+
+    def __init__(
+        self,
+        items: List[Dict[str, Any]],
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 600.0,
+        poll_seconds: float = 30.0
+    ):
+        """
+        Args:
+            items: Work items, e.g. the entries of a CloudProcessor manifest
+            worker_id: Name written into leases, defaults to host name and process id
+            lease_seconds: A lease without heartbeat for this long may be taken over
+            poll_seconds: Wait between claim attempts while other workers hold the remaining items
+        """
+        self.items = items
+        self.worker_id = str(worker_id if worker_id is not None else f"{socket.gethostname()}-{os.getpid()}")
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+
+    @staticmethod
+    def _key(index: int) -> str:
+        return f"{index:06d}"
+
+    def _state(self) -> Tuple[set, Dict[str, Tuple[float, Any]]]:
+        """Keys of done items and {key: (seconds since the last heartbeat, token)} of leases"""
+        raise NotImplementedError
+
+    def _create(self, key: str) -> bool:
+        """Atomically create a lease, False if one exists"""
+        raise NotImplementedError
+
+    def _take_over(self, key: str, token: Any) -> bool:
+        """Atomically replace the expired lease identified by token, False if another worker was faster"""
+        raise NotImplementedError
+
+    def _renew(self, key: str):
+        """Extend an owned lease, raises LeaseLost if it was taken over"""
+        raise NotImplementedError
+
+    def _mark_done(self, key: str):
+        raise NotImplementedError
+
+    def _release(self, key: str):
+        raise NotImplementedError
+
+    def claim(self) -> Optional[int]:
+        """Lease the first item that is neither done nor leased by a live worker
+
+        Returns:
+            int: Index of the claimed item, or None if there is nothing to claim right now
+        """
+        done, leases = self._state()
+        for index in range(len(self.items)):
+            key = self._key(index)
+            if key in done:
+                continue
+            lease = leases.get(key)
+            if lease is None:
+                if self._create(key):
+                    return index
+            elif lease[0] > self.lease_seconds:
+                if self._take_over(key, lease[1]):
+                    print(f"Took over expired lease of item {index} ({lease[0]:.0f}s without heartbeat)")
+                    return index
+        return None
+
+    def heartbeat(self, index: int):
+        """Renew the lease of a claimed item"""
+        self._renew(self._key(index))
+
+    def complete(self, index: int):
+        """Mark a claimed item as done and drop its lease"""
+        key = self._key(index)
+        self._mark_done(key)
+        self._release(key)
+
+    def remaining(self) -> int:
+        """Number of items not done yet"""
+        done, _ = self._state()
+        return len(self.items) - len(done)
+
+    def _keep_alive(self, index: int, stop: threading.Event):
+        while not stop.wait(self.lease_seconds / 3):
+            try:
+                self.heartbeat(index)
+            except LeaseLost:
+                print(f"Lost the lease of item {index}, another worker took it over")
+                return
+
+    def run(self, process: Callable[[Dict[str, Any]], Any]) -> int:
+        """Claim and process items until every item is done
+
+        Args:
+            process: Called with each claimed item, a heartbeat thread renews its lease meanwhile
+
+        Returns:
+            int: Number of items this worker processed
+        """
+        processed = 0
+        while True:
+            index = self.claim()
+            if index is None:
+                remaining = self.remaining()
+                if remaining == 0:
+                    break
+                # Leased by other workers, wait in case one of them is preempted
+                wait = min(self.poll_seconds, self.lease_seconds)
+                print(f"{remaining} items leased by other workers, waiting {wait:.0f}s")
+                time.sleep(wait)
+                continue
+
+            print(f"Worker {self.worker_id} claimed item {index} of {len(self.items)}")
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._keep_alive, args=(index, stop), daemon=True)
+            heartbeat.start()
+            try:
+                process(self.items[index])
+            finally:
+                stop.set()
+                heartbeat.join()
+            self.complete(index)
+            processed += 1
+        return processed
+
+
+class LocalWorkQueue(WorkQueue):
+    """Work queue with lease and done markers as files in a local directory
+
+    Meant for tests and local runs: several processes on one machine share the directory.
+    Leases are created with O_EXCL, heartbeats touch the file, and an expired lease is taken
+    over by whoever first creates a steal marker for its modification time.
+    """
+
+    def __init__(self, directory: str, items: List[Dict[str, Any]], **kwargs):
+        """
+        Args:
+            directory: Directory holding the leases/ and done/ markers
+            items: Work items
+            **kwargs: Passed to WorkQueue
+        """
+        super().__init__(items, **kwargs)
+        self.lease_dir = os.path.join(directory, "leases")
+        self.done_dir = os.path.join(directory, "done")
+        os.makedirs(self.lease_dir, exist_ok=True)
+        os.makedirs(self.done_dir, exist_ok=True)
+
+    def _lease_path(self, key: str) -> str:
+        return os.path.join(self.lease_dir, key)
+
+    def _state(self):
+        done = set(os.listdir(self.done_dir))
+        leases = {}
+        now = time.time()
+        for entry in os.scandir(self.lease_dir):
+            if "." in entry.name:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            leases[entry.name] = (now - stat.st_mtime, stat.st_mtime_ns)
+        return done, leases
+
+    def _create(self, key: str) -> bool:
+        try:
+            fd = os.open(self._lease_path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(self.worker_id)
+        return True
+
+    def _take_over(self, key: str, token: Any) -> bool:
+        # Only one worker can create the steal marker for this generation of the lease
+        try:
+            fd = os.open(f"{self._lease_path(key)}.steal-{token}", os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        with open(self._lease_path(key), "w") as f:
+            f.write(self.worker_id)
+        return True
+
+    def _renew(self, key: str):
+        try:
+            with open(self._lease_path(key)) as f:
+                owner = f.read()
+        except FileNotFoundError:
+            owner = None
+        if owner != self.worker_id:
+            raise LeaseLost(key)
+        os.utime(self._lease_path(key))
+
+    def _mark_done(self, key: str):
+        open(os.path.join(self.done_dir, key), "w").close()
+
+    def _release(self, key: str):
+        for name in os.listdir(self.lease_dir):
+            if name == key or name.startswith(f"{key}.steal-"):
+                try:
+                    os.remove(os.path.join(self.lease_dir, name))
+                except FileNotFoundError:
+                    pass
+
+
+class GCSWorkQueue(WorkQueue):
+    """Work queue with lease and done markers as Cloud Storage objects
+
+    Leases are created with if_generation_match=0 and renewed or taken over with a match on
+    their current generation, so every transition is atomic on the bucket. Liveness is the
+    object's update time. Completed items are recorded in a single done.json state object
+    of the run, updated with a generation match, so a claim costs one read of it and one
+    listing of leases/, which only holds the leases of running or preempted workers.
+    """
+
+    def __init__(self, bucket: str, prefix: str, items: List[Dict[str, Any]], **kwargs):
+        """
+        Args:
+            bucket: Bucket name without gs:// prefix
+            prefix: Object prefix of the queue, e.g. queues/<job>
+            items: Work items
+            **kwargs: Passed to WorkQueue
+        """
+        super().__init__(items, **kwargs)
+        from google.cloud import storage
+        self.client = storage.Client()
+        self.bucket = self.client.bucket(bucket.replace("gs://", ""))
+        self.prefix = prefix.rstrip("/")
+        self._generations = {}
+
+    def _lease_blob(self, key: str):
+        return self.bucket.blob(f"{self.prefix}/leases/{key}")
+
+    def _read_done(self) -> Tuple[set, int]:
+        """Keys of done items and the generation of the state object, 0 before the first item is done"""
+        from google.api_core.exceptions import NotFound
+        blob = self.bucket.blob(f"{self.prefix}/done.json")
+        try:
+            data = blob.download_as_bytes()
+        except NotFound:
+            return set(), 0
+        return set(json.loads(data)), blob.generation
+
+    def _state(self):
+        done, _ = self._read_done()
+        leases = {}
+        now = time.time()
+        for blob in self.client.list_blobs(self.bucket, prefix=f"{self.prefix}/leases/"):
+            leases[blob.name.rsplit("/", 1)[-1]] = (now - blob.updated.timestamp(), blob.generation)
+        return done, leases
+
+    def _write_lease(self, key: str, generation: int) -> bool:
+        from google.api_core.exceptions import PreconditionFailed
+        blob = self._lease_blob(key)
+        try:
+            blob.upload_from_string(self.worker_id, if_generation_match=generation)
+        except PreconditionFailed:
+            return False
+        self._generations[key] = blob.generation
+        return True
+
+    def _create(self, key: str) -> bool:
+        return self._write_lease(key, 0)
+
+    def _take_over(self, key: str, token: Any) -> bool:
+        return self._write_lease(key, token)
+
+    def _renew(self, key: str):
+        if not self._write_lease(key, self._generations.get(key)):
+            raise LeaseLost(key)
+
+    def _mark_done(self, key: str):
+        from google.api_core.exceptions import PreconditionFailed
+        while True:
+            done, generation = self._read_done()
+            if key in done:
+                return
+            try:
+                self.bucket.blob(f"{self.prefix}/done.json").upload_from_string(
+                    json.dumps(sorted(done | {key})),
+                    content_type="application/json",
+                    if_generation_match=generation
+                )
+                return
+            except PreconditionFailed:
+                # Another worker completed an item in between, retry on its version
+                time.sleep(random.uniform(0.1, 1.0))
+
+    def _release(self, key: str):
+        from google.api_core.exceptions import NotFound, PreconditionFailed
+        try:
+            self._lease_blob(key).delete(if_generation_match=self._generations.pop(key, None))
+        except (NotFound, PreconditionFailed):
+            pass